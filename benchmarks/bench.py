@@ -0,0 +1,311 @@
+"""PyTerminal 基准测试
+
+覆盖脚本解释器（while 算术循环、函数调用、深层嵌套、大量变量）、文件类内置命令
+（grep/sort/uniq/head/tail/cp，使用生成的大文件）以及 ASCII 图片渲染。
+
+    python benchmarks/bench.py -o results.json                 # 运行并保存结果
+    python benchmarks/bench.py --compare results.json          # 与基线比较，有退化时退出码为 1
+    python benchmarks/bench.py --quick --filter interp         # 小数据量，只跑部分用例
+
+运行时不加载 Qt，命令输出被丢弃，只统计行数和错误。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.output_sink import COLOR_OUTPUT, OutputSink  # noqa: E402
+from src.shell_core import ShellCore  # noqa: E402
+from src.shell_parser import ShellParser  # noqa: E402
+
+
+class CountingSink(OutputSink):
+    """丢弃输出，只记录行数和第一条错误信息"""
+
+    def __init__(self):
+        self.lines = 0
+        self.errors = []
+
+    def write(self, text, color=COLOR_OUTPUT):
+        self.lines += 1
+
+    def write_error(self, text):
+        self.errors.append(text)
+
+
+class BenchShell(ShellCore):
+    def __init__(self):
+        self.sink = CountingSink()
+        self.init_shell(self.sink)
+        self.current_dir = PROJECT_ROOT
+
+
+class Benchmark:
+    """一个基准用例：每次运行都使用新的 BenchShell，run(shell) 执行被测操作
+
+    setup 在第一次运行前调用（例如生成测试数据），不计入耗时。
+    """
+
+    def __init__(self, name, run, description="", setup=None):
+        self.name = name
+        self.run = run
+        self.description = description
+        self.setup = setup
+
+
+def script_benchmark(name, source, description=""):
+    def run(shell):
+        ShellParser(shell).parse(source, shell.current_dir)
+    return Benchmark(name, run, description)
+
+
+def command_benchmark(name, command, description="", setup=None):
+    def run(shell):
+        shell.current_cmd = command
+        shell.execute_command_internal()
+    return Benchmark(name, run, description, setup)
+
+
+# === 解释器用例 ===
+def interpreter_benchmarks():
+    loops = 20000
+    calls = 5000
+    nesting = 15
+    variables = 5000
+
+    nested_open = ''.join(f"if [ $i -ge {depth} ];\n" for depth in range(nesting))
+    nested_close = "fi\n" * nesting
+    variable_lines = ''.join(f"v{n}={n}\n" for n in range(variables))
+    variable_reads = ''.join(f"x=$v{n}\n" for n in range(variables))
+
+    return [
+        script_benchmark("interp.while_arith", f"""i=0
+s=0
+while [ $i -lt {loops} ];
+s=$((s+i))
+i=$((i+1))
+done
+""", f"while 循环 {loops} 次，每次两次算术扩展"),
+        script_benchmark("interp.for_range", f"""s=0
+for i in 1..{loops};
+((s+=i))
+done
+""", f"for 计数循环 {loops} 次"),
+        script_benchmark("interp.function_calls", f"""def add(a,b) {{
+return $((a+b))
+}}
+s=0
+for i in 1..{calls};
+s=$(add($s,$i))
+done
+""", f"函数调用 {calls} 次"),
+        script_benchmark("interp.recursion", """def fib(n) {
+if [ $n -lt 2 ];
+return $n
+fi
+local a=$(fib($((n-1))))
+local b=$(fib($((n-2))))
+return $((a+b))
+}
+r=$(fib(15))
+""", "递归 fib(15)"),
+        script_benchmark("interp.deep_recursion", f"""def depth(n) {{
+if [ $n -le 0 ];
+return 0
+fi
+local d=$(depth($((n-1))))
+return $((d+1))
+}}
+r=$(depth({calls}))
+""", f"{calls} 层深递归"),
+        script_benchmark("interp.deep_nesting", f"""for i in 1..{loops // 4};
+{nested_open}x=$i
+{nested_close}done
+""", f"{nesting} 层嵌套 if，循环 {loops // 4} 次"),
+        script_benchmark("interp.assoc_counts", f"""declare -A counts
+for i in 1..{loops};
+((counts[$((i % 100))]++))
+done
+""", f"关联数组按键计数 {loops} 次"),
+        script_benchmark("interp.variable_table", variable_lines + variable_reads,
+                         f"{variables} 个变量的赋值与读取"),
+    ]
+
+
+# === 文件命令用例 ===
+_WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta', 'kappa', 'lambda']
+_LEVELS = ['DEBUG', 'INFO', 'INFO', 'INFO', 'WARN', 'ERROR']
+
+
+def generate_log_file(path, size_mb, seed=42):
+    """生成约 size_mb MB 的日志文件，内容由固定种子决定，便于多次运行之间比较"""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w', encoding="utf-8") as f:
+        batch = []
+        while written < target:
+            line = (f"2024-01-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d} "
+                    f"host{rng.randint(1, 50)} {rng.choice(_LEVELS)} "
+                    f"{' '.join(rng.choice(_WORDS) for _ in range(5))}\n")
+            batch.append(line)
+            written += len(line)
+            if len(batch) >= 10000:
+                f.writelines(batch)
+                batch = []
+        f.writelines(batch)
+
+
+def file_benchmarks(data_dir, size_mb):
+    log_path = os.path.join(data_dir, "bench.log")
+    copy_path = os.path.join(data_dir, "bench_copy.log")
+
+    def ensure_data():
+        if not os.path.exists(log_path) or os.path.getsize(log_path) < size_mb * 1024 * 1024:
+            print(f"generating {size_mb} MB test data in {data_dir} ...", flush=True)
+            generate_log_file(log_path, size_mb)
+
+    cases = [
+        ("file.grep", f"grep ERROR {log_path}", f"grep，{size_mb} MB"),
+        ("file.grep_pipeline", f"grep ERROR {log_path} | grep -v host1 | head -n 1000",
+         f"grep | grep -v | head 管道，{size_mb} MB"),
+        ("file.sort", f"sort {log_path}", f"sort，{size_mb} MB"),
+        ("file.uniq", f"uniq {log_path}", f"uniq，{size_mb} MB"),
+        ("file.head", f"head -n 1000 {log_path}", "head -n 1000"),
+        ("file.tail", f"tail -n 1000 {log_path}", f"tail -n 1000，{size_mb} MB"),
+        ("file.cp", f"cp {log_path} {copy_path}", f"cp，{size_mb} MB"),
+    ]
+    return [command_benchmark(name, command, description, ensure_data) for name, command, description in cases]
+
+
+def render_benchmarks():
+    image = os.path.join("resources", "something.png")
+    return [command_benchmark("render.asciishow", f"asciishow {image}", "ASCII 图片渲染")]
+
+
+# === 运行与比较 ===
+def run_benchmark(benchmark, repeat):
+    if benchmark.setup is not None:
+        benchmark.setup()
+    timings = []
+    lines = 0
+    for _ in range(repeat):
+        shell = BenchShell()
+        started = time.perf_counter()
+        benchmark.run(shell)
+        timings.append(time.perf_counter() - started)
+        shell.jobs.shutdown()
+        if shell.sink.errors:
+            return {"error": shell.sink.errors[0], "description": benchmark.description}
+        lines = shell.sink.lines
+    return {
+        "description": benchmark.description,
+        "runs": timings,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "output_lines": lines,
+    }
+
+
+def compare(results, baseline, threshold):
+    """按中位数比较，返回 (报告行, 退化的用例名列表)"""
+    report = [f"{'benchmark':<26} {'baseline ms':>12} {'current ms':>12} {'change':>9}  status"]
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or "median" not in base or "median" not in current:
+            report.append(f"{name:<26} {'-':>12} {'-':>12} {'-':>9}  skipped")
+            continue
+        change = current["median"] / base["median"] - 1 if base["median"] else 0.0
+        if change > threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        report.append(f"{name:<26} {base['median'] * 1000:>12.2f} {current['median'] * 1000:>12.2f} "
+                      f"{change * 100:>+8.1f}%  {status}")
+    return report, regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="PyTerminal 基准测试")
+    arg_parser.add_argument('-o', '--output', help='把结果写入 JSON 文件')
+    arg_parser.add_argument('--compare', metavar='BASELINE', help='与基线 JSON 比较，中位数变慢超过阈值时退出码为 1')
+    arg_parser.add_argument('--threshold', type=float, default=0.10, help='判定退化的相对阈值（默认 0.10）')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='每个用例的运行次数（默认 5）')
+    arg_parser.add_argument('--size-mb', type=int, default=200, help='文件命令用例的数据大小（默认 200 MB）')
+    arg_parser.add_argument('--quick', action='store_true', help='小数据量快速运行（5 MB 文件、每个用例运行 3 次）')
+    arg_parser.add_argument('--filter', default='', help='只运行名称包含该字符串的用例')
+    arg_parser.add_argument('--data-dir', help='生成数据的目录（默认使用临时目录，结束后删除）')
+    args = arg_parser.parse_args(argv)
+
+    size_mb = args.size_mb
+    repeat = args.repeat
+    if args.quick:
+        size_mb = min(size_mb, 5)
+        repeat = min(repeat, 3)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="pyterm-bench-")
+    os.makedirs(data_dir, exist_ok=True)
+    try:
+        benchmarks = interpreter_benchmarks() + file_benchmarks(data_dir, size_mb) + render_benchmarks()
+        benchmarks = [b for b in benchmarks if args.filter in b.name]
+
+        results = {}
+        print(f"{'benchmark':<26} {'min ms':>10} {'median ms':>10} {'mean ms':>10}  description")
+        for benchmark in benchmarks:
+            result = run_benchmark(benchmark, repeat)
+            results[benchmark.name] = result
+            if "error" in result:
+                print(f"{benchmark.name:<26} {'error':>10}  {result['error']}")
+                continue
+            print(f"{benchmark.name:<26} {result['min'] * 1000:>10.2f} {result['median'] * 1000:>10.2f} "
+                  f"{result['mean'] * 1000:>10.2f}  {benchmark.description}")
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    document = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "size_mb": size_mb,
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+        print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("size_mb") != size_mb:
+            print(f"warning: baseline uses size_mb={baseline.get('meta', {}).get('size_mb')}, current run uses {size_mb}")
+        report, regressions = compare(results, baseline.get("results", {}), args.threshold)
+        print()
+        print("\n".join(report))
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import re
+from collections import namedtuple
+
+
+# 一段文字的显示属性；fg/bg 为 #RRGGBB，None 表示使用默认颜色
+AnsiStyle = namedtuple('AnsiStyle', 'fg bg bold italic underline inverse')
+DEFAULT_STYLE = AnsiStyle(None, None, False, False, False, False)
+
+# 16 色调色板（与 xterm 默认配色一致）
+_BASIC_COLORS = (
+    '#000000', '#CD0000', '#00CD00', '#CDCD00', '#0000EE', '#CD00CD', '#00CDCD', '#E5E5E5',
+    '#7F7F7F', '#FF0000', '#00FF00', '#FFFF00', '#5C5CFF', '#FF00FF', '#00FFFF', '#FFFFFF',
+)
+
+# CSI 序列（ESC [ 参数 结束字符）、OSC 序列（ESC ] ... BEL/ST）以及其他两字符转义
+_ESCAPE_RE = re.compile(r'\x1b(?:\[([0-9;:?]*)([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])')
+# 文本末尾不完整的转义序列，留到下一次 feed 再解析
+_PARTIAL_RE = re.compile(r'\x1b(?:\[[0-9;:?]*|\][^\x07\x1b]*)?$')
+
+
+def _palette_256(index):
+    if index < 16:
+        return _BASIC_COLORS[index]
+    if index < 232:
+        index -= 16
+        levels = [0 if v == 0 else 55 + v * 40 for v in (index // 36, index // 6 % 6, index % 6)]
+        return '#%02X%02X%02X' % tuple(levels)
+    gray = 8 + (index - 232) * 10
+    return '#%02X%02X%02X' % (gray, gray, gray)
+
+
+def _extended_color(params, i):
+    """解析 38/48 之后的 5;n 或 2;r;g;b，返回 (颜色, 下一个参数位置)"""
+    if i < len(params) and params[i] == 5 and i + 1 < len(params):
+        return _palette_256(min(params[i + 1], 255)), i + 2
+    if i < len(params) and params[i] == 2 and i + 3 < len(params):
+        r, g, b = (min(v, 255) for v in params[i + 1:i + 4])
+        return '#%02X%02X%02X' % (r, g, b), i + 4
+    return None, len(params)
+
+
+def apply_sgr(style, params):
+    """把一条 SGR 序列（ESC [ ... m）的参数作用到 style 上，返回新的 style"""
+    if not params:
+        return DEFAULT_STYLE
+    fg, bg, bold, italic, underline, inverse = style
+    i = 0
+    while i < len(params):
+        code = params[i]
+        i += 1
+        if code == 0:
+            fg, bg, bold, italic, underline, inverse = DEFAULT_STYLE
+        elif code == 1:
+            bold = True
+        elif code == 3:
+            italic = True
+        elif code == 4:
+            underline = True
+        elif code == 7:
+            inverse = True
+        elif code == 22:
+            bold = False
+        elif code == 23:
+            italic = False
+        elif code == 24:
+            underline = False
+        elif code == 27:
+            inverse = False
+        elif 30 <= code <= 37:
+            fg = _BASIC_COLORS[code - 30]
+        elif 90 <= code <= 97:
+            fg = _BASIC_COLORS[code - 90 + 8]
+        elif code == 39:
+            fg = None
+        elif 40 <= code <= 47:
+            bg = _BASIC_COLORS[code - 40]
+        elif 100 <= code <= 107:
+            bg = _BASIC_COLORS[code - 100 + 8]
+        elif code == 49:
+            bg = None
+        elif code == 38:
+            fg, i = _extended_color(params, i)
+        elif code == 48:
+            bg, i = _extended_color(params, i)
+    return AnsiStyle(fg, bg, bold, italic, underline, inverse)
+
+
+class AnsiParser:
+    """增量解析 ANSI 转义序列，把文本切分为 (文字, AnsiStyle) 片段
+
+    SGR 状态在多次 feed 之间保持（与终端一致，颜色可以跨行）；在一次 feed 的末尾
+    被截断的转义序列会留到下一次拼接。相邻同样式的片段合并为一个，
+    每个字符单独着色的输出也只产生样式变化次数个片段。其他 CSI/OSC 序列（光标移动等）被丢弃。
+    """
+
+    def __init__(self):
+        self.style = DEFAULT_STYLE
+        self._partial = ''
+
+    @property
+    def active(self):
+        """当前样式不是默认样式，后续不含转义的文本也需要按样式显示"""
+        return self.style != DEFAULT_STYLE
+
+    def reset(self):
+        self.style = DEFAULT_STYLE
+        self._partial = ''
+
+    def feed(self, text):
+        if self._partial:
+            text = self._partial + text
+            self._partial = ''
+        if '\x1b' not in text:
+            return [(text, self.style)] if text else []
+
+        partial = _PARTIAL_RE.search(text)
+        if partial is not None:
+            self._partial = text[partial.start():]
+            text = text[:partial.start()]
+
+        runs = []
+        style = self.style
+        pieces = []
+        pos = 0
+        for match in _ESCAPE_RE.finditer(text):
+            if match.start() > pos:
+                pieces.append(text[pos:match.start()])
+            pos = match.end()
+            if match.group(2) != 'm':
+                continue
+            new_style = apply_sgr(style, _sgr_params(match.group(1)))
+            if new_style != style:
+                if pieces:
+                    runs.append((''.join(pieces), style))
+                    pieces = []
+                style = new_style
+        if pos < len(text):
+            pieces.append(text[pos:])
+        if pieces:
+            runs.append((''.join(pieces), style))
+        self.style = style
+        return runs
+
+
+def _sgr_params(text):
+    params = []
+    for part in text.replace(':', ';').split(';'):
+        params.append(int(part) if part.isdigit() else 0)
+    return params if text else []
+
@@ -0,0 +1,438 @@
+import re
+from functools import lru_cache
+
+
+class ArithmeticEvalError(Exception):
+    """算术表达式语法错误或求值失败"""
+
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<num>0[xX][0-9a-fA-F]+|\d+)
+      | \$\{(?P<braced>\w+)(?:\[(?P<subscript>[^\]]*)\])?\}
+      | \$?(?P<name>[A-Za-z_]\w*)
+      | (?P<op>\*\*=?|<<=|>>=|\+\+|--|&&|\|\||<<|>>|<=|>=|==|!=|[-+*/%&|^]=|[-+*/%&|^<>=!~?:(),])
+    )''', re.VERBOSE)
+
+# 二元运算符的结合优先级（数值越大越先结合），与 bash 保持一致
+_BINARY_PRECEDENCE = {
+    ',': 1,
+    '=': 2, '+=': 2, '-=': 2, '*=': 2, '/=': 2, '%=': 2,
+    '<<=': 2, '>>=': 2, '&=': 2, '^=': 2, '|=': 2, '**=': 2,
+    '?': 3,
+    '||': 4,
+    '&&': 5,
+    '|': 6,
+    '^': 7,
+    '&': 8,
+    '==': 9, '!=': 9,
+    '<': 10, '>': 10, '<=': 10, '>=': 10,
+    '<<': 11, '>>': 11,
+    '+': 12, '-': 12,
+    '*': 13, '/': 13, '%': 13,
+    '**': 14,
+}
+_RIGHT_ASSOC = {'**', '?'}
+_ASSIGN_OPS = {'=', '+=', '-=', '*=', '/=', '%=', '<<=', '>>=', '&=', '^=', '|=', '**='}
+
+# 变量值本身是表达式时递归求值的最大深度
+_MAX_RECURSION = 32
+
+# 与 bash 一致，结果按 64 位有符号整数回绕
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+_UINT64_MASK = (1 << 64) - 1
+
+
+def _wrap(value):
+    return ((value - _INT64_MIN) & _UINT64_MASK) + _INT64_MIN
+
+
+def _div(a, b):
+    if b == 0:
+        raise ArithmeticEvalError("division by 0")
+    q = abs(a) // abs(b)
+    return q if (a >= 0) == (b >= 0) else -q
+
+
+def _mod(a, b):
+    if b == 0:
+        raise ArithmeticEvalError("division by 0")
+    return a - _div(a, b) * b
+
+
+def _pow(a, b):
+    if b < 0:
+        raise ArithmeticEvalError("exponent less than 0")
+    # 模 2**64 求幂，巨大的指数也不会产生巨大的中间结果
+    return _wrap(pow(a, b, 1 << 64))
+
+
+def _shift_left(a, b):
+    if b < 0:
+        raise ArithmeticEvalError("negative shift count")
+    # 移位次数与 x86 上的 bash 一样取低 6 位
+    return _wrap(a << (b & 63))
+
+
+def _shift_right(a, b):
+    if b < 0:
+        raise ArithmeticEvalError("negative shift count")
+    return _wrap(a) >> (b & 63)
+
+
+_BINARY_FUNCS = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': _div,
+    '%': _mod,
+    '**': _pow,
+    '<<': _shift_left,
+    '>>': _shift_right,
+    '&': lambda a, b: a & b,
+    '|': lambda a, b: a | b,
+    '^': lambda a, b: a ^ b,
+    '<': lambda a, b: int(a < b),
+    '>': lambda a, b: int(a > b),
+    '<=': lambda a, b: int(a <= b),
+    '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b),
+    '!=': lambda a, b: int(a != b),
+}
+
+
+def _find_subscript_end(expr, pos):
+    """返回与 [ 配对的 ] 的位置（下标中可以嵌套 []）"""
+    depth = 0
+    length = len(expr)
+    while pos < length:
+        c = expr[pos]
+        if c == '[':
+            depth += 1
+        elif c == ']':
+            if depth == 0:
+                return pos
+            depth -= 1
+        pos += 1
+    raise ArithmeticEvalError(f"syntax error: missing ']' in '{expr}'")
+
+
+def _tokenize(expr):
+    tokens = []
+    pos = 0
+    length = len(expr)
+    while pos < length:
+        if expr[pos].isspace():
+            pos += 1
+            continue
+        match = _TOKEN_RE.match(expr, pos)
+        if not match or match.end() == pos:
+            raise ArithmeticEvalError(f"syntax error: invalid token at '{expr[pos:]}'")
+        pos = match.end()
+        if match.group('num') is not None:
+            tokens.append(('num', int(match.group('num'), 0) if match.group('num')[:2].lower() == '0x'
+                           else int(match.group('num'))))
+        elif match.group('braced') is not None:
+            if match.group('subscript') is not None:
+                tokens.append(('elem', (match.group('braced'), match.group('subscript'))))
+            else:
+                tokens.append(('name', match.group('braced')))
+        elif match.group('name') is not None:
+            if pos < length and expr[pos] == '[':
+                # 数组元素 a[expr]：下标原样保留，执行期由数组类型决定按算术还是按键求值
+                end = _find_subscript_end(expr, pos + 1)
+                tokens.append(('elem', (match.group('name'), expr[pos + 1:end])))
+                pos = end + 1
+            else:
+                tokens.append(('name', match.group('name')))
+        else:
+            tokens.append(('op', match.group('op')))
+    tokens.append(('end', None))
+    return tokens
+
+
+class _Parser:
+    """Pratt 解析器：把表达式编译成嵌套闭包，执行期只做函数调用和整数运算
+
+    每个闭包的签名为 node(ctx)，ctx 为 ArithmeticEvaluator，提供 lookup/assign，
+    数组元素通过 lookup_element/assign_element 读写。赋值目标为变量名字符串，
+    或数组元素的 (数组名, 下标) 元组。
+    """
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.tokens = _tokenize(expr)
+        self.pos = 0
+
+    def parse(self):
+        if self.tokens[0][0] == 'end':
+            return lambda ctx: 0
+        node = self._expression(0)
+        kind, value = self.tokens[self.pos]
+        if kind != 'end':
+            raise ArithmeticEvalError(f"syntax error: unexpected '{value}' in '{self.expr}'")
+        return node
+
+    def _next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _peek(self):
+        return self.tokens[self.pos]
+
+    def _expect(self, op):
+        kind, value = self._next()
+        if kind != 'op' or value != op:
+            raise ArithmeticEvalError(f"syntax error: expected '{op}' in '{self.expr}'")
+
+    def _expression(self, min_precedence):
+        left, left_name = self._unary()
+        while True:
+            kind, op = self._peek()
+            if kind != 'op' or op not in _BINARY_PRECEDENCE:
+                break
+            precedence = _BINARY_PRECEDENCE[op]
+            if precedence < min_precedence:
+                break
+            self.pos += 1
+
+            if op in _ASSIGN_OPS:
+                if left_name is None:
+                    raise ArithmeticEvalError(f"attempted assignment to non-variable in '{self.expr}'")
+                right = self._expression(precedence)
+                left = self._make_assign(left_name, op, right)
+            elif op == '?':
+                when_true = self._expression(0)
+                self._expect(':')
+                when_false = self._expression(precedence)
+                left = self._make_ternary(left, when_true, when_false)
+            else:
+                next_precedence = precedence if op in _RIGHT_ASSOC else precedence + 1
+                right = self._expression(next_precedence)
+                left = self._make_binary(op, left, right)
+            left_name = None
+        return left
+
+    def _unary(self):
+        """返回 (闭包, 赋值目标)，目标仅在表达式恰为单个变量或数组元素时非空"""
+        kind, value = self._next()
+        if kind == 'num':
+            return (lambda ctx: value), None
+        if kind == 'elem':
+            array_name, subscript = value
+            kind, op = self._peek()
+            if kind == 'op' and op in ('++', '--'):
+                self.pos += 1
+                delta = 1 if op == '++' else -1
+                return self._make_postfix(value, delta), None
+            return (lambda ctx: ctx.lookup_element(array_name, subscript)), value
+        if kind == 'name':
+            name = value
+            node = lambda ctx: ctx.lookup(name)
+            kind, op = self._peek()
+            if kind == 'op' and op in ('++', '--'):
+                self.pos += 1
+                delta = 1 if op == '++' else -1
+                return self._make_postfix(name, delta), None
+            return node, name
+        if kind == 'op':
+            if value == '(':
+                node = self._expression(0)
+                self._expect(')')
+                return node, None
+            if value in ('++', '--'):
+                kind, name = self._next()
+                if kind not in ('name', 'elem'):
+                    raise ArithmeticEvalError(f"syntax error: '{value}' requires a variable in '{self.expr}'")
+                delta = 1 if value == '++' else -1
+                if kind == 'elem':
+                    array_name, subscript = name
+                    return (lambda ctx: ctx.assign_element(
+                        array_name, subscript, ctx.lookup_element(array_name, subscript) + delta)), None
+                return (lambda ctx: ctx.assign(name, ctx.lookup(name) + delta)), None
+            if value in ('-', '+', '!', '~'):
+                # 一元运算符比所有二元运算符（包括 **）都优先结合
+                operand, _ = self._unary()
+                if value == '-':
+                    return (lambda ctx: -operand(ctx)), None
+                if value == '+':
+                    return operand, None
+                if value == '!':
+                    return (lambda ctx: int(not operand(ctx))), None
+                return (lambda ctx: ~operand(ctx)), None
+        raise ArithmeticEvalError(f"syntax error: operand expected in '{self.expr}'")
+
+    @staticmethod
+    def _make_postfix(name, delta):
+        if isinstance(name, tuple):
+            array_name, subscript = name
+
+            def postfix(ctx):
+                old = ctx.lookup_element(array_name, subscript)
+                ctx.assign_element(array_name, subscript, old + delta)
+                return old
+            return postfix
+
+        def postfix(ctx):
+            old = ctx.lookup(name)
+            ctx.assign(name, old + delta)
+            return old
+        return postfix
+
+    @staticmethod
+    def _make_assign(name, op, right):
+        if isinstance(name, tuple):
+            array_name, subscript = name
+            if op == '=':
+                return lambda ctx: ctx.assign_element(array_name, subscript, right(ctx))
+            func = _BINARY_FUNCS[op[:-1]]
+            return lambda ctx: ctx.assign_element(
+                array_name, subscript, func(ctx.lookup_element(array_name, subscript), right(ctx)))
+        if op == '=':
+            return lambda ctx: ctx.assign(name, right(ctx))
+        func = _BINARY_FUNCS[op[:-1]]
+        return lambda ctx: ctx.assign(name, func(ctx.lookup(name), right(ctx)))
+
+    @staticmethod
+    def _make_ternary(cond, when_true, when_false):
+        return lambda ctx: when_true(ctx) if cond(ctx) else when_false(ctx)
+
+    @staticmethod
+    def _make_binary(op, left, right):
+        if op == ',':
+            return lambda ctx: (left(ctx), right(ctx))[1]
+        if op == '&&':
+            return lambda ctx: int(bool(left(ctx)) and bool(right(ctx)))
+        if op == '||':
+            return lambda ctx: int(bool(left(ctx)) or bool(right(ctx)))
+        if op == '+':
+            return lambda ctx: left(ctx) + right(ctx)
+        if op == '-':
+            return lambda ctx: left(ctx) - right(ctx)
+        if op == '*':
+            return lambda ctx: left(ctx) * right(ctx)
+        if op == '<':
+            return lambda ctx: int(left(ctx) < right(ctx))
+        func = _BINARY_FUNCS[op]
+        return lambda ctx: func(left(ctx), right(ctx))
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expr):
+    """编译算术表达式，结果按源字符串缓存"""
+    return _Parser(expr).parse()
+
+
+class ArithmeticEvaluator:
+    """整数算术求值器，变量通过回调直接读写，不做文本替换
+
+    get_var(name) 返回变量的字符串值（未定义时返回空串），
+    set_var(name, value) 写回字符串形式的结果；
+    get_element(name, subscript)/set_element(name, subscript, value) 读写数组元素，
+    下标为表达式中的原始文本。
+    """
+
+    def __init__(self, get_var, set_var, get_element=None, set_element=None):
+        self.get_var = get_var
+        self.set_var = set_var
+        self.get_element = get_element
+        self.set_element = set_element
+        self._depth = 0
+
+    def evaluate(self, expr):
+        value = compile_expression(expr.strip())(self)
+        if _INT64_MIN <= value <= _INT64_MAX:
+            return value
+        return _wrap(value)
+
+    def lookup(self, name):
+        value = self.get_var(name)
+        if not value:
+            return 0
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+        return self._evaluate_value(value, name)
+
+    def lookup_element(self, name, subscript):
+        if self.get_element is None:
+            raise ArithmeticEvalError(f"{name}[{subscript}]: arrays are not supported here")
+        value = self.get_element(name, subscript)
+        if not value:
+            return 0
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        return self._evaluate_value(value, f"{name}[{subscript}]")
+
+    def assign_element(self, name, subscript, value):
+        if self.set_element is None:
+            raise ArithmeticEvalError(f"{name}[{subscript}]: arrays are not supported here")
+        if not _INT64_MIN <= value <= _INT64_MAX:
+            value = _wrap(value)
+        self.set_element(name, subscript, str(value))
+        return value
+
+    def _evaluate_value(self, value, name):
+        # 与 bash 一致：变量值本身是表达式时递归求值
+        if self._depth >= _MAX_RECURSION:
+            raise ArithmeticEvalError(f"expression recursion level exceeded: {name}")
+        self._depth += 1
+        try:
+            return self.evaluate(str(value))
+        finally:
+            self._depth -= 1
+
+    def assign(self, name, value):
+        if not _INT64_MIN <= value <= _INT64_MAX:
+            value = _wrap(value)
+        self.set_var(name, str(value))
+        return value
+
+    def expand(self, text, on_error=None):
+        """替换文本中所有 $((...))（按括号配对，支持嵌套括号）
+
+        求值失败时交给 on_error(表达式, 错误) 并展开为空串；没有 on_error 时抛出异常。
+        """
+        start = text.find('$((')
+        if start == -1:
+            return text
+        pieces = []
+        last = 0
+        while start != -1:
+            end = self._find_closing(text, start + 3)
+            if end == -1:
+                break
+            expr = text[start + 3:end]
+            pieces.append(text[last:start])
+            try:
+                pieces.append(str(self.evaluate(expr)))
+            except ArithmeticEvalError as e:
+                if on_error is None:
+                    raise
+                # 不能保留原文：$((...)) 留在命令中会被当作命令替换执行
+                on_error(expr, e)
+            last = end + 2
+            start = text.find('$((', last)
+        pieces.append(text[last:])
+        return ''.join(pieces)
+
+    @staticmethod
+    def _find_closing(text, pos):
+        """返回与 $(( 配对的 )) 的起始位置，找不到时返回 -1"""
+        depth = 0
+        length = len(text)
+        while pos < length:
+            c = text[pos]
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                if depth == 0:
+                    return pos if pos + 1 < length and text[pos + 1] == ')' else -1
+                depth -= 1
+            pos += 1
+        return -1
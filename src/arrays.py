@@ -0,0 +1,148 @@
+from array import array
+
+
+class ArraySubscriptError(Exception):
+    """数组下标越界或无效"""
+
+
+def _as_int(value):
+    """value 是规范的十进制整数写法（如 "42"、"-7"）时返回整数，否则返回 None
+
+    "007"、"+1" 之类的写法转换后无法原样还原，仍按字符串保存。
+    """
+    if not value or len(value) > 19:
+        return None
+    digits = value[1:] if value[0] == '-' else value
+    if not digits.isdigit() or (digits[0] == '0' and len(digits) > 1) or value == '-0':
+        return None
+    return int(value)
+
+
+class IndexedArray:
+    """下标数组 arr=(a b c)
+
+    从 0 开始连续的元素存放在稠密前缀中：全部是整数时用 array('q') 紧凑存储
+    （每个元素 8 字节），出现非整数元素后转为字符串列表。与 bash 一致，数组可以是稀疏的：
+    前缀末尾之后的下标（nums[5]=9、a[100000000]=x）存放在 dict 中，不补空位，
+    前缀补齐到这些下标时再并入前缀。按下标读写为 O(1)，取值时统一返回字符串；
+    长度和下标列表只包括已赋值的元素。
+    """
+    __slots__ = ('_items', '_sparse', '_top')
+
+    def __init__(self, values=()):
+        self._items = array('q')
+        self._sparse = {}
+        # 稀疏部分的最大下标，写入时增量维护
+        self._top = -1
+        self.extend(values)
+
+    def __len__(self):
+        return len(self._items) + len(self._sparse)
+
+    @property
+    def compact(self):
+        return isinstance(self._items, array)
+
+    def _next_index(self):
+        """最大下标加一，负下标和 += 追加都以它为基准"""
+        if self._sparse:
+            return self._top + 1
+        return len(self._items)
+
+    def get(self, index):
+        """未赋值的下标与 bash 一致返回空串"""
+        if index < 0:
+            index += self._next_index()
+            if index < 0:
+                return ''
+        items = self._items
+        if index < len(items):
+            return str(items[index])
+        return self._sparse.get(index, '')
+
+    def set(self, index, value):
+        if index < 0:
+            index += self._next_index()
+            if index < 0:
+                raise ArraySubscriptError(f"bad array subscript: {index - self._next_index()}")
+        length = len(self._items)
+        if index > length:
+            self._sparse[index] = value
+            if index > self._top:
+                self._top = index
+            return
+        self._store(index, value)
+        sparse = self._sparse
+        if index == length and sparse:
+            # 前缀补齐后，把紧接其后的稀疏元素并入前缀；并入的下标都小于剩下的，_top 只在取空时失效
+            while len(self._items) in sparse:
+                self._store(len(self._items), sparse.pop(len(self._items)))
+            if not sparse:
+                self._top = -1
+
+    def _store(self, index, value):
+        """写入稠密前缀，index 不超过前缀长度"""
+        items = self._items
+        if isinstance(items, array):
+            number = _as_int(value)
+            if number is not None:
+                try:
+                    if index == len(items):
+                        items.append(number)
+                    else:
+                        items[index] = number
+                    return
+                except OverflowError:
+                    pass
+            items = self._to_list()
+        if index == len(items):
+            items.append(value)
+        else:
+            items[index] = value
+
+    def append(self, value):
+        self.set(self._next_index(), value)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def values(self):
+        items = self._items
+        if isinstance(items, array):
+            result = [str(item) for item in items]
+        else:
+            result = list(items)
+        sparse = self._sparse
+        if sparse:
+            result.extend(sparse[index] for index in sorted(sparse))
+        return result
+
+    def keys(self):
+        result = [str(index) for index in range(len(self._items))]
+        if self._sparse:
+            result.extend(str(index) for index in sorted(self._sparse))
+        return result
+
+    def scalar(self):
+        """不带下标引用数组（$arr）时取第一个元素"""
+        return self.get(0)
+
+    def _to_list(self):
+        self._items = [str(item) for item in self._items]
+        return self._items
+
+    def __repr__(self):
+        return f"IndexedArray({self.values()!r})"
+
+
+class AssocArray(dict):
+    """关联数组 declare -A m：键和值都是字符串的 dict，按键更新为 O(1)"""
+    __slots__ = ()
+
+    def get(self, key, default=''):
+        return dict.get(self, key, default)
+
+    def scalar(self):
+        """与 bash 一致，$m 等价于 ${m[0]}"""
+        return self.get('0')
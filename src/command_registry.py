@@ -0,0 +1,80 @@
+import threading
+
+
+class Command:
+    """注册表中的一条命令
+
+    分发时调用 handler(shell, argv)，argv 为命令行按空白切分后的列表（argv[0] 为命令名），
+    不处理引号；需要原始命令行的命令（如 echo）从 shell.current_cmd 读取。
+    handler 可以返回退出码，后台任务据此显示 Exit N。summary 为 help 中显示的一行说明。
+    """
+    __slots__ = ('name', 'handler', 'summary')
+
+    def __init__(self, name, handler, summary=""):
+        self.name = name
+        self.handler = handler
+        self.summary = summary
+
+    def run(self, shell, argv):
+        return self.handler(shell, argv)
+
+    def __repr__(self):
+        return f"Command({self.name!r})"
+
+
+def method_command(name, method_name):
+    """把 ShellCore 上的内置命令方法 method(argv) 包装成 Command；按名称查找，子类（图形界面）的重写同样生效"""
+    return Command(name, lambda shell, argv: getattr(shell, method_name)(argv))
+
+
+class CommandRegistry:
+    """命令名到 Command 的精确映射，分发只需一次字典查找
+
+    内置命令在 ShellCore 初始化时注册；插件通过 register 添加命令，
+    同名注册会覆盖已有命令。
+    """
+
+    def __init__(self):
+        self._commands = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._commands
+
+    def __len__(self):
+        return len(self._commands)
+
+    def get(self, name):
+        return self._commands.get(name)
+
+    def add(self, command):
+        with self._lock:
+            commands = dict(self._commands)
+            commands[command.name] = command
+            # 整体替换字典，工作线程中的分发不需要加锁
+            self._commands = commands
+        return command
+
+    def register(self, name, handler=None, summary=""):
+        """注册命令；省略 handler 时作为装饰器使用：
+
+            @shell.commands.register('hello', summary="打招呼")
+            def hello(shell, argv):
+                shell.write("hello " + ' '.join(argv[1:]))
+        """
+        if handler is None:
+            def decorator(func):
+                self.add(Command(name, func, summary))
+                return func
+            return decorator
+        return self.add(Command(name, handler, summary))
+
+    def unregister(self, name):
+        with self._lock:
+            commands = dict(self._commands)
+            removed = commands.pop(name, None)
+            self._commands = commands
+        return removed
+
+    def commands(self):
+        return sorted(self._commands.values(), key=lambda command: command.name)
@@ -0,0 +1,271 @@
+import operator
+import os
+import re
+import shlex
+import stat
+from functools import lru_cache
+
+
+class ConditionSyntaxError(Exception):
+    """条件表达式无法解析"""
+
+
+# [ ] 中的二元运算符：数值比较先把两侧转换为整数，字符串比较直接比较
+_NUMERIC_OPS = {
+    '-eq': operator.eq,
+    '-ne': operator.ne,
+    '-gt': operator.gt,
+    '-ge': operator.ge,
+    '-lt': operator.lt,
+    '-le': operator.le,
+}
+_STRING_OPS = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+_UNARY_OPS = ('-z', '-n', '-f', '-d', '-e')
+
+_VARIABLE_RE = re.compile(r'\$(?:(\w+)|\{(\w+)\})')
+
+
+def _operand(text):
+    """把操作数编译为 (取值函数, 常量值)；常量值只在操作数不含 $ 时非 None"""
+    if '$' not in text:
+        return (lambda ctx: text), text
+    match = _VARIABLE_RE.fullmatch(text)
+    if match:
+        name = match.group(1) or match.group(2)
+        return (lambda ctx: ctx.get_var(name)), None
+    # 含命令替换、算术扩展或拼接的操作数，交给外部做完整展开
+    return (lambda ctx: ctx.expand(text)), None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _make_numeric(op, left, right):
+    (get_left, left_const), (get_right, right_const) = left, right
+    # 常量一侧在编译时就转换好整数
+    if right_const is not None:
+        right_num = _to_int(right_const)
+        if right_num is None:
+            return lambda ctx: False
+
+        def test(ctx):
+            left_num = _to_int(get_left(ctx))
+            return left_num is not None and op(left_num, right_num)
+        return test
+
+    def test(ctx):
+        left_num = _to_int(get_left(ctx))
+        right_num = _to_int(get_right(ctx))
+        return left_num is not None and right_num is not None and op(left_num, right_num)
+    return test
+
+
+def _make_string(op, left, right):
+    get_left, get_right = left[0], right[0]
+    return lambda ctx: op(get_left(ctx), get_right(ctx))
+
+
+def _make_unary(op, operand):
+    get_value = operand[0]
+    if op == '-z':
+        return lambda ctx: not get_value(ctx)
+    if op == '-n':
+        return lambda ctx: bool(get_value(ctx))
+    if op == '-f':
+        mode_test = stat.S_ISREG
+    elif op == '-d':
+        mode_test = stat.S_ISDIR
+    else:
+        mode_test = None
+
+    def test(ctx):
+        path = get_value(ctx)
+        if not path:
+            return False
+        st = ctx.stat(path)
+        if st is None:
+            return False
+        return mode_test is None or mode_test(st.st_mode)
+    return test
+
+
+class _Parser:
+    """递归下降解析 [ ... ] 测试及其 &&、|| 组合
+
+    条件 := 与条件 ('||' 与条件)*
+    与条件 := 测试 ('&&' 测试)*
+    测试 := '[' 表达式 ']' | '[[' 表达式 ']]'
+    表达式 := 与表达式 ('-o' 与表达式)*
+    与表达式 := 基本项 ('-a' 基本项)*
+    基本项 := '!' 基本项 | '(' 表达式 ')' | 一元运算符 操作数 | 操作数 二元运算符 操作数 | 操作数
+    """
+
+    def __init__(self, text):
+        try:
+            self.tokens = shlex.split(text)
+        except ValueError as e:
+            raise ConditionSyntaxError(str(e))
+        self.pos = 0
+
+    def parse(self):
+        result = self._or()
+        if self.pos < len(self.tokens):
+            raise ConditionSyntaxError(f"unexpected token `{self.tokens[self.pos]}'")
+        return result
+
+    def _peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise ConditionSyntaxError("unexpected end of condition")
+        self.pos += 1
+        return token
+
+    def _or(self):
+        left = self._and()
+        while self._peek() == '||':
+            self.pos += 1
+            left = self._either(left, self._and())
+        return left
+
+    def _and(self):
+        left = self._test()
+        while self._peek() == '&&':
+            self.pos += 1
+            left = self._both(left, self._test())
+        return left
+
+    def _test(self):
+        opening = self._next()
+        if opening == '!':
+            inner = self._test()
+            return lambda ctx: not inner(ctx)
+        if opening not in ('[', '[['):
+            raise ConditionSyntaxError(f"expected `[' but found `{opening}'")
+        closing = ']' if opening == '[' else ']]'
+        if self._peek() == closing:
+            self.pos += 1
+            return lambda ctx: False
+        result = self._expression(closing)
+        if self._next() != closing:
+            raise ConditionSyntaxError(f"missing `{closing}'")
+        return result
+
+    def _expression(self, closing):
+        left = self._term(closing)
+        while self._peek() == '-o':
+            self.pos += 1
+            left = self._either(left, self._term(closing))
+        return left
+
+    def _term(self, closing):
+        left = self._primary(closing)
+        while self._peek() == '-a':
+            self.pos += 1
+            left = self._both(left, self._primary(closing))
+        return left
+
+    def _primary(self, closing):
+        token = self._next()
+        if token == closing:
+            raise ConditionSyntaxError("argument expected")
+        if token == '!':
+            inner = self._primary(closing)
+            return lambda ctx: not inner(ctx)
+        if token == '(':
+            inner = self._expression(closing)
+            if self._next() != ')':
+                raise ConditionSyntaxError("missing `)'")
+            return inner
+
+        op = self._peek()
+        if op in _NUMERIC_OPS or op in _STRING_OPS:
+            self.pos += 1
+            right = _operand(self._next())
+            if op in _NUMERIC_OPS:
+                return _make_numeric(_NUMERIC_OPS[op], _operand(token), right)
+            return _make_string(_STRING_OPS[op], _operand(token), right)
+        if token in _UNARY_OPS and op is not None and op != closing:
+            return _make_unary(token, _operand(self._next()))
+        # 单个操作数：非空即为真
+        return _make_unary('-n', _operand(token))
+
+    @staticmethod
+    def _either(left, right):
+        return lambda ctx: left(ctx) or right(ctx)
+
+    @staticmethod
+    def _both(left, right):
+        return lambda ctx: left(ctx) and right(ctx)
+
+
+class Condition:
+    """编译后的条件：test(ctx) 返回布尔值；无法解析时 error 为错误信息"""
+    __slots__ = ('text', 'test', 'error')
+
+    def __init__(self, text, test, error=None):
+        self.text = text
+        self.test = test
+        self.error = error
+
+    def __str__(self):
+        return self.text
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(text):
+    """编译 if/elif/while 后的条件文本，结果按源字符串缓存"""
+    text = text.strip().rstrip(';').strip()
+    try:
+        return Condition(text, _Parser(text).parse())
+    except ConditionSyntaxError as e:
+        return Condition(text, lambda ctx: False, str(e))
+
+
+class ConditionEvaluator:
+    """条件求值的上下文，变量、展开和当前目录都通过回调获取
+
+    cache_stats 为 True 时在一次求值内缓存文件测试的 stat 结果，
+    `[ -f x -a -r x ]` 这类条件只访问一次文件系统。缓存不跨越两次求值：
+    命令、命令替换、后台任务和其他进程随时可能修改文件。
+    """
+
+    def __init__(self, get_var, expand, get_dir, cache_stats=True):
+        self.get_var = get_var
+        self.expand = expand
+        self.get_dir = get_dir
+        self.cache_stats = cache_stats
+        self._stats = {}
+
+    def evaluate(self, condition):
+        try:
+            return condition.test(self)
+        finally:
+            self.invalidate()
+
+    def stat(self, path):
+        path = os.path.join(self.get_dir(), path)
+        if self.cache_stats and path in self._stats:
+            return self._stats[path]
+        try:
+            result = os.stat(path)
+        except (OSError, ValueError):
+            result = None
+        if self.cache_stats:
+            self._stats[path] = result
+        return result
+
+    def invalidate(self):
+        if self._stats:
+            self._stats.clear()
@@ -79,7 +79,8 @@ class CustomAsciiArt(AsciiArt):
 
         lines = []
         for h in range(img_h):
-            line = ''
+            line = []
+            last_color = None
 
             for w in range(img_w):
                 # get brightness value
@@ -91,7 +92,16 @@ class CustomAsciiArt(AsciiArt):
 
                 srgb = [(v/255.0)**2.2 for v in pixel]
                 char = chars[int(brightness * (len(chars) - 1))]
-                line += self._build_char(char, srgb, brightness, mode, front)
+                if mode == Modes.TERMINAL and not front:
+                    # 与前一个字符同色时不再重复输出颜色转义序列
+                    color = self._convert_color(srgb, brightness)['term']
+                    if color != last_color:
+                        line.append(color)
+                        last_color = color
+                    line.append(char)
+                else:
+                    line.append(self._build_char(char, srgb, brightness, mode, front))
+            line = ''.join(line)
 
             if mode == Modes.TERMINAL and front:
                 line = str(front) + line + colorama.Fore.RESET
@@ -0,0 +1,35 @@
+import threading
+
+
+class ShellScope:
+    """命令看到的工作目录和环境变量
+
+    前台命令共用终端的作用域；后台任务在提交时复制一份，
+    任务中的 cd/export 只改变自己的副本。
+    """
+    __slots__ = ('current_dir', 'environment')
+
+    def __init__(self, current_dir, environment):
+        self.current_dir = current_dir
+        self.environment = environment
+
+    def copy(self):
+        return ShellScope(self.current_dir, dict(self.environment))
+
+
+class ExecContext(threading.local):
+    """按线程隔离的命令执行状态
+
+    GUI 线程和脚本工作线程各自拥有独立的 current_cmd 和输出目标栈，
+    脚本在后台执行时不会与用户正在输入的命令互相覆盖。
+    """
+
+    def __init__(self):
+        self.current_cmd = ""
+        self.sinks = []
+        # 当前线程所属任务的取消标志（前台脚本或后台任务），没有时为 None
+        self.cancel_event = None
+        # 当前线程所属后台任务的作用域，没有时使用终端的作用域
+        self.scope = None
+        # 当前线程正在执行的后台任务，没有时为 None
+        self.job = None
@@ -0,0 +1,121 @@
+import argparse
+import os
+import sys
+import threading
+
+from src.output_sink import COLOR_OUTPUT, OutputSink
+from src.shell_core import ShellCore
+from src.shell_parser import ScriptCancelled, ScriptStackOverflow, ShellParser
+
+
+class ShellExit(Exception):
+    """exit 命令：结束无界面模式下正在执行的脚本"""
+
+
+class StreamSink(OutputSink):
+    """把输出写到标准输出，错误写到标准错误，并统计错误条数"""
+
+    def __init__(self, stdout=None, stderr=None):
+        self.stdout = stdout or sys.stdout
+        self.stderr = stderr or sys.stderr
+        self.error_count = 0
+        # 只有输出到终端时才保留颜色转义序列，重定向到文件或管道时输出纯文本
+        isatty = getattr(self.stdout, 'isatty', None)
+        self.ansi = bool(isatty and isatty())
+        self._lock = threading.Lock()
+
+    def write(self, text, color=COLOR_OUTPUT):
+        with self._lock:
+            self.stdout.write(text + '\n')
+
+    def write_error(self, text):
+        with self._lock:
+            self.error_count += 1
+            self.stderr.write(text + '\n')
+
+    def flush(self):
+        with self._lock:
+            self.stdout.flush()
+            self.stderr.flush()
+
+
+class HeadlessShell(ShellCore):
+    """不依赖 Qt 的命令执行环境，用于 CI 或服务器上批量运行脚本"""
+
+    def __init__(self, stdout=None, stderr=None):
+        self.sink = StreamSink(stdout, stderr)
+        self.init_shell(self.sink)
+
+    def run_source(self, source):
+        """把命令串当作脚本执行，返回退出码"""
+        parser = ShellParser(self)
+        return self._run_parser(lambda: parser.parse(source, self.current_dir))
+
+    def run_script(self, path):
+        full_path = os.path.join(self.current_dir, path)
+        if not os.path.isfile(full_path):
+            self.write_error(f"pyterm: {path}: No such file or directory")
+            return 127
+        parser = ShellParser(self)
+        return self._run_parser(lambda: parser.run_file(full_path, self.current_dir))
+
+    def _run_parser(self, run):
+        try:
+            run()
+            # 等待脚本中启动的后台任务结束，确保输出完整
+            self.jobs.wait(self.jobs.jobs())
+        except ShellExit:
+            pass
+        except ScriptStackOverflow as e:
+            self.write_error(f"pyterm: {e}")
+        except (ScriptCancelled, KeyboardInterrupt):
+            self.write_error("^C")
+            return 130
+        finally:
+            self.jobs.shutdown()
+            self.tracer.close()
+            self.sink.flush()
+        return self.exit_code()
+
+    def exit_command(self, argv):
+        super().exit_command(argv)
+        raise ShellExit()
+
+    def exit_code(self):
+        """exit N 指定的状态码优先，否则有错误输出时为 1
+
+        解释器错误（未定义的函数、条件语法错误、算术错误等）经 tracer.warn 写到错误输出，同样计数。
+        """
+        if self.exit_status is not None:
+            return self.exit_status
+        return 1 if self.sink.error_count else 0
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        prog='terminal.py',
+        description='PyTerminal 无界面模式：执行命令或脚本，输出写到标准输出')
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-c', dest='command', metavar='COMMAND', help='执行命令串（可包含多行脚本）')
+    source.add_argument('--script', metavar='PATH', help='执行 .sh 脚本文件')
+    arg_parser.add_argument('--trace', metavar='LEVEL', choices=['off', 'summary', 'line', 'expr'],
+                            help='解释器跟踪级别，输出到标准错误')
+    arg_parser.add_argument('--env', metavar='NAME=VALUE', action='append', default=[],
+                            help='设置终端环境变量（可重复），与 export 相同')
+    args = arg_parser.parse_args(argv)
+
+    shell = HeadlessShell()
+    for assignment in args.env:
+        if '=' not in assignment:
+            arg_parser.error(f"--env: expected NAME=VALUE, got '{assignment}'")
+        key, value = assignment.split('=', 1)
+        shell.environment[key] = value
+    if args.trace:
+        shell.tracer.set_level(args.trace)
+    if args.command is not None:
+        return shell.run_source(args.command)
+    return shell.run_script(args.script)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
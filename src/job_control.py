@@ -0,0 +1,174 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.output_sink import COLOR_OUTPUT, OutputSink
+
+
+# 后台任务状态
+JOB_QUEUED = 'Queued'
+JOB_RUNNING = 'Running'
+JOB_DONE = 'Done'
+JOB_EXIT = 'Exit'
+JOB_KILLED = 'Killed'
+
+# 同时运行的后台任务数上限，超出的任务排队等待
+MAX_BACKGROUND_JOBS = 4
+
+
+def split_background(cmd):
+    """命令以引号外的单个 & 结尾时返回去掉 & 的命令，否则返回 None"""
+    stripped = cmd.rstrip()
+    if not stripped.endswith('&') or stripped.endswith('&&'):
+        return None
+    quote = None
+    for c in stripped:
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in ('"', "'"):
+            quote = c
+    if quote:
+        return None
+    return stripped[:-1].rstrip()
+
+
+class Job:
+    """一个后台任务；process 为后台运行的 Python 子进程（如果有）"""
+    __slots__ = ('job_id', 'command', 'state', 'exit_code', 'error', 'started', 'finished',
+                 'future', 'cancel_event', 'process')
+
+    def __init__(self, job_id, command):
+        self.job_id = job_id
+        self.command = command
+        self.state = JOB_QUEUED
+        self.exit_code = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.process = None
+
+    @property
+    def runtime(self):
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+    @property
+    def is_finished(self):
+        return self.state in (JOB_DONE, JOB_EXIT, JOB_KILLED)
+
+    @property
+    def status_text(self):
+        if self.state == JOB_EXIT:
+            return f"Exit {self.exit_code}"
+        return self.state
+
+
+class TaggedSink(OutputSink):
+    """给后台任务的每行输出加上 [n] 前缀并统计错误条数；后台任务不能清屏"""
+
+    def __init__(self, sink, tag):
+        self.sink = sink
+        self.tag = tag
+        self.error_count = 0
+
+    @property
+    def ansi(self):
+        return self.sink.ansi
+
+    def write(self, text, color=COLOR_OUTPUT):
+        self.sink.write('\n'.join(f"{self.tag}{line}" for line in text.split('\n')), color)
+
+    def write_error(self, text):
+        self.error_count += 1
+        self.sink.write_error('\n'.join(f"{self.tag}{line}" for line in text.split('\n')))
+
+    def flush(self):
+        self.sink.flush()
+
+
+class JobManager:
+    """后台任务表，任务在有界线程池中执行
+
+    submit(command, run, on_finish) 中 run(job) 在线程池中执行并返回退出码，
+    on_finish(job) 在任务结束（包括被取消）后于同一线程中调用。
+    """
+
+    def __init__(self, max_workers=MAX_BACKGROUND_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pyterm-job")
+        self._jobs = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def submit(self, command, run, on_finish):
+        with self._lock:
+            if not self._jobs:
+                self._next_id = 1
+            job = Job(self._next_id, command)
+            self._next_id += 1
+            self._jobs[job.job_id] = job
+        job.future = self._executor.submit(self._run, job, run, on_finish)
+        return job
+
+    def _run(self, job, run, on_finish):
+        if job.cancel_event.is_set():
+            return
+        job.state = JOB_RUNNING
+        job.started = time.monotonic()
+        try:
+            job.exit_code = run(job) or 0
+        except Exception as e:
+            job.exit_code = 1
+            job.error = str(e)
+        job.finished = time.monotonic()
+        if job.cancel_event.is_set():
+            job.state = JOB_KILLED
+        elif job.exit_code:
+            job.state = JOB_EXIT
+        else:
+            job.state = JOB_DONE
+        on_finish(job)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.job_id)
+
+    def prune(self, jobs=None):
+        """从任务表中移除已结束的任务（已向用户报告过状态）"""
+        with self._lock:
+            for job in (jobs if jobs is not None else list(self._jobs.values())):
+                if job.is_finished and self._jobs.get(job.job_id) is job:
+                    del self._jobs[job.job_id]
+
+    def kill(self, job):
+        """取消任务：排队中的直接移除，运行中的设置取消标志并终止其子进程"""
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.state = JOB_KILLED
+            job.finished = time.monotonic()
+            return
+        process = job.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def wait(self, jobs, cancel_event=None):
+        """等待给定任务全部结束；cancel_event 被设置时提前返回 False"""
+        pending = {job.future for job in jobs if job.future is not None}
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            _, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+        return True
+
+    def shutdown(self):
+        for job in self.jobs():
+            if not job.is_finished:
+                self.kill(job)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,149 @@
+import mmap
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+
+# 稀疏行索引的粒度：每 INDEX_CHUNK 字节记录一次此前的换行数
+INDEX_CHUNK = 1 << 16
+# 一行最多解码显示的字节数，超长的行截断显示（翻页、搜索仍按完整的行）
+MAX_LINE_BYTES = 4096
+# 向前搜索时每次扫描的窗口大小
+SEARCH_WINDOW = 1 << 20
+
+
+class MappedFile:
+    """以只读内存映射方式打开的文本文件，按字节偏移访问行
+
+    文件内容不读入内存，由操作系统按页换入；浏览时只解码可见的几十行。
+    行号索引是稀疏的：后台线程按 INDEX_CHUNK 分块统计换行数，
+    newlines[i] 为第 i 块之前的换行数，定位第 n 行时先二分找到所在块，
+    再在块内查找换行。索引未建完时只能定位已索引部分的行，翻页和搜索不依赖索引。
+    所有位置都是字节偏移，行起始偏移之后的内容直到 b'\\n' 为止是一行。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # 空文件无法映射，按空字节串处理
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self.newlines = array('q', [0])
+        self.line_count = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === 行索引 ===
+    def start_indexing(self):
+        self._thread = threading.Thread(target=self._build_index, daemon=True, name="pyterm-less-index")
+        self._thread.start()
+
+    def _build_index(self):
+        data = self.data
+        size = self.size
+        newlines = self.newlines
+        total = 0
+        for start in range(0, size, INDEX_CHUNK):
+            if self._stop.is_set():
+                return
+            total += data[start:start + INDEX_CHUNK].count(b'\n')
+            # 只追加，GUI 线程读到的前缀始终有效
+            newlines.append(total)
+        # 最后一行没有换行符时也算一行
+        self.line_count = total + (1 if size and data[size - 1:size] != b'\n' else 0)
+
+    @property
+    def indexed_bytes(self):
+        return min((len(self.newlines) - 1) * INDEX_CHUNK, self.size)
+
+    @property
+    def indexing_done(self):
+        return self.line_count is not None
+
+    def line_offset(self, line_no):
+        """第 line_no 行（从 0 开始）的起始偏移；超出已索引范围时返回 None"""
+        if line_no <= 0:
+            return 0
+        newlines = self.newlines
+        chunks = len(newlines) - 1
+        # 第 line_no 行从第 line_no 个换行之后开始，找到该换行所在的块
+        chunk = bisect_left(newlines, line_no, 0, chunks + 1) - 1
+        if chunk >= chunks:
+            return None
+        data = self.data
+        pos = chunk * INDEX_CHUNK
+        for _ in range(line_no - newlines[chunk]):
+            pos = data.find(b'\n', pos) + 1
+        return pos
+
+    def line_number(self, offset):
+        """offset 所在行的行号（从 0 开始）；超出已索引范围时返回 None"""
+        chunk = offset // INDEX_CHUNK
+        newlines = self.newlines
+        if chunk >= len(newlines):
+            return None
+        return newlines[chunk] + self.data[chunk * INDEX_CHUNK:offset].count(b'\n')
+
+    # === 按偏移移动 ===
+    def next_line(self, offset):
+        """下一行的起始偏移；已是最后一行时返回文件大小"""
+        end = self.data.find(b'\n', offset)
+        return self.size if end < 0 else end + 1
+
+    def prev_line(self, offset):
+        """上一行的起始偏移；已是第一行时返回 0"""
+        if offset <= 0:
+            return 0
+        return self.data.rfind(b'\n', 0, offset - 1) + 1
+
+    def line_start(self, offset):
+        return self.data.rfind(b'\n', 0, offset) + 1
+
+    def read_lines(self, offset, count):
+        """从 offset 开始读取最多 count 行，返回 (行文本列表, 下一行的起始偏移)"""
+        data = self.data
+        lines = []
+        while len(lines) < count and offset < self.size:
+            end = data.find(b'\n', offset, offset + MAX_LINE_BYTES)
+            if end < 0:
+                line = data[offset:offset + MAX_LINE_BYTES]
+                offset = self.next_line(offset + len(line))
+            else:
+                line = data[offset:end]
+                offset = end + 1
+            lines.append(line.rstrip(b'\r').decode('utf-8', errors='replace'))
+        return lines, offset
+
+    # === 搜索 ===
+    def search(self, pattern, offset, backward=False, ignore_case=False):
+        """查找匹配正则的行，返回该行的起始偏移，找不到时返回 -1
+
+        向后搜索从 offset 开始；向前搜索查找 offset 之前最后一处匹配。
+        正则直接在映射的字节上匹配，不解码整个文件。
+        """
+        regex = re.compile(pattern.encode('utf-8'), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        data = self.data
+        if not backward:
+            match = regex.search(data, offset)
+            return -1 if match is None else self.line_start(match.start())
+        end = offset
+        while end > 0:
+            # 窗口从行首开始，行内的匹配不会被截断
+            start = self.line_start(max(end - SEARCH_WINDOW, 0))
+            last = None
+            for last in regex.finditer(data, start, end):
+                pass
+            if last is not None:
+                return self.line_start(last.start())
+            end = start
+        return -1
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
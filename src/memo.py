@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+
+# @memo 未指定容量时每个函数最多缓存的参数组合数
+DEFAULT_MEMO_SIZE = 1024
+
+# 缓存未命中的标记（函数没有 return 时返回值为 None，也需要缓存）
+MEMO_MISS = object()
+
+
+class MemoCache:
+    """单个 @memo 函数的有界 LRU 缓存，键为求值后的参数元组
+
+    body 为函数体的编译结果：同一份函数体重复定义（再次运行同一脚本）时沿用缓存，
+    函数体改变后重新建立缓存。
+    """
+
+    def __init__(self, name, body, maxsize=DEFAULT_MEMO_SIZE):
+        self.name = name
+        self.body = body
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key):
+        """返回缓存的返回值并标记为最近使用；未命中时返回 MEMO_MISS"""
+        with self._lock:
+            value = self._entries.get(key, MEMO_MISS)
+            if value is MEMO_MISS:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+class MemoRegistry:
+    """终端内所有 @memo 函数的缓存，供 memo 命令查看命中统计和清空"""
+
+    def __init__(self):
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def cache_for(self, name, body, maxsize):
+        with self._lock:
+            cache = self._caches.get(name)
+            if cache is None or cache.body is not body or cache.maxsize != maxsize:
+                cache = self._caches[name] = MemoCache(name, body, maxsize)
+            return cache
+
+    def caches(self):
+        with self._lock:
+            return sorted(self._caches.values(), key=lambda cache: cache.name)
+
+    def clear(self, name=None):
+        """清空指定函数（默认全部）的缓存和统计；函数不存在时返回 False"""
+        if name is None:
+            for cache in self.caches():
+                cache.clear()
+            return True
+        with self._lock:
+            cache = self._caches.get(name)
+        if cache is None:
+            return False
+        cache.clear()
+        return True
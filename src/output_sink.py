@@ -0,0 +1,205 @@
+import io
+import threading
+import time
+
+
+COLOR_OUTPUT = '#00FF00'
+COLOR_ERROR = '#FF0000'
+
+# 批量输出中的操作类型
+SINK_WRITE = 'write'
+SINK_CLEAR = 'clear'
+
+
+class OutputSink:
+    """命令输出的目的地；内置命令只调用 write/write_error，不直接操作控件
+
+    ansi 表示目的地是显示给用户的终端，能显示 ANSI 颜色转义序列，grep 等命令可以加行号和高亮；
+    为 False 时（文件、管道、命令替换）命令应输出原始的纯文本行。
+    """
+
+    ansi = False
+
+    def write(self, text, color=COLOR_OUTPUT):
+        raise NotImplementedError
+
+    def write_error(self, text):
+        self.write(text, COLOR_ERROR)
+
+    def clear(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class BatchingSink(OutputSink):
+    """在工作线程中收集输出，按时间间隔合并成一批交给 emit 回调
+
+    emit 通常是一个跨线程的 Qt 信号，GUI 线程每批只处理一次，
+    输出吞吐量不再受逐行重绘限制。有未发送的输出时启动一个定时器，
+    即使之后不再有输出（例如脚本进入长时间计算），已写入的内容也会在 interval 内送出。
+    """
+
+    def __init__(self, emit, interval=0.05, max_items=2000, ansi=False):
+        self.emit = emit
+        self.ansi = ansi
+        self.interval = interval
+        self.max_items = max_items
+        self._items = []
+        self._lock = threading.Lock()
+        self._last_emit = time.monotonic()
+        self._timer = None
+
+    def write(self, text, color=COLOR_OUTPUT):
+        with self._lock:
+            self._items.append((SINK_WRITE, text, color))
+            pending = len(self._items)
+            due = pending >= self.max_items or time.monotonic() - self._last_emit >= self.interval
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def clear(self):
+        with self._lock:
+            # 清屏之前尚未发送的输出已无意义
+            self._items = [(SINK_CLEAR, None, None)]
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            items, self._items = self._items, []
+            self._last_emit = time.monotonic()
+            # 在锁内发送，定时器线程与写入线程的批次不会乱序
+            if items:
+                self.emit(items)
+
+
+class ListSink(OutputSink):
+    """把输出收集到内存中的行列表（管道首段、命令替换等场景）
+
+    错误信息不进入数据流，而是交给 error_sink（通常是外层的输出目标）。
+    """
+
+    def __init__(self, error_sink=None):
+        self.error_sink = error_sink
+        self._chunks = []
+
+    def write(self, text, color=COLOR_OUTPUT):
+        self._chunks.append(text)
+
+    def write_error(self, text):
+        if self.error_sink is not None:
+            self.error_sink.write_error(text)
+
+    def clear(self):
+        self._chunks = []
+
+    def lines(self):
+        result = []
+        for chunk in self._chunks:
+            result.extend(chunk.split('\n'))
+        return result
+
+
+class StringSink(ListSink):
+    """把输出写入内存字符串缓冲区（命令替换 $(...)）"""
+
+    def __init__(self, error_sink=None):
+        super().__init__(error_sink)
+        self._buffer = io.StringIO()
+        self._empty = True
+
+    def write(self, text, color=COLOR_OUTPUT):
+        if not self._empty:
+            self._buffer.write('\n')
+        self._buffer.write(text)
+        self._empty = False
+
+    def clear(self):
+        self._buffer = io.StringIO()
+        self._empty = True
+
+    def lines(self):
+        return self.getvalue().split('\n')
+
+    def getvalue(self):
+        return self._buffer.getvalue()
+
+
+class BufferSink(OutputSink):
+    """按顺序记录输出和错误信息（含颜色），之后通过 replay 整体转发到另一个输出目标"""
+
+    def __init__(self):
+        self.items = []
+        self.error_count = 0
+
+    def write(self, text, color=COLOR_OUTPUT):
+        self.items.append((text, color, False))
+
+    def write_error(self, text):
+        self.items.append((text, COLOR_ERROR, True))
+        self.error_count += 1
+
+    def replay(self, sink):
+        for text, color, is_error in self.items:
+            if is_error:
+                sink.write_error(text)
+            else:
+                sink.write(text, color)
+
+
+class FileSink(OutputSink):
+    """带缓冲的文件输出（> 和 >> 重定向），输出不经过终端控件"""
+
+    def __init__(self, path, append=False, buffer_size=1 << 16):
+        self.path = path
+        self._file = open(path, 'a' if append else 'w', encoding="utf-8", buffering=buffer_size)
+
+    def write(self, text, color=COLOR_OUTPUT):
+        self._file.write(text)
+        self._file.write('\n')
+
+    def write_error(self, text):
+        self.write(text)
+
+    def flush(self):
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class RedirectSink(OutputSink):
+    """把标准输出和错误输出分别送往不同的目标"""
+
+    def __init__(self, stdout_sink, stderr_sink):
+        self.stdout_sink = stdout_sink
+        self.stderr_sink = stderr_sink
+
+    @property
+    def ansi(self):
+        return self.stdout_sink.ansi
+
+    def write(self, text, color=COLOR_OUTPUT):
+        self.stdout_sink.write(text, color)
+
+    def write_error(self, text):
+        self.stderr_sink.write_error(text)
+
+    def clear(self):
+        self.stdout_sink.clear()
+
+    def flush(self):
+        self.stdout_sink.flush()
+        self.stderr_sink.flush()
@@ -0,0 +1,235 @@
+import re
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor, QTextCharFormat, QTextCursor, QTextOption
+
+
+class Pager:
+    """less 分页浏览：只把当前一屏的行写入终端控件
+
+    文件由 MappedFile 映射，翻页、跳转和搜索都按字节偏移进行，
+    控件中始终只有一屏文字，浏览多大的文件内存占用都接近一屏。
+    """
+
+    # 行号索引尚未建完时定时刷新状态栏（毫秒）
+    INDEX_REFRESH_INTERVAL = 200
+
+    def __init__(self, terminal_widget, mapped_file, filename):
+        self.terminal = terminal_widget
+        self.file = mapped_file
+        self.filename = filename
+        self.is_active = True
+        self.top = 0
+        self.bottom = 0
+        self.shown = 0
+        self.mode = "normal"
+        self.input = ""
+        self.count = ""
+        self.last_search = None
+        self.status_message = ""
+        self.refresh_pending = False
+        self.text_format = QTextCharFormat()
+        self.text_format.setForeground(QColor('#00FF00'))
+        self.match_format = QTextCharFormat()
+        self.match_format.setForeground(QColor('#000000'))
+        self.match_format.setBackground(QColor('#00FF00'))
+        self.status_format = QTextCharFormat()
+        self.status_format.setForeground(QColor('#FFFF00'))
+        # 长行不折行，一屏的行数与控件高度一致
+        self.wrap_mode = self.terminal.wordWrapMode()
+        self.terminal.setWordWrapMode(QTextOption.NoWrap)
+        self.file.start_indexing()
+
+    def close(self):
+        self.is_active = False
+        self.terminal.setWordWrapMode(self.wrap_mode)
+        self.file.close()
+
+    @property
+    def rows(self):
+        """一屏显示的文件行数（最后一行留给状态栏）"""
+        line_height = self.terminal.fontMetrics().lineSpacing()
+        return max(self.terminal.viewport().height() // line_height - 1, 1)
+
+    # === 显示 ===
+    def render(self):
+        lines, self.bottom = self.file.read_lines(self.top, self.rows)
+        self.shown = len(lines)
+        regex = self._highlight_regex()
+
+        self.terminal.clear()
+        cursor = QTextCursor(self.terminal.document())
+        cursor.beginEditBlock()
+        for line in lines:
+            if regex is None:
+                cursor.insertText(line, self.text_format)
+            else:
+                pos = 0
+                for match in regex.finditer(line):
+                    if match.start() == match.end():
+                        continue
+                    cursor.insertText(line[pos:match.start()], self.text_format)
+                    cursor.insertText(match.group(), self.match_format)
+                    pos = match.end()
+                cursor.insertText(line[pos:], self.text_format)
+            cursor.insertText('\n', self.text_format)
+        cursor.insertText(self._status_line(), self.status_format)
+        cursor.endEditBlock()
+
+        cursor.movePosition(QTextCursor.Start)
+        self.terminal.setTextCursor(cursor)
+        cursor.movePosition(QTextCursor.End)
+        self.terminal.setTextCursor(cursor)
+
+        if not self.file.indexing_done and not self.refresh_pending:
+            self.refresh_pending = True
+            QTimer.singleShot(self.INDEX_REFRESH_INTERVAL, self._refresh_while_indexing)
+
+    def _refresh_while_indexing(self):
+        self.refresh_pending = False
+        if self.is_active and self.mode == "normal":
+            self.render()
+
+    def _status_line(self):
+        if self.mode == "search":
+            return self.input
+        size = self.file.size
+        if self.bottom >= size:
+            position = "(END)"
+        else:
+            position = f"{self.bottom * 100 // size}%"
+        first = self.file.line_number(self.top)
+        if first is None:
+            lines = f"indexing {self.file.indexed_bytes * 100 // max(size, 1)}%"
+        else:
+            lines = f"lines {first + 1}-{first + max(self.shown, 1)}"
+            if self.file.indexing_done:
+                lines += f"/{self.file.line_count}"
+            else:
+                lines += f" (indexing {self.file.indexed_bytes * 100 // max(size, 1)}%)"
+        status = f"{self.filename}  {lines}  {position}"
+        if self.status_message:
+            status += f"  {self.status_message}"
+        return status
+
+    def _highlight_regex(self):
+        if self.last_search is None:
+            return None
+        try:
+            return re.compile(self.last_search[0])
+        except re.error:
+            return None
+
+    # === 移动 ===
+    def _last_top(self):
+        """最后一屏第一行的偏移"""
+        top = self.file.size
+        for _ in range(self.rows):
+            if top <= 0:
+                break
+            top = self.file.prev_line(top)
+        return top
+
+    def scroll(self, lines):
+        if lines > 0:
+            last_top = self._last_top()
+            for _ in range(lines):
+                if self.top >= last_top:
+                    break
+                self.top = self.file.next_line(self.top)
+        else:
+            for _ in range(-lines):
+                if self.top <= 0:
+                    break
+                self.top = self.file.prev_line(self.top)
+
+    def goto_line(self, line_no):
+        """跳到第 line_no 行（从 1 开始）；该行尚未建立索引时提示等待"""
+        offset = self.file.line_offset(line_no - 1)
+        if offset is None:
+            if not self.file.indexing_done:
+                self.status_message = f"line {line_no} is not indexed yet"
+                return
+            offset = self.file.size
+        self.top = min(offset, self._last_top())
+
+    def search(self, pattern, backward):
+        try:
+            if backward:
+                offset = self.file.search(pattern, self.top, backward=True)
+            else:
+                offset = self.file.search(pattern, self.file.next_line(self.top))
+        except re.error as e:
+            self.status_message = f"invalid pattern: {e}"
+            return
+        self.last_search = (pattern, backward)
+        if offset < 0:
+            self.status_message = "Pattern not found"
+        else:
+            self.top = offset
+
+    # === 按键 ===
+    def handle_key_press(self, event):
+        key = event.key()
+        text = event.text()
+        self.status_message = ""
+
+        if self.mode == "search":
+            if key == Qt.Key_Escape:
+                self.mode = "normal"
+            elif key in (Qt.Key_Return, Qt.Key_Enter):
+                self.mode = "normal"
+                if len(self.input) > 1:
+                    self.search(self.input[1:], self.input[0] == '?')
+                elif self.last_search is not None:
+                    self.search(self.last_search[0], self.input[0] == '?')
+            elif key == Qt.Key_Backspace:
+                self.input = self.input[:-1]
+                if not self.input:
+                    self.mode = "normal"
+            elif text and text.isprintable():
+                self.input += text
+            self.render()
+            return
+
+        if text.isdigit():
+            self.count += text
+            self.status_message = f":{self.count}"
+            self.render()
+            return
+        count = int(self.count) if self.count else None
+        self.count = ""
+
+        if text in ('q', 'Q') or key == Qt.Key_Escape:
+            self.is_active = False
+            return
+        elif text in (' ', 'f') or key == Qt.Key_PageDown:
+            self.scroll((count or 1) * self.rows)
+        elif text == 'b' or key == Qt.Key_PageUp:
+            self.scroll(-(count or 1) * self.rows)
+        elif text == 'd':
+            self.scroll(self.rows // 2)
+        elif text == 'u':
+            self.scroll(-(self.rows // 2))
+        elif text == 'j' or key in (Qt.Key_Down, Qt.Key_Return, Qt.Key_Enter):
+            self.scroll(count or 1)
+        elif text == 'k' or key == Qt.Key_Up:
+            self.scroll(-(count or 1))
+        elif text == 'g' or key == Qt.Key_Home:
+            if count:
+                self.goto_line(count)
+            else:
+                self.top = 0
+        elif text == 'G' or key == Qt.Key_End:
+            if count:
+                self.goto_line(count)
+            else:
+                self.top = self._last_top()
+        elif text in ('/', '?'):
+            self.mode = "search"
+            self.input = text
+        elif text in ('n', 'N') and self.last_search is not None:
+            pattern, backward = self.last_search
+            self.search(pattern, backward != (text == 'N'))
+            self.last_search = (pattern, backward)
+        self.render()
@@ -0,0 +1,200 @@
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.output_sink import BufferSink
+from src.stream_commands import CommandError
+
+
+DEFAULT_PARALLEL_JOBS = 4
+REPLACE_TOKEN = '{}'
+
+# 无界面模式的入口，parallel/xargs 的每条命令在独立的解释器进程中执行
+HEADLESS_ENTRY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'terminal.py')
+
+
+def _parse_count(name, option, value):
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise CommandError(f"{name}: invalid number for {option}: '{value}'")
+    if count < 1:
+        raise CommandError(f"{name}: {option} must be at least 1")
+    return count
+
+
+def parse_parallel(argv):
+    """解析 parallel [-j N] [-k] 命令 ... ::: 参数 ...
+
+    返回 (并发数, 是否按输入顺序输出, 命令模板, 参数列表)。
+    """
+    max_jobs = DEFAULT_PARALLEL_JOBS
+    keep_order = False
+    i = 1
+    while i < len(argv) and argv[i].startswith('-'):
+        option = argv[i]
+        if option == '-k':
+            keep_order = True
+        elif option == '-j':
+            i += 1
+            max_jobs = _parse_count('parallel', '-j', argv[i] if i < len(argv) else None)
+        elif option.startswith('-j'):
+            max_jobs = _parse_count('parallel', '-j', option[2:])
+        else:
+            raise CommandError(f"parallel: invalid option: {option}")
+        i += 1
+
+    rest = argv[i:]
+    if ':::' not in rest:
+        raise CommandError("parallel: missing ::: argument list")
+    separator = rest.index(':::')
+    template, args = rest[:separator], rest[separator + 1:]
+    if not template:
+        raise CommandError("parallel: missing command")
+    return max_jobs, keep_order, template, [[arg] for arg in args]
+
+
+def parse_xargs(argv):
+    """解析 xargs [-P N] [-n N] [-I 替换串] [-k] 命令 ...
+
+    返回 (并发数, 是否按输入顺序输出, 每次调用的参数个数（None 表示全部）, 替换串, 命令模板)。
+    """
+    max_jobs = 1
+    keep_order = False
+    max_args = None
+    replace = None
+    i = 1
+    while i < len(argv) and argv[i].startswith('-'):
+        option = argv[i]
+        if option == '-k':
+            keep_order = True
+        elif option in ('-P', '-n', '-I'):
+            i += 1
+            if i >= len(argv):
+                raise CommandError(f"xargs: option requires an argument -- '{option[1]}'")
+            if option == '-P':
+                max_jobs = _parse_count('xargs', '-P', argv[i])
+            elif option == '-n':
+                max_args = _parse_count('xargs', '-n', argv[i])
+            else:
+                replace = argv[i]
+        else:
+            raise CommandError(f"xargs: invalid option: {option}")
+        i += 1
+
+    template = argv[i:] or ['echo']
+    # -I 与 xargs 一致：每行输入对应一次调用
+    if replace is not None:
+        max_args = 1
+    return max_jobs, keep_order, max_args, replace, template
+
+
+def group_xargs_input(lines, max_args, replace):
+    """把输入行切分为每次调用的参数组"""
+    if replace is not None:
+        return [[line] for line in lines if line.strip()]
+    words = [word for line in lines for word in line.split()]
+    if not words:
+        return []
+    if max_args is None:
+        return [words]
+    return [words[i:i + max_args] for i in range(0, len(words), max_args)]
+
+
+def build_commands(template, arg_groups, replace=REPLACE_TOKEN):
+    """按模板生成命令行：模板中出现替换串时替换，否则把参数追加到末尾"""
+    commands = []
+    uses_replace = replace is not None and any(replace in part for part in template)
+    for args in arg_groups:
+        if uses_replace:
+            joined = ' '.join(args)
+            commands.append(' '.join(part.replace(replace, joined) for part in template))
+        else:
+            commands.append(' '.join(template + args))
+    return commands
+
+
+def headless_args(command, environment):
+    """在无界面模式子进程中执行命令的参数列表，环境变量随命令一起传入"""
+    args = [sys.executable, HEADLESS_ENTRY]
+    for key, value in environment.items():
+        args += ['--env', f"{key}={value}"]
+    return args + ['-c', command]
+
+
+class ParallelRunner:
+    """并发执行多条命令，收集每条命令的输出和退出码
+
+    run_one(command, runner) 返回 (退出码, BufferSink)。每条命令通过
+    runner.run_process 启动独立的子进程（python 脚本或无界面模式的终端），
+    不受 GIL 限制，能真正利用多个 CPU 核心；线程池中的线程只负责等待子进程。
+    """
+
+    def __init__(self, run_one, max_jobs, keep_order, cancel_event):
+        self.run_one = run_one
+        self.max_jobs = max_jobs
+        self.keep_order = keep_order
+        self.cancel_event = cancel_event
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    def run_process(self, args, cwd):
+        """启动子进程并等待结束，返回 (退出码, stdout, stderr)；取消时子进程被终止"""
+        process = subprocess.Popen(args, cwd=cwd, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with self._lock:
+            self._processes.add(process)
+        try:
+            if self.cancel_event.is_set():
+                process.terminate()
+            stdout, stderr = process.communicate()
+            return process.returncode, stdout, stderr
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+
+    def run(self, commands, emit):
+        """执行全部命令，emit(buffer) 按完成顺序或输入顺序转发输出
+
+        返回失败命令的 [(命令, 退出码)] 列表；被取消时返回 None。
+        """
+        failures = []
+        results = {}
+        next_index = 0
+        with ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="pyterm-parallel") as executor:
+            pending = {executor.submit(self._invoke, command): index for index, command in enumerate(commands)}
+            while pending:
+                if self.cancel_event.is_set():
+                    self._cancel(pending)
+                    return None
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    code, buffer = future.result()
+                    if code:
+                        failures.append((index, commands[index], code))
+                    if not self.keep_order:
+                        emit(buffer)
+                        continue
+                    results[index] = buffer
+                    while next_index in results:
+                        emit(results.pop(next_index))
+                        next_index += 1
+        failures.sort()
+        return [(command, code) for _, command, code in failures]
+
+    def _invoke(self, command):
+        if self.cancel_event.is_set():
+            return 130, BufferSink()
+        return self.run_one(command, self)
+
+    def _cancel(self, pending):
+        for future in pending:
+            future.cancel()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
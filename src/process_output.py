@@ -0,0 +1,59 @@
+import queue
+import threading
+
+from src.output_sink import COLOR_ERROR, COLOR_OUTPUT, SINK_WRITE
+
+
+class ProcessOutputQueue:
+    """在读取线程中收集子进程的 stdout/stderr，由 GUI 线程按批取出
+
+    两个读取线程把行按到达顺序放进同一个线程安全队列，stdout 与 stderr 的交错顺序
+    得以保留（子进程需关闭输出缓冲，如 PYTHONUNBUFFERED=1）。读取线程不接触任何控件，
+    drain 返回的批次格式与 BatchingSink 相同：[(SINK_WRITE, 文本, 颜色), ...]。
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self._queue = queue.SimpleQueue()
+        self._open_streams = 0
+        self._threads = []
+        for stream, color in ((process.stdout, COLOR_OUTPUT), (process.stderr, COLOR_ERROR)):
+            if stream is None:
+                continue
+            self._open_streams += 1
+            thread = threading.Thread(target=self._read, args=(stream, color), daemon=True)
+            self._threads.append(thread)
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def _read(self, stream, color):
+        try:
+            for line in iter(stream.readline, ''):
+                self._queue.put((SINK_WRITE, line.rstrip('\n'), color))
+        except (OSError, ValueError):
+            # 进程被终止时管道可能已关闭
+            pass
+        finally:
+            self._queue.put(None)
+
+    def drain(self, max_items=20000):
+        """取出当前已到达的输出（最多 max_items 行），不阻塞"""
+        items = []
+        get = self._queue.get_nowait
+        try:
+            while len(items) < max_items:
+                item = get()
+                if item is None:
+                    self._open_streams -= 1
+                else:
+                    items.append(item)
+        except queue.Empty:
+            pass
+        return items
+
+    @property
+    def finished(self):
+        """两个输出流都已读完，且全部输出已被取出"""
+        return self._open_streams == 0 and self._queue.empty()
@@ -0,0 +1,134 @@
+import os
+import time
+
+
+class LineStats:
+    """单行源码的统计：执行次数、累计耗时、自身耗时（不含调用的函数）与内置命令耗时
+
+    递归调用中同一行嵌套执行时，累计耗时只计最外层一次。
+    """
+    __slots__ = ('line_no', 'text', 'hits', 'total', 'self_time', 'builtin', 'active')
+
+    def __init__(self, line_no, text):
+        self.line_no = line_no
+        self.text = text
+        self.hits = 0
+        self.total = 0.0
+        self.self_time = 0.0
+        self.builtin = 0.0
+        self.active = 0
+
+
+class FunctionStats:
+    """def 函数的统计；递归调用时累计耗时只计最外层一次"""
+    __slots__ = ('name', 'calls', 'total', 'self_time')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.self_time = 0.0
+
+
+class ScriptProfiler:
+    """脚本分析器：ShellParser 在每条指令和每次函数调用前后通知分析器
+
+    嵌套的耗时通过栈上的"子耗时"累加器扣除，得到每行和每个函数的自身耗时；
+    每行的自身耗时同时按函数调用栈归并，可导出为 flamegraph 使用的 collapsed 格式。
+    """
+
+    def __init__(self, script_name):
+        self.script_name = os.path.basename(script_name)
+        self.lines = {}
+        self.functions = {}
+        self.stacks = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._line_children = []
+        self._line_builtins = []
+        self._func_stack = [self.script_name]
+        self._func_children = []
+        self._stack_path = self.script_name
+
+    # === 由解释器调用 ===
+    def begin_line(self, ins):
+        stats = self.lines.get(ins.line_no)
+        if stats is None:
+            stats = self.lines[ins.line_no] = LineStats(ins.line_no, ins.text.strip())
+        stats.active += 1
+        self._line_children.append(0.0)
+        self._line_builtins.append(0.0)
+
+    def end_line(self, ins, elapsed):
+        child = self._line_children.pop()
+        builtin = self._line_builtins.pop()
+        stats = self.lines[ins.line_no]
+        self_time = elapsed - child
+        stats.active -= 1
+        stats.hits += 1
+        if not stats.active:
+            stats.total += elapsed
+        stats.self_time += self_time
+        stats.builtin += builtin
+        if self._line_children:
+            self._line_children[-1] += elapsed
+
+        key = f"{self._stack_path};line {ins.line_no + 1}"
+        self.stacks[key] = self.stacks.get(key, 0.0) + self_time
+
+    def add_builtin(self, elapsed):
+        """内置命令耗时记到当前执行的行"""
+        if self._line_builtins:
+            self._line_builtins[-1] += elapsed
+
+    def enter_function(self, name):
+        self._func_stack.append(name)
+        self._func_children.append(0.0)
+        self._stack_path = ';'.join(self._func_stack)
+        return time.perf_counter()
+
+    def exit_function(self, name, started):
+        elapsed = time.perf_counter() - started
+        self._func_stack.pop()
+        self._stack_path = ';'.join(self._func_stack)
+        child = self._func_children.pop()
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = FunctionStats(name)
+        stats.calls += 1
+        stats.self_time += elapsed - child
+        if name not in self._func_stack:
+            stats.total += elapsed
+        if self._func_children:
+            self._func_children[-1] += elapsed
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    # === 报告 ===
+    def report_lines(self, limit=20):
+        """按自身耗时从高到低排列的文本表格"""
+        result = [f"profile: {self.script_name}  总耗时 {self.elapsed * 1000:.2f} ms"]
+        result.append(f"{'line':>6} {'hits':>8} {'total ms':>10} {'self ms':>10} {'builtin ms':>10}  source")
+        rows = sorted(self.lines.values(), key=lambda s: s.self_time, reverse=True)
+        for stats in rows[:limit]:
+            result.append(f"{stats.line_no + 1:>6} {stats.hits:>8} {stats.total * 1000:>10.2f} "
+                          f"{stats.self_time * 1000:>10.2f} {stats.builtin * 1000:>10.2f}  {stats.text}")
+        if len(rows) > limit:
+            result.append(f"... 另有 {len(rows) - limit} 行未显示")
+
+        if self.functions:
+            result.append("")
+            result.append(f"{'function':<24} {'calls':>8} {'total ms':>10} {'self ms':>10}")
+            for stats in sorted(self.functions.values(), key=lambda s: s.self_time, reverse=True):
+                result.append(f"{stats.name:<24} {stats.calls:>8} {stats.total * 1000:>10.2f} "
+                              f"{stats.self_time * 1000:>10.2f}")
+        return result
+
+    def write_collapsed(self, path):
+        """写出 collapsed-stack 文件（每行"栈;帧 微秒数"），可直接交给 flamegraph.pl 等工具"""
+        with open(path, 'w', encoding="utf-8") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                micros = int(seconds * 1_000_000)
+                if micros > 0:
+                    f.write(f"{stack} {micros}\n")
@@ -0,0 +1,93 @@
+import os
+
+from src.output_sink import FileSink, RedirectSink
+from src.stream_commands import CommandError
+
+
+class Redirection:
+    """命令行中解析出的重定向：stdout/stderr 为 (路径, 是否追加) 或 None"""
+    __slots__ = ('command', 'stdout', 'stderr', 'merge_stderr')
+
+    def __init__(self, command, stdout=None, stderr=None, merge_stderr=False):
+        self.command = command
+        self.stdout = stdout
+        self.stderr = stderr
+        self.merge_stderr = merge_stderr
+
+    def open_sink(self, current_dir, outer_sink):
+        """打开目标文件，返回组合后的输出目标；未重定向的一侧仍写到 outer_sink"""
+        opened = []
+        try:
+            stdout_sink = outer_sink
+            if self.stdout is not None:
+                stdout_sink = FileSink(os.path.join(current_dir, self.stdout[0]), self.stdout[1])
+                opened.append(stdout_sink)
+            stderr_sink = outer_sink
+            if self.merge_stderr:
+                stderr_sink = stdout_sink
+            elif self.stderr is not None:
+                stderr_sink = FileSink(os.path.join(current_dir, self.stderr[0]), self.stderr[1])
+                opened.append(stderr_sink)
+        except OSError:
+            for sink in opened:
+                sink.close()
+            raise
+        return RedirectSink(stdout_sink, stderr_sink), opened
+
+
+def parse_redirections(cmd):
+    """解析引号外的 >、>>、2>、2>>、2>&1；没有重定向时返回 None"""
+    if '>' not in cmd:
+        return None
+
+    command = []
+    targets = {}
+    merge_stderr = False
+    quote = None
+    i = 0
+    length = len(cmd)
+    while i < length:
+        c = cmd[i]
+        if quote:
+            if c == quote:
+                quote = None
+            command.append(c)
+            i += 1
+            continue
+        if c in ('"', "'"):
+            quote = c
+            command.append(c)
+            i += 1
+            continue
+
+        fd = None
+        if c == '>':
+            fd, j = 1, i + 1
+        elif c == '2' and cmd.startswith('2>', i) and (i == 0 or cmd[i - 1].isspace()):
+            fd, j = 2, i + 2
+        if fd is None:
+            command.append(c)
+            i += 1
+            continue
+
+        if fd == 2 and cmd.startswith('&1', j):
+            merge_stderr = True
+            i = j + 2
+            continue
+        append = cmd.startswith('>', j)
+        if append:
+            j += 1
+        while j < length and cmd[j].isspace():
+            j += 1
+        start = j
+        while j < length and not cmd[j].isspace() and cmd[j] not in '<>|':
+            j += 1
+        target = cmd[start:j].strip('"\'')
+        if not target:
+            raise CommandError("pyterm: syntax error near unexpected token `newline'")
+        targets[fd] = (target, append)
+        i = j
+
+    if not targets and not merge_stderr:
+        return None
+    return Redirection(''.join(command).strip(), targets.get(1), targets.get(2), merge_stderr)
@@ -0,0 +1,432 @@
+import os
+import re
+import shlex
+import threading
+from functools import lru_cache
+
+from src.condition import compile_condition
+from src.memo import DEFAULT_MEMO_SIZE
+
+
+# 指令操作码
+OP_DEF = 'def'
+OP_LOCAL = 'local'
+OP_RETURN = 'return'
+OP_RETURN_CALL = 'return_call'
+OP_ASSIGN = 'assign'
+OP_ASSIGN_CALL = 'assign_call'
+OP_IF = 'if'
+OP_ELIF = 'elif'
+OP_ELSE = 'else'
+OP_FI = 'fi'
+OP_WHILE = 'while'
+OP_FOR = 'for'
+OP_DONE = 'done'
+OP_CALL = 'call'
+OP_ARITH = 'arith'
+OP_ARRAY = 'array'
+OP_ELEMENT = 'element'
+OP_DECLARE = 'declare'
+OP_COMMAND = 'cmd'
+
+# for 循环取值来源的类型
+LOOP_RANGE = 'range'
+LOOP_WORDS = 'words'
+LOOP_LITERAL = 'literal'
+LOOP_EXPAND = 'expand'
+LOOP_GLOB = 'glob'
+LOOP_SPLICE = 'splice'
+
+
+class Instruction:
+    """编译后的单条指令，args 的含义由 op 决定
+
+    jump/end 由跳转表预处理填入：
+    - if/elif: jump 指向下一个 elif/else/fi，end 指向 fi 之后
+    - else: end 指向 fi 之后
+    - while/for: jump 指向 done 之后；done: jump 指向对应的 while/for
+    """
+    __slots__ = ('op', 'line_no', 'text', 'args', 'jump', 'end')
+
+    def __init__(self, op, line_no, text, args=()):
+        self.op = op
+        self.line_no = line_no
+        self.text = text
+        self.args = args
+        self.jump = None
+        self.end = None
+
+    def __repr__(self):
+        return f"Instruction({self.op!r}, line={self.line_no}, args={self.args!r})"
+
+
+class Program:
+    """编译结果：扁平指令列表，执行期只读，可在多次运行间共享"""
+    __slots__ = ('instructions', 'source_name')
+
+    def __init__(self, instructions, source_name='<string>'):
+        self.instructions = instructions
+        self.source_name = source_name
+
+    def __len__(self):
+        return len(self.instructions)
+
+
+class ScriptCompiler:
+    """把脚本文本一次性编译为指令列表，执行期不再做正则匹配"""
+    func_def_re = re.compile(r'^def (\w+)\(\s*([\w,\s]*)\s*\)\s*\{')
+    memo_re = re.compile(r'^@memo(?:\(\s*([1-9]\d*)\s*\))?(?:\s+(.*))?$')
+    assign_re = re.compile(r'^(\w+)\s*=\s*(.*)$')
+    assign_call_re = re.compile(r'^\$\((\w+)\((.*)\)\)$')
+    call_re = re.compile(r'^(\w+)\((.*)\)$')
+    for_re = re.compile(r'^for\s+(\w+)\s+in\b(.*?)(?:\s*;\s*do|\s*;)?$')
+    range_re = re.compile(r'^\{?([^.\s{}]+)\.\.([^.\s{}]+)\}?$')
+    array_assign_re = re.compile(r'^(\w+)(\+?)=\((.*)\)$')
+    element_assign_re = re.compile(r'^(\w+)\[([^\]]+)\]=(.*)$')
+    declare_re = re.compile(r'^-([aA])\s+(\w+)(?:=\((.*)\))?$')
+    splice_re = re.compile(r'^\$\{(\w+)\[[@*]\]\}$')
+    keyed_re = re.compile(r'^\[([^\]]+)\]=(.*)$')
+
+    def compile(self, script_content, source_name='<string>'):
+        lines = script_content.split('\n')
+        instructions, _ = self._compile_block(lines, 0, source_name, in_function=False)
+        return Program(self._resolve_jumps(instructions), source_name)
+
+    def _compile_block(self, lines, line_num, source_name, in_function):
+        instructions = []
+        while line_num < len(lines):
+            line = lines[line_num].rstrip('\r')
+            stripped_line = line.strip()
+            line_no = line_num
+            line_num += 1
+
+            # 空行或注释
+            if not stripped_line or stripped_line.startswith('#'):
+                continue
+
+            # 函数体结束
+            if in_function and stripped_line.startswith('}'):
+                return instructions, line_num
+
+            # @memo 注解：同一行或下一行必须是函数定义，memo_size 为缓存容量
+            memo_size = None
+            def_line = stripped_line
+            memo_match = self.memo_re.match(stripped_line)
+            if memo_match:
+                def_line = (memo_match.group(2) or '').strip()
+                if not def_line and line_num < len(lines) \
+                        and self.func_def_re.match(lines[line_num].strip()):
+                    def_line = lines[line_num].strip()
+                    line_num += 1
+                if self.func_def_re.match(def_line):
+                    memo_size = int(memo_match.group(1)) if memo_match.group(1) else DEFAULT_MEMO_SIZE
+
+            # 函数定义：函数体递归编译为独立的 Program
+            func_def_match = self.func_def_re.match(def_line)
+            if func_def_match:
+                func_name = func_def_match.group(1)
+                params = [p.strip() for p in func_def_match.group(2).split(',') if p.strip()]
+                body, line_num = self._compile_block(lines, line_num, source_name, in_function=True)
+                body_program = Program(self._resolve_jumps(body), f"{source_name}:{func_name}")
+                instructions.append(Instruction(OP_DEF, line_no, line,
+                                                (func_name, params, body_program, memo_size)))
+                continue
+
+            instructions.append(self._compile_line(line, stripped_line, line_no))
+
+        return instructions, line_num
+
+    def _compile_line(self, line, stripped_line, line_no):
+        if stripped_line.startswith('declare '):
+            declare = self._compile_declare(line, line_no, stripped_line[8:].strip(), False)
+            if declare is not None:
+                return declare
+
+        if stripped_line.startswith('local '):
+            rest = stripped_line[6:].strip()
+            declare = self._compile_declare(line, line_no, rest, True)
+            if declare is not None:
+                return declare
+            array_match = self.array_assign_re.match(rest)
+            if array_match:
+                return self._compile_array(line, line_no, array_match, True)
+            parts = rest.split('=', 1)
+            if len(parts) != 2:
+                return Instruction(OP_LOCAL, line_no, line, None)
+            var_name = parts[0].strip()
+            value = parts[1].strip()
+            call = self._match_call(self.assign_call_re, value)
+            if call:
+                return Instruction(OP_ASSIGN_CALL, line_no, line, (var_name, call[0], call[1], True))
+            return Instruction(OP_LOCAL, line_no, line, (var_name, value, '$' in value))
+
+        if stripped_line.startswith('return '):
+            value = stripped_line[7:].strip()
+            # return $(f(...))：返回值直接来自另一次函数调用，执行期不占用 Python 栈
+            call = self._match_call(self.assign_call_re, value)
+            if call:
+                return Instruction(OP_RETURN_CALL, line_no, line, (call[0], call[1], value))
+            return Instruction(OP_RETURN, line_no, line, (value, '$' in value))
+
+        array_match = self.array_assign_re.match(stripped_line)
+        if array_match:
+            return self._compile_array(line, line_no, array_match, False)
+
+        element_match = self.element_assign_re.match(stripped_line)
+        if element_match:
+            value, expand_vars = self._unquote(element_match.group(3).strip())
+            has_dollar = '$' in value
+            return Instruction(OP_ELEMENT, line_no, line,
+                               (element_match.group(1), element_match.group(2).strip(), value,
+                                has_dollar, has_dollar and expand_vars))
+
+        var_match = self.assign_re.match(stripped_line)
+        if var_match:
+            return self._compile_assignment(line, line_no, var_match.group(1), var_match.group(2).strip())
+
+        if stripped_line.startswith('if '):
+            return Instruction(OP_IF, line_no, line, compile_condition(stripped_line[3:]))
+        if stripped_line.startswith('elif '):
+            return Instruction(OP_ELIF, line_no, line, compile_condition(stripped_line[5:]))
+        if stripped_line in ('else', 'else;'):
+            return Instruction(OP_ELSE, line_no, line)
+        if stripped_line in ('fi', 'fi;'):
+            return Instruction(OP_FI, line_no, line)
+        if stripped_line.startswith('while '):
+            return Instruction(OP_WHILE, line_no, line, compile_condition(stripped_line[6:]))
+        if stripped_line.startswith('for '):
+            for_match = self.for_re.match(stripped_line)
+            if for_match:
+                return Instruction(OP_FOR, line_no, line,
+                                   (for_match.group(1), self._compile_loop_source(for_match.group(2).strip())))
+        if stripped_line in ('done', 'done;'):
+            return Instruction(OP_DONE, line_no, line)
+
+        # 算术命令 ((expr))，如 ((i++))
+        if stripped_line.startswith('((') and stripped_line.endswith('))'):
+            return Instruction(OP_ARITH, line_no, line, stripped_line[2:-2].strip())
+
+        call = self._match_call(self.call_re, stripped_line)
+        if call:
+            return Instruction(OP_CALL, line_no, line, call)
+
+        return Instruction(OP_COMMAND, line_no, line, (line, '$' in line))
+
+    def _compile_assignment(self, line, line_no, var_name, var_value):
+        call = self._match_call(self.assign_call_re, var_value)
+        if call:
+            return Instruction(OP_ASSIGN_CALL, line_no, line, (var_name, call[0], call[1], False))
+
+        var_value, expand_vars = self._unquote(var_value)
+        has_dollar = '$' in var_value
+        return Instruction(OP_ASSIGN, line_no, line, (var_name, var_value, has_dollar, has_dollar and expand_vars))
+
+    def _compile_array(self, line, line_no, array_match, is_local):
+        """arr=(a b c)、arr+=(d)：args 为 (数组名, 元素, 追加, 是否 local)"""
+        items = self._compile_array_items(array_match.group(3).strip())
+        return Instruction(OP_ARRAY, line_no, line,
+                           (array_match.group(1), items, array_match.group(2) == '+', is_local))
+
+    def _compile_declare(self, line, line_no, text, is_local):
+        """declare -a/-A 数组名[=(...)]：args 为 (数组名, 是否关联数组, 初始元素或 None, 是否 local)"""
+        declare_match = self.declare_re.match(text)
+        if not declare_match:
+            return None
+        items = declare_match.group(3)
+        if items is not None:
+            items = self._compile_array_items(items.strip())
+        return Instruction(OP_DECLARE, line_no, line,
+                           (declare_match.group(2), declare_match.group(1) == 'A', items, is_local))
+
+    @classmethod
+    def _compile_array_items(cls, text):
+        """编译数组字面量的元素
+
+        全部写成 [键]=值 时返回 (True, [(键, 值), ...])，否则返回 (False, 单词列表)，
+        单词列表的格式与 for 循环相同。
+        """
+        words = cls._split_words(text)
+        keyed = [cls.keyed_re.match(word) for word in words]
+        if words and all(keyed):
+            return True, [(match.group(1), match.group(2)) for match in keyed]
+        return False, cls._compile_words(words)
+
+    @staticmethod
+    def _unquote(var_value):
+        """处理引号：转义在编译期完成，执行期只剩替换；返回 (值, 是否做变量替换)"""
+        expand_vars = True
+        if var_value.startswith(('"', "'")):
+            quote_char = var_value[0]
+            var_value = var_value[1:]
+
+            # 查找匹配的引号（支持转义）
+            end_quote_pos = -1
+            escaped = False
+            for i, c in enumerate(var_value):
+                if c == '\\' and not escaped:
+                    escaped = True
+                    continue
+                if c == quote_char and not escaped:
+                    end_quote_pos = i
+                    break
+                escaped = False
+
+            if end_quote_pos != -1:
+                value_content = var_value[:end_quote_pos]
+                value_content = value_content.replace('\\n', '\n')
+                value_content = value_content.replace('\\t', '\t')
+                value_content = value_content.replace('\\\\', '\\')
+                value_content = value_content.replace(f'\\{quote_char}', quote_char)
+                var_value = value_content
+                # 单引号内只做算术扩展，不做变量替换
+                expand_vars = quote_char == '"'
+            else:
+                # 未找到匹配的引号 - 错误处理
+                var_value = var_value.rstrip(quote_char)
+                expand_vars = False
+        return var_value, expand_vars
+
+    @classmethod
+    def _compile_loop_source(cls, items):
+        """编译 for 循环的取值来源
+
+        返回 (LOOP_RANGE, 起点, 终点)：1..N 形式，端点为整数或待求值的表达式；
+        或 (LOOP_WORDS, [(单词, 类型), ...])：类型为 LOOP_LITERAL、LOOP_EXPAND（含 $，
+        执行期展开后按空白切分）、LOOP_GLOB（含通配符，执行期扫描目录）或
+        LOOP_SPLICE（${arr[@]}，单词为数组名，执行期逐个取出元素）。
+        """
+        range_match = cls.range_re.match(items)
+        if range_match:
+            bounds = []
+            for bound in range_match.groups():
+                try:
+                    bounds.append(int(bound))
+                except ValueError:
+                    bounds.append(bound)
+            return (LOOP_RANGE, bounds[0], bounds[1])
+        return (LOOP_WORDS, cls._compile_words(cls._split_words(items)))
+
+    @staticmethod
+    def _split_words(text):
+        try:
+            return shlex.split(text)
+        except ValueError:
+            return text.split()
+
+    @classmethod
+    def _compile_words(cls, words):
+        compiled = []
+        for word in words:
+            splice_match = cls.splice_re.match(word)
+            if splice_match:
+                compiled.append((splice_match.group(1), LOOP_SPLICE))
+            elif '$' in word:
+                compiled.append((word, LOOP_EXPAND))
+            elif any(c in word for c in '*?['):
+                compiled.append((word, LOOP_GLOB))
+            else:
+                compiled.append((word, LOOP_LITERAL))
+        return compiled
+
+    @staticmethod
+    def _resolve_jumps(instructions):
+        """预先配对 if/elif/else/fi 与 while/for/done（支持嵌套），执行期直接跳转"""
+        count = len(instructions)
+        blocks = []  # 每项为一个未闭合块的分支指令下标列表
+        for index, ins in enumerate(instructions):
+            op = ins.op
+            if op == OP_IF or op == OP_WHILE or op == OP_FOR:
+                blocks.append([index])
+            elif op == OP_ELIF or op == OP_ELSE:
+                if blocks and instructions[blocks[-1][0]].op == OP_IF \
+                        and instructions[blocks[-1][-1]].op != OP_ELSE:
+                    branches = blocks[-1]
+                    instructions[branches[-1]].jump = index
+                    branches.append(index)
+            elif op == OP_FI:
+                if blocks and instructions[blocks[-1][0]].op == OP_IF:
+                    branches = blocks.pop()
+                    instructions[branches[-1]].jump = index
+                    for branch in branches:
+                        instructions[branch].end = index + 1
+                    ins.end = index + 1
+            elif op == OP_DONE:
+                if blocks and instructions[blocks[-1][0]].op in (OP_WHILE, OP_FOR):
+                    start = blocks.pop()[0]
+                    instructions[start].jump = index + 1
+                    ins.jump = start
+
+        # 未闭合的块：跳转到程序末尾
+        for branches in blocks:
+            instructions[branches[-1]].jump = count
+            for branch in branches:
+                instructions[branch].end = count
+        return instructions
+
+    @classmethod
+    def _match_call(cls, pattern, text):
+        """匹配函数调用，返回 (函数名, 参数列表)；参数中括号不配对时视为不匹配"""
+        match = pattern.match(text)
+        if not match:
+            return None
+        args = cls._split_args(match.group(2))
+        if args is None:
+            return None
+        return match.group(1), args
+
+    @staticmethod
+    def _split_args(arg_text):
+        """按顶层逗号切分参数，允许参数中出现 $((a-1)) 之类的括号"""
+        args = []
+        depth = 0
+        start = 0
+        for i, c in enumerate(arg_text):
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+                if depth < 0:
+                    return None
+            elif c == ',' and depth == 0:
+                args.append(arg_text[start:i].strip())
+                start = i + 1
+        if depth != 0:
+            return None
+        args.append(arg_text[start:].strip())
+        return [arg for arg in args if arg]
+
+
+class ScriptCache:
+    """按路径和 mtime 缓存编译结果，文件未改动时直接复用"""
+
+    def __init__(self, compiler=None):
+        self.compiler = compiler or ScriptCompiler()
+        self._programs = {}
+        self._lock = threading.Lock()
+        self.compile_source = lru_cache(maxsize=256)(self._compile_source)
+
+    def load(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._programs.get(path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+        with open(path, 'r', encoding="utf-8") as f:
+            program = self.compiler.compile(f.read(), path)
+        with self._lock:
+            self._programs[path] = (key, program)
+        return program
+
+    def _compile_source(self, script_content):
+        return self.compiler.compile(script_content)
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+        self.compile_source.cache_clear()
+
+
+script_cache = ScriptCache()
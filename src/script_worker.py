@@ -0,0 +1,33 @@
+import threading
+import traceback
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from src.output_sink import BatchingSink
+
+
+class ScriptWorker(QThread):
+    """在工作线程中执行脚本任务，输出按批通过排队信号送回 GUI 线程"""
+    output_ready = pyqtSignal(list)
+    job_failed = pyqtSignal(str)
+
+    def __init__(self, terminal, job, description, parent=None):
+        super().__init__(parent)
+        self.terminal = terminal
+        self.job = job
+        self.description = description
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        sink = BatchingSink(self.output_ready.emit, ansi=self.terminal.default_sink.ansi)
+        try:
+            with self.terminal.redirect_output(sink), self.terminal.bind_cancel_event(self.cancel_event):
+                self.job(self.cancel_event)
+        except Exception as e:
+            traceback.print_exc()
+            self.job_failed.emit(str(e))
+        finally:
+            sink.flush()
@@ -0,0 +1,109 @@
+import gzip
+import os
+import re
+import threading
+import time
+
+
+# 终端默认最多保留的行数；大小上限（字符数）默认不限制
+DEFAULT_MAX_LINES = 5000
+DEFAULT_MAX_CHARS = 0
+
+# 超出上限时裁到上限的该比例，避免每次输出都裁剪一次
+TRIM_LOW_WATER = 0.9
+
+
+class ScrollbackLog:
+    """被裁掉的终端历史，按行追加写入 gzip 压缩文件，之后可用正则检索
+
+    文件以追加方式打开：同一路径多次启用时内容依次接在后面。
+    每次写入后做一次同步刷新，检索时能读到已写入的全部行。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lines_written = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, lines):
+        if not lines:
+            return
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._file = gzip.open(self.path, 'at', encoding="utf-8")
+            for line in lines:
+                self._file.write(line)
+                self._file.write('\n')
+            self._file.flush()
+            self.lines_written += len(lines)
+
+    def search(self, pattern, ignore_case=False):
+        """逐行解压检索，返回 (行号, 行) 迭代器；行号从 1 开始，按写入顺序计数"""
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, 'rt', encoding="utf-8") as f:
+            line_no = 0
+            try:
+                for line in f:
+                    line_no += 1
+                    line = line.rstrip('\n')
+                    if regex.search(line):
+                        yield line_no, line
+            except EOFError:
+                # 仍在写入的文件没有结束标记，已刷新的内容都已读出
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Scrollback:
+    """终端回滚区的上限设置和可选的溢出日志
+
+    max_lines/max_chars 为 0 表示不限制；log 为 None 时裁掉的行直接丢弃。
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, max_chars=DEFAULT_MAX_CHARS):
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.log = None
+        self.trimmed_lines = 0
+
+    def lines_to_trim(self, line_count):
+        """行数超限时返回应裁掉的行数（裁到低水位），否则返回 0"""
+        if not self.max_lines or line_count <= self.max_lines:
+            return 0
+        return line_count - int(self.max_lines * TRIM_LOW_WATER)
+
+    def chars_to_trim(self, char_count):
+        if not self.max_chars or char_count <= self.max_chars:
+            return 0
+        return char_count - int(self.max_chars * TRIM_LOW_WATER)
+
+    def discard(self, lines):
+        """记录裁掉的行，启用溢出日志时写入日志"""
+        self.trimmed_lines += len(lines)
+        if self.log is not None:
+            self.log.append(lines)
+
+    def enable_log(self, path=None):
+        """启用溢出日志；省略路径时在 .pyterm_scrollback 目录下按启动时间新建文件"""
+        if path is None:
+            path = os.path.join(os.getcwd(), '.pyterm_scrollback',
+                                time.strftime('%Y%m%d-%H%M%S') + '.log.gz')
+        if self.log is not None and self.log.path == path:
+            return self.log
+        self.disable_log()
+        self.log = ScrollbackLog(path)
+        return self.log
+
+    def disable_log(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
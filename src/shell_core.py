@@ -0,0 +1,979 @@
+import os
+import re
+import subprocess
+import threading
+from contextlib import contextmanager
+from html import escape
+
+from src.command_registry import CommandRegistry, method_command
+from src.exec_context import ExecContext, ShellScope
+from src.job_control import JOB_KILLED, JobManager, TaggedSink, split_background
+from src.memo import MemoRegistry
+from src.output_sink import COLOR_ERROR, COLOR_OUTPUT, SINK_CLEAR, SINK_WRITE, BatchingSink, BufferSink, ListSink, StringSink
+from src.parallel import ParallelRunner, build_commands, group_xargs_input, headless_args, parse_parallel, parse_xargs
+from src.profiler import ScriptProfiler
+from src.redirection import parse_redirections
+from src.shell_parser import ScriptCancelled, ShellParser
+from src.stream_commands import STREAM_COMMANDS, CommandError, StreamContext, build_pipeline, split_pipeline
+from src.tracer import TRACE_LEVELS, TRACE_LINE, TRACE_OFF, Tracer
+
+
+class ShellCore:
+    """命令解释与内置命令的实现，不依赖 Qt
+
+    所有输出都经过 write/write_error 写入当前线程的输出目标，
+    图形界面（TerminalEmulator）和无界面模式（HeadlessShell）只提供不同的默认输出
+    以及少数需要界面的命令（交互式 python、vim、exit）。
+    """
+
+    # 内置命令：命令名 -> 实现方法名，按命令名精确匹配
+    BUILTIN_COMMANDS = {
+        'clear': 'clear_output',
+        'ls': 'ls_command',
+        'cd': 'cd_command',
+        'pwd': 'pwd_command',
+        'touch': 'touch_command',
+        'mkdir': 'mkdir_command',
+        'rm': 'rm_command',
+        'cat': 'cat_command',
+        'less': 'less_command',
+        'cp': 'cp_command',
+        'mv': 'mv_command',
+        'echo': 'echo_command',
+        'export': 'export_command',
+        'head': 'head_command',
+        'tail': 'tail_command',
+        'grep': 'grep_command',
+        'sort': 'sort_command',
+        'uniq': 'uniq_command',
+        'asciishow': 'show_ascii_image',
+        'vim': 'vim_command',
+        'help': 'show_help',
+        'exit': 'exit_command',
+        'curl': 'curl_command',
+        'set': 'set_command',
+        'trace': 'trace_command',
+        'memo': 'memo_command',
+        'parallel': 'parallel_command',
+        'xargs': 'xargs_command',
+        'jobs': 'jobs_command',
+        'wait': 'wait_command',
+        'kill': 'kill_command',
+        'run': 'run_command',
+        'python': 'run_python_script',
+        'python3': 'run_python_script',
+    }
+    PYTHON_COMMANDS = ('python', 'python3')
+
+    def init_shell(self, default_sink):
+        """初始化命令执行状态；default_sink 为没有重定向时的输出目标"""
+        self._ctx = ExecContext()
+        self._output_lock = threading.Lock()
+        self.default_sink = default_sink
+        self._scope = ShellScope(os.getcwd(), {
+            'PATH': '/home/user/bin:/usr/bin:/bin',
+            'USER': 'user',
+            'HOME': '/home/user',
+            'PYTERM_VERSION': '0.9'
+        })
+        self.is_script_execution = False
+        self.exit_status = None
+        self.tracer = Tracer(on_warn=self.write_error)
+        self.jobs = JobManager()
+        self.memo = MemoRegistry()
+        self.commands = CommandRegistry()
+        for name, method_name in self.BUILTIN_COMMANDS.items():
+            self.commands.add(method_command(name, method_name))
+
+    # === 输出与脚本任务 ===
+    @property
+    def current_cmd(self):
+        return self._ctx.current_cmd
+
+    @current_cmd.setter
+    def current_cmd(self, value):
+        self._ctx.current_cmd = value
+
+    @property
+    def scope(self):
+        """当前线程的工作目录和环境变量（后台任务中为任务自己的副本）"""
+        return self._ctx.scope or self._scope
+
+    @property
+    def current_dir(self):
+        return self.scope.current_dir
+
+    @current_dir.setter
+    def current_dir(self, value):
+        self.scope.current_dir = value
+
+    @property
+    def environment(self):
+        return self.scope.environment
+
+    @contextmanager
+    def use_scope(self, scope):
+        """在当前线程内使用 scope 作为工作目录和环境变量"""
+        saved, self._ctx.scope = self._ctx.scope, scope
+        try:
+            yield scope
+        finally:
+            self._ctx.scope = saved
+
+    def current_sink(self):
+        """当前线程的输出目标；没有重定向时为默认输出（终端控件或标准输出）"""
+        sinks = self._ctx.sinks
+        return sinks[-1] if sinks else self.default_sink
+
+    def write(self, text, color=COLOR_OUTPUT):
+        """输出一行到当前线程的输出目标"""
+        self.current_sink().write(text, color)
+
+    def write_error(self, text):
+        self.current_sink().write_error(text)
+
+    def clear_output(self, argv):
+        self.current_sink().clear()
+
+    @contextmanager
+    def redirect_output(self, sink):
+        """在当前线程内把命令输出重定向到 sink"""
+        self._ctx.sinks.append(sink)
+        try:
+            yield sink
+        finally:
+            self._ctx.sinks.pop()
+            sink.flush()
+
+    @contextmanager
+    def bind_cancel_event(self, cancel_event):
+        """在当前线程内登记任务的取消标志，脚本中嵌套的 run/wait 据此响应 Ctrl+C 或 kill"""
+        saved, self._ctx.cancel_event = self._ctx.cancel_event, cancel_event
+        try:
+            yield cancel_event
+        finally:
+            self._ctx.cancel_event = saved
+
+    def run_job(self, job, description):
+        """执行 job(cancel_event)；图形界面在 GUI 线程中改为交给工作线程执行"""
+        job(self._ctx.cancel_event or threading.Event())
+
+    def emit_output_batch(self, items):
+        """把工作线程中收集的一批输出交给默认输出；图形界面改为通过信号送回 GUI 线程"""
+        with self._output_lock:
+            for kind, text, color in items:
+                if kind == SINK_CLEAR:
+                    self.default_sink.clear()
+                elif color == COLOR_ERROR:
+                    # 批次中的错误信息仍按错误输出，无界面模式据此计算退出码
+                    self.default_sink.write_error(text)
+                else:
+                    self.default_sink.write(text, color)
+            self.default_sink.flush()
+
+    def forward_to_gui_thread(self):
+        """命令必须在 GUI 线程执行时转交过去并返回 True；无界面模式没有这种命令"""
+        return False
+
+    def run_pipeline(self, segments):
+        """执行管道 cmd1 | cmd2 | ...，各阶段以行迭代器惰性串联"""
+        stages = [segment.split() for segment in segments]
+        if not all(stages):
+            self.write_error("pyterm: syntax error near unexpected token `|'")
+            return
+
+        if stages[-1][0] == 'xargs':
+            self.run_xargs(segments[:-1], stages[-1])
+            return
+
+        source = None
+        if stages[0][0] not in STREAM_COMMANDS and len(stages) > 1:
+            # 非流式命令只能作为管道的第一段，先收集其输出
+            source = iter(self.capture_command_lines(segments[0]))
+            stages = stages[1:]
+        for argv in stages:
+            if argv[0] not in STREAM_COMMANDS:
+                self.write_error(f"pyterm: {argv[0]}: cannot be used in a pipeline")
+                return
+        self.run_stages(stages, source)
+
+    def run_stages(self, stages, source=None):
+        """串联执行流式命令，stages 为各阶段的 argv；source 为首段之前的输入行"""
+        # 只有直接显示在终端上时才加行号和高亮；写入文件、被捕获（命令替换、管道首段）时保留原始行
+        decorate = self.current_sink().ansi
+        ctx = StreamContext(self.current_dir, self.write_error,
+                            notice=lambda text: self.write(text, '#FFFF00'), decorate=decorate)
+        stream = build_pipeline(stages, ctx, source)
+        try:
+            for line in stream:
+                self.write(line)
+        except CommandError as e:
+            self.write_error(str(e))
+        except (OSError, UnicodeDecodeError) as e:
+            self.write_error(f"{stages[-1][0]}: {str(e)}")
+        finally:
+            stream.close()
+
+    # === 后台任务 ===
+    def launch_background(self):
+        """命令以 & 结尾时提交为后台任务，返回 True 表示命令已处理"""
+        if '&' not in self.current_cmd:
+            return False
+        command = split_background(self.current_cmd)
+        if command is None:
+            return False
+        if not command:
+            self.write_error("pyterm: syntax error near unexpected token `&'")
+            return True
+        if command.split(' ', 1)[0] in ('vim', 'exit'):
+            self.write_error(f"pyterm: {command.split(' ', 1)[0]}: cannot run in background")
+            return True
+
+        # 任务在提交时复制工作目录和环境变量，任务中的 cd/export 不影响终端
+        scope = self.scope.copy()
+        job = self.jobs.submit(command, lambda job: self.run_background_job(job, scope),
+                               self.on_background_job_finished)
+        self.write(f"[{job.job_id}] {command}", '#FFFF00')
+        return True
+
+    def run_background_job(self, job, scope):
+        """在线程池中执行后台任务，输出加上 [n] 前缀后按批送回 GUI 线程"""
+        sink = TaggedSink(BatchingSink(self.emit_output_batch, ansi=self.default_sink.ansi), f"[{job.job_id}] ")
+        with self.redirect_output(sink), self.bind_cancel_event(job.cancel_event), self.use_scope(scope):
+            self.current_cmd = job.command
+            self._ctx.job = job
+            try:
+                status = self.execute_command_internal()
+                if status:
+                    return status
+                # 其余命令没有退出码，输出过错误信息即视为失败
+                return 1 if sink.error_count else 0
+            finally:
+                self._ctx.job = None
+                self.current_cmd = ""
+
+    def stream_python_process(self, parts, full_path, stdin, on_start=None):
+        """运行 Python 脚本子进程，stdout/stderr 合并后逐行写入当前输出目标，返回退出码"""
+        process = subprocess.Popen(
+            [parts[0], full_path] + parts[2:],
+            cwd=self.current_dir,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        if on_start is not None:
+            on_start(process)
+        sink = self.current_sink()
+        for line in process.stdout:
+            sink.write(line.rstrip('\n'))
+            # 子进程输出间隔不定，逐行送出以免停留在批次缓冲中
+            sink.flush()
+        return process.wait()
+
+    def on_background_job_finished(self, job):
+        status = job.status_text
+        if job.error:
+            status = f"{status} ({job.error})"
+        color = '#FFFF00' if job.state != JOB_KILLED else '#FF0000'
+        self.emit_output_batch([(SINK_WRITE, f"[{job.job_id}] {status}  {job.command}", color)])
+
+    def jobs_command(self, argv):
+        jobs = self.jobs.jobs()
+        for job in jobs:
+            runtime = f"{job.runtime:.1f}s"
+            self.write(f"[{job.job_id}]  {job.status_text:<10} {runtime:>8}  {job.command}")
+        self.jobs.prune(jobs)
+
+    def parse_job_specs(self, name, specs):
+        """把 %n 参数转换为任务列表；无效时输出错误并返回 None"""
+        jobs = []
+        for spec in specs:
+            job = None
+            if spec.startswith('%') and spec[1:].isdigit():
+                job = self.jobs.get(int(spec[1:]))
+            if job is None:
+                self.write_error(f"{name}: {spec}: no such job")
+                return None
+            jobs.append(job)
+        return jobs
+
+    def wait_command(self, argv):
+        jobs = self.parse_job_specs('wait', argv[1:])
+        if jobs is None:
+            return
+        if not jobs:
+            jobs = self.jobs.jobs()
+
+        def job(cancel_event):
+            if not self.jobs.wait(jobs, cancel_event):
+                self.write_error("^C")
+                return
+            self.jobs.prune(jobs)
+
+        self.run_job(job, "wait")
+
+    def kill_command(self, argv):
+        specs = argv[1:]
+        if not specs:
+            self.write_error("kill: usage: kill %job ...")
+            return
+        jobs = self.parse_job_specs('kill', specs)
+        if jobs is None:
+            return
+        for job in jobs:
+            if not job.is_finished:
+                self.jobs.kill(job)
+
+    # === 并行执行 ===
+    def parallel_command(self, argv):
+        try:
+            max_jobs, keep_order, template, arg_groups = parse_parallel(argv)
+        except CommandError as e:
+            self.write_error(str(e))
+            return
+        self.run_parallel('parallel', build_commands(template, arg_groups), max_jobs, keep_order)
+
+    def xargs_command(self, argv):
+        self.write_error("xargs: expects input from a pipe, e.g. cat list | xargs -P 4 -n 1 cmd")
+
+    def run_xargs(self, segments, argv):
+        """cmd | xargs [-P N] [-n N] [-I {}] 命令：把上游输出作为参数并发执行命令"""
+        try:
+            max_jobs, keep_order, max_args, replace, template = parse_xargs(argv)
+        except CommandError as e:
+            self.write_error(str(e))
+            return
+        lines = self.capture_command_lines(' | '.join(segments))
+        arg_groups = group_xargs_input(lines, max_args, replace)
+        self.run_parallel('xargs', build_commands(template, arg_groups, replace), max_jobs, keep_order)
+
+    def run_parallel(self, name, commands, max_jobs, keep_order):
+        """在子进程中并发执行多条命令，输出按完成顺序（keep_order 时按输入顺序）显示"""
+        if not commands:
+            return
+
+        def job(cancel_event):
+            sink = self.current_sink()
+            runner = ParallelRunner(self.run_parallel_invocation, max_jobs, keep_order, cancel_event)
+            failures = runner.run(commands, lambda buffer: buffer.replay(sink))
+            if failures is None:
+                self.write_error("^C")
+                return
+            if failures:
+                self.write_error(f"{name}: {len(failures)} of {len(commands)} jobs failed:")
+                for command, code in failures:
+                    self.write_error(f"  [exit {code}] {command}")
+
+        self.run_job(job, f"{name} -j {max_jobs}")
+
+    def run_parallel_invocation(self, command, runner):
+        """执行 parallel/xargs 中的一条命令，返回 (退出码, 收集到的输出)
+
+        python 脚本直接以子进程运行；内置命令和脚本在无界面模式的终端子进程中执行，
+        使用当前的工作目录和环境变量，退出码非 0（输出过错误信息）即视为失败。
+        """
+        buffer = BufferSink()
+        parts = command.split()
+        name = parts[0] if parts else ''
+        if name in ('vim', 'exit'):
+            buffer.write_error(f"pyterm: {name}: cannot run in parallel")
+            return 2, buffer
+        if name in self.PYTHON_COMMANDS:
+            with self.redirect_output(buffer):
+                full_path = self.resolve_python_script(parts)
+            if full_path is None:
+                return 2, buffer
+            args = [name, full_path] + parts[2:]
+        else:
+            args = headless_args(command, self.environment)
+        code, stdout, stderr = runner.run_process(args, self.current_dir)
+        for line in stdout.splitlines():
+            buffer.write(line)
+        for line in stderr.splitlines():
+            buffer.write_error(line)
+        return code, buffer
+
+    def apply_redirection(self):
+        """命令含 >、>>、2> 时把输出接到文件后执行，返回 True 表示命令已处理"""
+        if '>' not in self.current_cmd:
+            return False
+        try:
+            redirection = parse_redirections(self.current_cmd)
+        except CommandError as e:
+            self.write_error(str(e))
+            return True
+        if redirection is None:
+            return False
+
+        try:
+            sink, opened = redirection.open_sink(self.current_dir, self.current_sink())
+        except OSError as e:
+            self.write_error(f"pyterm: {str(e)}")
+            return True
+
+        original_cmd = self.current_cmd
+        self.current_cmd = redirection.command
+        try:
+            with self.redirect_output(sink):
+                self.execute_command_internal()
+        finally:
+            self.current_cmd = original_cmd
+            for file_sink in opened:
+                file_sink.close()
+        return True
+
+    def capture_command_lines(self, cmd):
+        """执行一条命令并把输出收集为行列表，而不是显示到终端"""
+        sink = ListSink(error_sink=self.current_sink())
+        self._run_captured(cmd, sink)
+        return sink.lines()
+
+    def capture_command_output(self, cmd):
+        """执行一条命令并以字符串返回其输出（命令替换 $(...)），去掉末尾换行"""
+        sink = StringSink(error_sink=self.current_sink())
+        self._run_captured(cmd, sink)
+        return sink.getvalue().rstrip('\n')
+
+    def _run_captured(self, cmd, sink):
+        original_cmd = self.current_cmd
+        self.current_cmd = cmd
+        try:
+            with self.redirect_output(sink):
+                self.execute_command_internal()
+        finally:
+            self.current_cmd = original_cmd
+
+    # === 命令分发与脚本 ===
+    def register_command(self, name, handler, summary=""):
+        """插件入口：注册命令 handler(shell, argv)，同名时覆盖内置命令
+
+        argv 为按空白切分的参数列表；原始命令行在 shell.current_cmd 中。
+        """
+        return self.commands.register(name, handler, summary)
+
+    def execute_command_internal(self):
+        """内部执行命令，不自动显示提示符；返回命令的退出码（命令没有退出码时为 None）"""
+        self.current_cmd = self.current_cmd.strip()
+
+        if self.forward_to_gui_thread():
+            return
+
+        if self.launch_background() or self.apply_redirection():
+            return
+
+        segments = split_pipeline(self.current_cmd)
+        if len(segments) > 1:
+            self.run_pipeline(segments)
+            return
+
+        argv = self.current_cmd.split()
+        if not argv:
+            return
+        command = self.commands.get(argv[0])
+        if command is None:
+            self.write_error(f"pyterm: command not found: {argv[0]}")
+            return
+        return command.run(self, argv)
+
+    def run_command(self, argv):
+        """run [--profile [-o 文件]] 脚本路径"""
+        parts = argv[1:]
+        profile = False
+        flame_path = None
+        while parts and parts[0].startswith('-'):
+            option = parts.pop(0)
+            if option == '--profile':
+                profile = True
+            elif option == '-o' and parts:
+                flame_path = parts.pop(0)
+            else:
+                self.write_error(f"run: invalid option: {option}")
+                self.write_error("usage: run [--profile [-o file.folded]] script.sh")
+                return
+        if not parts:
+            self.write_error("run: missing script operand")
+            return
+        if flame_path is not None and not profile:
+            self.write_error("run: -o requires --profile")
+            return
+        if flame_path is not None:
+            flame_path = os.path.join(self.current_dir, flame_path)
+        self.run_script_file(' '.join(parts), profile=profile, flame_path=flame_path)
+
+    def run_script_file(self, script_path, profile=False, flame_path=None):
+        full_path = os.path.join(self.current_dir, script_path)
+
+        if not os.path.exists(full_path):
+            self.write_error(f"run: {script_path}: No such file or directory")
+            return
+
+        if not os.path.isfile(full_path):
+            self.write_error(f"run: {script_path}: Not a file")
+            return
+
+        if not script_path.endswith('.sh'):
+            self.write_error(f"run: {script_path}: Not a shell script")
+            return
+
+        def job(cancel_event):
+            parser = ShellParser(self, cancel_event)
+            if profile:
+                parser.profiler = ScriptProfiler(script_path)
+            try:
+                parser.run_file(full_path, self.current_dir)
+            except ScriptCancelled:
+                self.write_error("^C")
+            except Exception as e:
+                self.write_error(f"执行脚本失败: {str(e)}")
+            finally:
+                if profile:
+                    self.write_profile(parser.profiler, flame_path)
+
+        self.run_job(job, f"run {script_path}")
+
+    def write_profile(self, profiler, flame_path=None):
+        for line in profiler.report_lines():
+            self.write(line, '#FFFF00')
+        if flame_path is None:
+            return
+        try:
+            profiler.write_collapsed(flame_path)
+            self.write(f"collapsed stacks written to {os.path.relpath(flame_path, self.current_dir)}", '#FFFF00')
+        except OSError as e:
+            self.write_error(f"run: {str(e)}")
+
+    def resolve_python_script(self, parts):
+        """检查 python 命令的脚本参数，返回脚本完整路径；无效时输出错误并返回 None"""
+        if len(parts) < 2:
+            self.write_error("python: missing script file")
+            return None
+
+        script_path = parts[1]
+        full_path = os.path.join(self.current_dir, script_path)
+
+        if not os.path.exists(full_path):
+            self.write_error(f"python: can't open file '{script_path}': [Errno 2] No such file or directory")
+            return None
+
+        if not full_path.endswith('.py'):
+            self.write_error(f"python: '{script_path}' is not a Python script file")
+            return None
+        return full_path
+
+    def run_python_script(self, argv):
+        """非交互运行 Python 脚本，输出逐行写入当前输出目标，返回退出码
+
+        在后台任务中运行时没有标准输入，子进程登记到任务上以便 kill %n 终止；
+        退出码由任务状态显示，不再另外输出错误。
+        """
+        full_path = self.resolve_python_script(argv)
+        if full_path is None:
+            return 2
+        job = self._ctx.job
+        try:
+            if job is None:
+                exit_code = self.stream_python_process(argv, full_path, None)
+            else:
+                exit_code = self.stream_python_process(argv, full_path, subprocess.DEVNULL,
+                                                       lambda process: setattr(job, 'process', process))
+        except OSError as e:
+            self.write_error(f"python: {str(e)}")
+            return 1
+        if exit_code and job is None:
+            self.write_error(f"python: exited with status {exit_code}")
+        return exit_code
+
+    # === Linux命令实现 ===
+    def ls_command(self, argv):
+        try:
+            files = os.listdir(self.current_dir)
+            filtered_files = [f for f in files if f not in ['__pycache__', '.idea']]
+            for file in filtered_files:
+                file_path = os.path.join(self.current_dir, file)
+                if os.path.isdir(file_path):
+                    self.write(file + "/", '#00BFFF')
+                else:
+                    self.write(file)
+        except Exception as e:
+            self.write_error(f"ls: {str(e)}")
+
+    def cd_command(self, argv):
+        if len(argv) < 2:
+            return
+
+        target = argv[1]
+        if target == "..":
+            new_dir = os.path.dirname(self.current_dir)
+        else:
+            new_dir = os.path.join(self.current_dir, target)
+
+        project_root = os.getcwd()
+        if not os.path.abspath(new_dir).startswith(project_root):
+            self.write_error("cd: permission denied (outside project directory)")
+            return
+
+        if os.path.isdir(new_dir):
+            self.current_dir = new_dir
+        else:
+            self.write_error(f"cd: no such directory: {target}")
+
+    def pwd_command(self, argv):
+        rel_path = os.path.relpath(self.current_dir, os.getcwd())
+        self.write(rel_path)
+
+    def touch_command(self, argv):
+        parts = argv[1:]
+        for filename in parts:
+            file_path = os.path.join(self.current_dir, filename)
+            try:
+                with open(file_path, 'a', encoding="utf-8"):
+                    pass
+                self.write(f"created: {filename}")
+            except Exception as e:
+                self.write_error(f"touch: {str(e)}")
+
+    def mkdir_command(self, argv):
+        parts = argv[1:]
+        for dirname in parts:
+            dir_path = os.path.join(self.current_dir, dirname)
+            try:
+                os.makedirs(dir_path, exist_ok=True)
+                self.write(f"created directory: {dirname}")
+            except Exception as e:
+                self.write_error(f"mkdir: {str(e)}")
+
+    def rm_command(self, argv):
+        parts = argv[1:]
+        for path in parts:
+            full_path = os.path.join(self.current_dir, path)
+            try:
+                if os.path.isfile(full_path):
+                    os.remove(full_path)
+                    self.write(f"removed: {path}")
+                elif os.path.isdir(full_path):
+                    os.rmdir(full_path)
+                    self.write(f"removed directory: {path}")
+                else:
+                    self.write_error(f"rm: no such file or directory: {path}")
+            except Exception as e:
+                self.write_error(f"rm: {str(e)}")
+
+    def cat_command(self, argv):
+        self.run_stages([argv])
+
+    def less_command(self, argv):
+        """没有终端窗口（或输出被重定向）时不分页，与 cat 相同"""
+        self.run_stages([argv])
+
+    def cp_command(self, argv):
+        parts = argv[1:]
+        if len(parts) < 2:
+            self.write_error("cp: missing file operand")
+            return
+
+        src = parts[0]
+        dst = parts[1]
+
+        src_path = os.path.join(self.current_dir, src)
+        dst_path = os.path.join(self.current_dir, dst)
+
+        if not os.path.exists(src_path):
+            self.write_error(f"cp: cannot stat '{src}': No such file or directory")
+            return
+
+        if os.path.isdir(src_path):
+            if len(parts) > 2 or not dst.endswith('/'):
+                self.write_error(f"cp: omitting directory '{src}'")
+                return
+
+            os.makedirs(dst_path, exist_ok=True)
+
+            for item in os.listdir(src_path):
+                item_src = os.path.join(src_path, item)
+                item_dst = os.path.join(dst_path, item)
+
+                if os.path.isdir(item_src):
+                    os.makedirs(item_dst, exist_ok=True)
+                else:
+                    with open(item_src, 'r', encoding="utf-8") as f_src:
+                        content = f_src.read()
+                    with open(item_dst, 'w', encoding="utf-8") as f_dst:
+                        f_dst.write(content)
+
+            self.write(f"copied directory '{src}' to '{dst}'")
+        else:
+            try:
+                with open(src_path, 'r', encoding="utf-8") as f_src:
+                    content = f_src.read()
+
+                if os.path.isdir(dst_path):
+                    dst_path = os.path.join(dst_path, os.path.basename(src_path))
+
+                with open(dst_path, 'w', encoding="utf-8") as f_dst:
+                    f_dst.write(content)
+
+                self.write(f"copied '{src}' to '{dst}'")
+            except Exception as e:
+                self.write_error(f"cp: error copying file: {str(e)}")
+
+    def mv_command(self, argv):
+        parts = argv[1:]
+        if len(parts) < 2:
+            self.write_error("mv: missing file operand")
+            return
+
+        src = parts[0]
+        dst = parts[1]
+
+        src_path = os.path.join(self.current_dir, src)
+        dst_path = os.path.join(self.current_dir, dst)
+
+        if not os.path.exists(src_path):
+            self.write_error(f"mv: cannot stat '{src}': No such file or directory")
+            return
+
+        try:
+            if os.path.isdir(dst_path):
+                dst_path = os.path.join(dst_path, os.path.basename(src_path))
+
+            os.replace(src_path, dst_path)
+            self.write(f"moved '{src}' to '{dst}'")
+        except Exception as e:
+            self.write_error(f"mv: error moving file: {str(e)}")
+
+    def echo_command(self, argv):
+        # 保留引号内的原始空白，从完整命令行取参数
+        text = self.current_cmd[5:].strip()
+
+        if (text.startswith('"') and text.endswith('"')) or (text.startswith("'") and text.endswith("'")):
+            quote_char = text[0]
+            content = text[1:-1]
+            content = re.sub(r'\$(\w+)', lambda m: self.environment.get(m.group(1), ''), content)
+            content = content.replace(f'\\{quote_char}', quote_char)
+            content = content.replace(r'\\', '\\')
+        else:
+            content = re.sub(r'\$(\w+)', lambda m: self.environment.get(m.group(1), ''), text)
+
+        self.write(content)
+
+    def export_command(self, argv):
+        parts = argv[1:]
+        if not parts:
+            for key, value in self.environment.items():
+                self.write(f"{key}={value}")
+            return
+
+        for part in parts:
+            if '=' in part:
+                key, value = part.split('=', 1)
+                self.environment[key] = value
+            else:
+                self.write_error(f"export: '{part}': not a valid identifier")
+
+    def head_command(self, argv):
+        self.run_stages([argv])
+
+    def tail_command(self, argv):
+        self.run_stages([argv])
+
+    def grep_command(self, argv):
+        self.run_stages([argv])
+
+    def sort_command(self, argv):
+        self.run_stages([argv])
+
+    def uniq_command(self, argv):
+        self.run_stages([argv])
+
+    def show_ascii_image(self, argv):
+        path = ' '.join(argv[1:])
+        full_path = os.path.join(self.current_dir, path)
+
+        try:
+            # ascii_magic 加载较慢，只在使用时导入
+            from src.custom_ascii_magic import CustomAsciiArt
+            my_art = CustomAsciiArt.from_image(full_path)
+            ascii_text = my_art.to_ascii(
+                columns=40,
+                width_ratio=2.0,
+                # 输出目标能显示 ANSI 颜色时输出彩色图片
+                monochrome=not self.current_sink().ansi,
+            )
+
+            self.write(ascii_text)
+
+        except Exception as e:
+            self.write_error(f"错误: 无法显示ASCII图片 - {str(e)}")
+
+    def curl_command(self, argv):
+        import requests
+
+        try:
+            url = argv[1]
+            response = requests.get(url, timeout=10)
+            response.encoding = response.apparent_encoding
+            response.raise_for_status()
+            escaped_text = escape(response.text)
+            self.write(escaped_text)
+        except IndexError:
+            self.write_error("curl: Please provide a URL.")
+        except requests.RequestException as e:
+            self.write_error(f"curl: Error: {str(e)}")
+        except Exception as e:
+            self.write_error(f"curl: {str(e)}")
+
+    def set_command(self, argv):
+        """set -x / set +x：开启或关闭脚本逐行跟踪"""
+        parts = argv[1:]
+        if not parts:
+            self.write(f"xtrace\t{'on' if self.tracer.level >= TRACE_LINE else 'off'}")
+            return
+
+        for option in parts:
+            if option == '-x':
+                self.tracer.set_level(TRACE_LINE)
+            elif option == '+x':
+                self.tracer.set_level(TRACE_OFF)
+            else:
+                self.write_error(f"set: {option}: invalid option")
+
+    def trace_command(self, argv):
+        """trace [off|summary|line|expr] [-o 文件]：设置解释器跟踪级别和输出位置"""
+        parts = argv[1:]
+        if not parts:
+            self.write(f"trace: level={self.tracer.level_name}, output={self.tracer.path or 'stderr'}")
+            return
+
+        i = 0
+        while i < len(parts):
+            part = parts[i]
+            if part == '-o':
+                if i + 1 >= len(parts):
+                    self.write_error("trace: missing file after -o")
+                    return
+                path = parts[i + 1]
+                try:
+                    self.tracer.set_file(path if path == '-' else os.path.join(self.current_dir, path))
+                except OSError as e:
+                    self.write_error(f"trace: {path}: {str(e)}")
+                    return
+                i += 1
+            elif part in TRACE_LEVELS:
+                self.tracer.set_level(part)
+            else:
+                self.write_error(f"trace: invalid level '{part}' (off/summary/line/expr)")
+                return
+            i += 1
+
+    def memo_command(self, argv):
+        """memo [clear [函数名]]：查看或清空 @memo 函数的缓存"""
+        parts = argv[1:]
+        if parts and parts[0] == 'clear':
+            if len(parts) > 2:
+                self.write_error("memo: usage: memo clear [function]")
+            elif not self.memo.clear(parts[1] if len(parts) == 2 else None):
+                self.write_error(f"memo: {parts[1]}: no memoized function")
+            return
+        if parts:
+            self.write_error(f"memo: invalid argument '{parts[0]}' (usage: memo [clear [function]])")
+            return
+
+        caches = self.memo.caches()
+        if not caches:
+            self.write("memo: no memoized functions")
+            return
+        self.write(f"{'function':<20} {'size':>11} {'hits':>9} {'misses':>9} {'hit rate':>9} {'evicted':>9}")
+        for cache in caches:
+            size = f"{len(cache)}/{cache.maxsize}"
+            self.write(f"{cache.name:<20} {size:>11} {cache.hits:>9} {cache.misses:>9} "
+                       f"{cache.hit_rate:>9.1%} {cache.evictions:>9}")
+
+    def vim_command(self, argv):
+        self.write_error("vim: not available without a terminal window")
+
+    def exit_command(self, argv):
+        """exit [状态码]：记录退出状态；图形界面中关闭窗口"""
+        parts = argv[1:]
+        try:
+            self.exit_status = int(parts[0]) if parts else 0
+        except ValueError:
+            self.write_error(f"exit: {parts[0]}: numeric argument required")
+            self.exit_status = 2
+
+    def show_help(self, argv):
+        help_text = """
+        PyTerminal v0.9 帮助信息
+
+        以下是支持的命令列表：
+        - clear: 清空终端屏幕
+        - ls: 列出当前目录下的文件和文件夹
+        - cd [目录名]: 切换当前工作目录
+        - pwd: 显示当前工作目录的路径
+        - touch [文件名]: 创建一个新的空文件
+        - mkdir [目录名]: 创建一个新的目录
+        - rm [文件名/目录名]: 删除文件或目录
+        - cat [文件名]: 显示文件内容
+        - less [文件名]: 分页浏览文件（大文件也可立即打开），空格/b 翻页，j/k 滚动，g/G 到开头/末尾，
+          N g 跳到第 N 行，/模式 与 ?模式 向后/向前搜索，n/N 重复搜索，q 退出
+        - cp [源文件/目录] [目标文件/目录]: 复制文件或目录
+        - mv [源文件/目录] [目标文件/目录]: 移动或重命名文件或目录
+        - echo [文本]: 在终端输出文本
+        - export [变量名]=[值]: 设置环境变量
+        - head -n [行数] [文件名]: 显示文件的前几行
+        - tail -n [行数] [文件名]: 显示文件的后几行
+        - grep [-i] [-v] [模式] [文件名]: 在文件中搜索匹配的文本
+        - sort [文件名]: 对文件内容进行排序
+        - uniq [文件名]: 去除文件中的重复行
+        - 重定向: `命令 > 文件` 覆盖写入，`>>` 追加，`2>` 重定向错误输出，`2>&1` 错误与输出写到同一处
+        - 管道: 如 `cat big.log | grep ERROR | sort | uniq | head -n 20` ，cat/less/grep/sort/uniq/head/tail 省略文件名时读取上一段的输出
+        - asciishow [图片路径]: 显示 ASCII 艺术图片
+        - vim [文件名]: 打开 Vim 编辑器编辑文件
+            - 正常模式: 进入 Vim 默认处于此模式，可进行光标移动、进入其他模式等操作。常用命令有：
+                - i: 进入插入模式
+                - : 进入命令模式
+                - h/j/k/l: 分别向左/下/上/右移动光标
+                - G: 移到文件末尾
+                - gg: 移到文件开头
+            - 插入模式: 用于输入和编辑文本。可使用方向键移动光标，按 Enter 插入新行，按 Backspace 删除字符。
+            - 命令模式: 用于执行保存、退出等操作。常用命令有：
+                - w: 保存文件
+                - q: 退出编辑器（若文件有修改需先保存）
+                - q!: 强制退出编辑器
+                - wq 或 x: 保存并退出编辑器
+        - help: 显示帮助信息
+        - exit: 关闭终端
+        - curl [URL]: 发送 HTTP 请求并显示响应
+        - set -x / set +x: 开启/关闭脚本逐行跟踪（脚本内同样可用）
+        - trace [off|summary|line|expr] [-o 文件]: 设置脚本跟踪级别，-o 将跟踪写入文件（- 表示 stderr）
+        - 命令 &: 在后台执行命令、脚本或 python 脚本（最多同时运行 4 个，其余排队），输出带 [n] 前缀
+        - parallel [-j N] [-k] 命令 ::: 参数...: 对每个参数并发执行一次命令（{} 表示参数位置），-k 按参数顺序输出，结束后汇总失败的命令
+        - 命令 | xargs [-P N] [-n N] [-I {}] [-k] 命令: 把上游输出作为参数执行命令，-P 指定并发数
+        - jobs: 列出后台任务的状态和运行时间；wait [%n ...]: 等待后台任务结束；kill %n: 终止后台任务
+        - memo [clear [函数名]]: 查看 @memo 函数的缓存大小与命中率，或清空缓存
+        - run [脚本路径]: 运行指定的 shell 脚本（在后台线程执行，窗口标题显示运行状态，Ctrl+C 取消）
+            - run --profile [-o 文件] 脚本: 统计每行、每个函数的执行次数与耗时并按自身耗时排序显示，-o 写出 flamegraph 用的 collapsed 栈文件
+            - 脚本需以 .sh 结尾。脚本支持以下常见语法：
+                - 变量赋值: 如 a=5 ，可通过 $a 引用变量。
+                - 算术运算: `$((表达式))` 或 `((i++))` ，支持 + - * / % ** << >> & | ^ 、比较运算及 ++/-- 、+= 等赋值运算。
+                - 函数定义: 使用 `def 函数名(参数列表) { 函数体 }` 定义函数，在函数内部可使用 `local` 定义局部变量，`return` 返回值。
+                - 函数缓存: `@memo def 函数名(...) { ... }`（或 `@memo(容量)`）按参数缓存返回值（LRU，默认 1024 项），只适用于没有副作用的函数。
+                - 下标数组: `arr=(a b c)` 赋值，`arr[i]=值` 写元素（i 可为算术表达式，可以跳过下标，与 bash 一样是稀疏数组），`arr+=(d e)` 追加；
+                  `${arr[i]}` 取元素，`${arr[@]}` 全部元素，`${#arr[@]}` 元素个数，`${!arr[@]}` 已赋值的下标，`for x in ${arr[@]}` 遍历。
+                - declare: `declare -a 名称[=(...)]` 声明下标数组，`declare -A 名称[=([键]=值 ...)]` 声明关联数组，之后用 `m[键]=值`、`${m[键]}` 读写，
+                  `${!m[@]}` 列出键；函数内用 `local -a`/`local -A` 声明局部数组。算术中可直接使用 `arr[i]`，如 `((count[$k]++))`。
+                - 条件语句: 如 `if [ 条件 ]; ... else ... fi` ，根据条件执行不同代码块。
+                - 循环语句: 如 `while [ 条件 ]; ... done` ，当条件为真时循环执行代码块。
+                - for 循环: `for i in 1..10; ... done` 计数，`for x in $list; ... done` 遍历列表，`for f in *.log; ... done` 遍历匹配的文件。
+                - 条件写法: 数值比较 -eq/-ne/-gt/-ge/-lt/-le，字符串 = != -z -n，文件 -f -d -e，可用 ! -a -o 以及 `[ ... ] && [ ... ]`、`||` 组合。
+            - 参考example.sh。
+        - python/python3 [脚本路径]: 运行 Python 脚本
+        """
+        self.write(help_text)
+        plugins = [command for command in self.commands.commands()
+                   if command.name not in self.BUILTIN_COMMANDS]
+        if plugins:
+            self.write("        扩展命令：")
+            for command in plugins:
+                self.write(f"        - {command.name}: {command.summary}")
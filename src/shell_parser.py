@@ -1,483 +1,860 @@
+import fnmatch
+import os
 import re
-import shlex
+import threading
+import time
 
+from src.arithmetic import ArithmeticEvalError, ArithmeticEvaluator
+from src.arrays import ArraySubscriptError, AssocArray, IndexedArray
+from src.condition import ConditionEvaluator
+from src.memo import MEMO_MISS
+from src.script_compiler import (
+    LOOP_EXPAND, LOOP_GLOB, LOOP_RANGE, LOOP_SPLICE, OP_ARITH, OP_ARRAY, OP_ASSIGN, OP_ASSIGN_CALL,
+    OP_CALL, OP_COMMAND, OP_DECLARE, OP_DEF, OP_DONE, OP_ELEMENT, OP_ELIF, OP_ELSE, OP_FI, OP_FOR,
+    OP_IF, OP_LOCAL, OP_RETURN, OP_RETURN_CALL, OP_WHILE, ScriptCompiler, script_cache
+)
+from src.tracer import TRACE_EXPR, TRACE_LINE, TRACE_SUMMARY
 
-class ShellParser:
-    def __init__(self, terminal):
-        self.terminal = terminal
-        self.variables = {}
-        self.loop_stack = []
-        self.if_stack = []
-        self.in_function = False
-        self.functions = {}
-        self.command_sub_re = re.compile(r'\$\(((?:[^()]|\([^()]*\))*)\)|\$\{(\w+)\}|\$(\w+)')
-        self.arithmetic_re = re.compile(r'\$\(\((.*?)\)\)')
-        print("ShellParser 初始化完成")
+# 指令处理函数返回该值表示结束当前指令列表的执行（return 语句）
+_STOP = -1
+# 指令处理函数已压入新的调用帧，指令循环切换到被调函数的函数体
+_CALL = -2
 
-    def parse(self, script_content, context_dir):
-        """解析并执行Shell脚本内容"""
-        self.context_dir = context_dir
-        lines = script_content.split('\n')
-        line_num = 0
+# 函数返回值的去向：赋给变量、保存到 $函数名、作为调用方自身的返回值
+_RESULT_ASSIGN = 0
+_RESULT_CALL = 1
+_RESULT_RETURN = 2
 
-        # 标记脚本执行状态，避免内部命令进入历史记录
-        self.terminal.is_script_execution = True
-        print(f"开始解析脚本，上下文目录: {context_dir}")
+# 默认的函数最大嵌套深度，脚本中可用 FUNCNEST=N 修改
+MAX_CALL_DEPTH = 10000
 
-        try:
-            while line_num < len(lines):
-                line = lines[line_num].rstrip('\n')  # 保留行首空格，移除行尾换行符
-                stripped_line = line.strip()
-                line_num += 1
-                print(f"正在处理第 {line_num - 1} 行: {line}")
-
-                # 空行或注释
-                if not stripped_line or stripped_line.startswith('#'):
-                    print("跳过空行或注释")
-                    continue
-
-                # 函数定义（使用def关键字）
-                func_def_match = re.match(r'^def (\w+)\(\s*([\w,\s]*)\s*\)\s*\{', stripped_line)
-                if func_def_match:
-                    func_name = func_def_match.group(1)
-                    params = [p.strip() for p in func_def_match.group(2).split(',') if p.strip()]
-                    self.in_function = True
-                    self.functions[func_name] = {
-                        'params': params,
-                        'lines': []
-                    }
-                    print(f"进入函数定义: {func_name}，参数: {params}")
-                    continue
-
-                if stripped_line.startswith('}') and self.in_function:
-                    self.in_function = False
-                    print("函数定义结束")
-                    continue
-
-                if self.in_function:
-                    func_name = list(self.functions.keys())[-1]
-                    self.functions[func_name]['lines'].append(line)
-                    continue
-
-                # local 语句处理（保持原有逻辑不变）
-                if stripped_line.startswith('local '):
-                    if not self.in_function:
-                        print("local 语句只能在函数内部使用")
-                        continue
-                    parts = stripped_line[6:].strip().split('=', 1)
-                    if len(parts) == 2:
-                        var_name = parts[0].strip()
-                        var_value = parts[1].strip()
-                        var_value = self._substitute_arithmetic(var_value)
-                        var_value = self._substitute_variables(var_value)
-                        func_name = list(self.functions.keys())[-1]
-                        if 'local_vars' not in self.functions[func_name]:
-                            self.functions[func_name]['local_vars'] = {}
-                        self.functions[func_name]['local_vars'][var_name] = var_value
-                        print(f"函数 {func_name} 内局部变量 {var_name} 赋值为: {var_value}")
-                    continue
-
-                # return 语句处理（保持原有逻辑不变）
-                if stripped_line.startswith('return '):
-                    if not self.in_function:
-                        print("return 语句只能在函数内部使用")
-                        continue
-                    return_value = stripped_line[7:].strip()
-                    return_value = self._substitute_arithmetic(return_value)
-                    return_value = self._substitute_variables(return_value)
-                    func_name = list(self.functions.keys())[-1]
-                    self.functions[func_name]['return_value'] = return_value
-                    self.in_function = False
-                    print(f"函数 {func_name} 返回值: {return_value}")
-                    return return_value
-
-                # 变量赋值（增加函数调用处理）
-                var_match = re.match(r'^(\w+)\s*=\s*(.*)$', stripped_line)
-                if var_match:
-                    var_name = var_match.group(1)
-                    var_value = var_match.group(2).strip()
-                    print(f"检测到变量赋值: {var_name} = {var_value}")
-
-                    # 检测函数调用
-                    func_call_match = re.match(r'\$\((\w+)\(\s*([\w,\s]*)\s*\)\)', var_value)
-                    if func_call_match:
-                        func_name = func_call_match.group(1)
-                        args = [p.strip() for p in func_call_match.group(2).split(',') if p.strip()]
-                        if func_name in self.functions:
-                            func_info = self.functions[func_name]
-                            if len(args) != len(func_info['params']):
-                                print(f"函数 {func_name} 参数数量不匹配")
-                                var_value = ""
-                            else:
-                                # 创建新的执行上下文
-                                exec_context = {
-                                    'variables': self.variables.copy(),  # 继承全局变量
-                                    'local_vars': {},  # 局部变量
-                                    'return_value': None  # 返回值
-                                }
-
-                                # 绑定参数到局部变量
-                                for param, arg in zip(func_info['params'], args):
-                                    # 处理参数值中的变量和算术扩展
-                                    processed_arg = self._substitute_arithmetic(arg)
-                                    processed_arg = self._substitute_variables(processed_arg)
-
-                                    exec_context['local_vars'][param] = processed_arg
-                                    print(f"绑定参数 {param} = {processed_arg}")
-
-                                # 执行函数体
-                                return_value = self._execute_function(func_info, exec_context)
-
-                                if return_value is not None:
-                                    var_value = return_value
-                                    print(f"函数 {func_name} 返回值: {return_value}")
-                        else:
-                            print(f"未定义的函数: {func_name}")
-                            var_value = ""
-                    else:
-                        # 处理算术扩展
-                        var_value = self._substitute_arithmetic(var_value)
-
-                        # 处理引号
-                        if var_value.startswith(('"', "'")):
-                            quote_char = var_value[0]
-                            var_value = var_value[1:]  # 移除开头的引号
-                            print(f"处理带引号的值，引号字符: {quote_char}")
-
-                            # 查找匹配的引号（支持转义）
-                            end_quote_pos = -1
-                            escaped = False
-                            for i, c in enumerate(var_value):
-                                if c == '\\' and not escaped:
-                                    escaped = True
-                                    continue
-                                if c == quote_char and not escaped:
-                                    end_quote_pos = i
-                                    break
-                                escaped = False
-
-                            if end_quote_pos != -1:
-                                value_content = var_value[:end_quote_pos]
-                                # 处理转义字符
-                                value_content = value_content.replace('\\n', '\n')
-                                value_content = value_content.replace('\\t', '\t')
-                                value_content = value_content.replace('\\\\', '\\')
-                                value_content = value_content.replace(f'\\{quote_char}', quote_char)
-
-                                # 双引号内进行变量替换
-                                if quote_char == '"':
-                                    value_content = self._substitute_variables(value_content)
-
-                                var_value = value_content
-                            else:
-                                # 未找到匹配的引号 - 错误处理
-                                var_value = var_value.rstrip(quote_char)
-                        else:
-                            # 无引号的普通字符串
-                            var_value = self._substitute_variables(var_value)
-
-                    self.variables[var_name] = var_value
-                    print(f"变量 {var_name} 赋值为: {var_value}")
-                    continue
-
-                # 分支结构（保持原有逻辑不变）
-                if stripped_line.startswith('if '):
-                    condition = stripped_line[3:].strip()
-                    should_execute = self._evaluate_condition(condition)
-                    self.if_stack.append({
-                        'condition': condition,
-                        'executed': should_execute,
-                        'else_pos': None
-                    })
-                    if should_execute:
-                        print(f"if 条件 {condition} 为真，执行分支")
-                    else:
-                        while line_num < len(lines):
-                            next_line = lines[line_num].strip()
-                            if next_line.startswith(('elif ', 'else', 'fi')):
-                                break
-                            line_num += 1
-                        print(f"if 条件 {condition} 为假，跳过分支")
-                    continue
-
-                if stripped_line.startswith('elif '):
-                    if not self.if_stack:
-                        print("无效的 elif 语句，跳过")
-                        continue
+# for 循环取值耗尽的标记
+_LOOP_END = object()
 
-                    if self.if_stack[-1]['executed']:
-                        # 跳过已执行分支
-                        while line_num < len(lines) and not lines[line_num].strip().startswith('fi'):
-                            line_num += 1
-                        print("跳过已执行的 elif 分支")
-                        continue
 
-                    condition = stripped_line[5:].strip()
-                    should_execute = self._evaluate_condition(condition)
-
-                    if should_execute:
-                        self.if_stack[-1]['executed'] = True
-                        print(f"elif 条件 {condition} 为真，执行分支")
-                    else:
-                        # 跳过此分支
-                        while line_num < len(lines):
-                            next_line = lines[line_num].strip()
-                            if next_line.startswith('fi'):
-                                break
-                            line_num += 1
-                        print(f"elif 条件 {condition} 为假，跳过分支")
-                    continue
-
-                if stripped_line.startswith('else'):
-                    if not self.if_stack:
-                        print("无效的 else 语句，跳过")
-                        continue
+class ScriptCancelled(Exception):
+    """脚本被用户取消（Ctrl+C）"""
 
-                    if self.if_stack[-1]['executed']:
-                        # 跳过else块
-                        while line_num < len(lines):
-                            next_line = lines[line_num].strip()
-                            if next_line.startswith('fi'):
-                                break
-                            line_num += 1
-                        print("跳过已执行的 else 块")
-                        continue
 
-                    self.if_stack[-1]['executed'] = True
-                    print("进入 else 块")
-                    continue
+class ScriptStackOverflow(Exception):
+    """函数嵌套深度超过上限"""
 
-                if stripped_line.startswith('fi'):
-                    if not self.if_stack:
-                        print("无效的 fi 语句，跳过")
-                        continue
-                    self.if_stack.pop()
-                    print("结束 if 语句块")
-                    continue
-
-                # 循环结构（保持原有逻辑不变）
-                if stripped_line.startswith('while '):
-                    condition = stripped_line[6:].strip()
-                    loop_start = line_num - 1
-                    self.loop_stack.append({
-                        'condition': condition,
-                        'start_line': loop_start
-                    })
-                    should_execute = self._evaluate_condition(condition)
-                    if not should_execute:
-                        # 跳过循环体
-                        while line_num < len(lines) and not lines[line_num].strip().startswith('done'):
-                            line_num += 1
-                        self.loop_stack.pop()
-                        print(f"while 条件 {condition} 为假，跳过循环体")
-                    continue
-
-                if stripped_line.startswith('done'):
-                    if not self.loop_stack:
-                        print("无效的 done 语句，跳过")
-                        continue
-                    loop_info = self.loop_stack[-1]
-                    condition = loop_info['condition']
-                    start_line = loop_info['start_line']
-                    should_execute = self._evaluate_condition(condition)
-                    if should_execute:
-                        line_num = start_line + 1  # 回到循环开始处
-                        print(f"while 条件 {condition} 为真，继续循环")
-                    else:
-                        self.loop_stack.pop()
-                        print(f"while 条件 {condition} 为假，结束循环")
-                    continue
-
-                # 函数调用（修改为使用独立上下文执行函数体）
-                func_call_match = re.match(r'^(\w+)\(\s*([\w,\s]*)\s*\)$', stripped_line)
-                if func_call_match:
-                    func_name = func_call_match.group(1)
-                    args = [p.strip() for p in func_call_match.group(2).split(',') if p.strip()]
-                    if func_name in self.functions:
-                        func_info = self.functions[func_name]
-                        if len(args) != len(func_info['params']):
-                            print(f"函数 {func_name} 参数数量不匹配")
-                            continue
-
-                        # 创建新的执行上下文
-                        exec_context = {
-                            'variables': self.variables.copy(),  # 继承全局变量
-                            'local_vars': {},  # 局部变量
-                            'return_value': None  # 返回值
-                        }
-
-                        # 绑定参数到局部变量
-                        for param, arg in zip(func_info['params'], args):
-                            # 处理参数值中的变量和算术扩展
-                            processed_arg = self._substitute_arithmetic(arg)
-                            processed_arg = self._substitute_variables(processed_arg)
-
-                            exec_context['local_vars'][param] = processed_arg
-                            print(f"绑定参数 {param} = {processed_arg}")
-
-                        # 执行函数体
-                        return_value = self._execute_function(func_info, exec_context)
-
-                        if return_value is not None:
-                            self.variables[f'${func_name}'] = return_value
-                            print(f"函数 {func_name} 返回值: {return_value}")
-                    else:
-                        print(f"未定义的函数: {func_name}")
-                    continue
-
-                # 命令执行（保持原有逻辑不变）
-                processed_line = self._substitute_variables(line)
-                processed_line = self._substitute_commands(processed_line)
-                self.terminal.current_cmd = processed_line
-                print(f"执行命令: {processed_line}")
-                self.terminal.execute_command_internal()
-                self.terminal.current_cmd = ""
 
-        finally:
-            # 恢复脚本执行状态
-            self.terminal.is_script_execution = False
-            print("脚本解析执行完成")
-
-    def _execute_function(self, func_info, context):
-        """在独立上下文中执行函数体"""
-        # 创建新的解析器实例
-        nested_parser = ShellParser(self.terminal)
-        # 设置变量为全局变量和局部变量的组合
-        nested_parser.variables = {**context['variables'], **context['local_vars']}
+class CallFrame:
+    """函数调用帧，保存在解释器自己的调用栈（ShellParser.frames）上
 
-        for line in func_info['lines']:
-            stripped_line = line.strip()
-            print(f"执行函数内语句: {stripped_line}")
+    locals 只保存本次调用的参数和局部变量，读取时回退到全局变量；
+    loops 为调用方正在执行的 for 循环，resume 为返回后继续执行调用方的
+    (指令列表, 位置, 接收返回值的变量, 返回值去向)，嵌套调用时为 None。
+    """
+    __slots__ = ('name', 'locals', 'body', 'loops', 'resume', 'memo_key', 'started', 'call_line')
 
-            # 处理local语句（保持原有逻辑不变）
-            if stripped_line.startswith('local '):
-                parts = stripped_line[6:].strip().split('=', 1)
-                if len(parts) == 2:
-                    var_name = parts[0].strip()
-                    var_value = parts[1].strip()
+    def __init__(self, name, local_vars, body, loops):
+        self.name = name
+        self.locals = local_vars
+        self.body = body
+        self.loops = loops
+        self.resume = None
+        self.memo_key = None
+        self.started = None
+        self.call_line = None
 
-                    # 处理算术扩展和变量替换
-                    var_value = nested_parser._substitute_arithmetic(var_value)
-                    var_value = nested_parser._substitute_variables(var_value)
 
-                    # 存储到局部变量
-                    context['local_vars'][var_name] = var_value
-                    nested_parser.variables[var_name] = var_value  # 更新当前解析器的变量
-                    print(f"局部变量 {var_name} 赋值为: {var_value}")
-                continue
+class ShellParser:
+    def __init__(self, terminal, cancel_event=None):
+        self.terminal = terminal
+        self.cancel_event = cancel_event or threading.Event()
+        self.tracer = terminal.tracer
+        self.variables = {}
+        self.functions = {}
+        self.frames = []
+        self.frame = None
+        self.command_sub_re = re.compile(
+            r'\$\(((?:[^()]|\([^()]*\))*)\)|\$\{([#!]?)(\w+)\[([^\]]*)\]\}|\$\{(\w+)\}|\$(\w+)')
+        self.arithmetic = ArithmeticEvaluator(self._get_variable, self._set_variable,
+                                              self._get_element, self._set_element)
+        self.conditions = ConditionEvaluator(self._get_variable, self._expand_operand,
+                                             lambda: self.terminal.current_dir)
+        self.return_value = None
+        self.context_dir = None
+        self.expansion_failed = False
+        # 正在执行的 for 循环：指令下标 -> 剩余取值的迭代器，每次 _run 各自独立
+        self._loops = {}
+        # run --profile 时设置为 ScriptProfiler
+        self.profiler = None
+        self._handlers = {
+            OP_DEF: self._exec_def,
+            OP_LOCAL: self._exec_local,
+            OP_RETURN: self._exec_return,
+            OP_RETURN_CALL: self._exec_return_call,
+            OP_ASSIGN: self._exec_assign,
+            OP_ASSIGN_CALL: self._exec_assign_call,
+            OP_CALL: self._exec_call,
+            OP_IF: self._exec_if,
+            OP_ELIF: self._exec_elif,
+            OP_ELSE: self._exec_else,
+            OP_FI: self._exec_fi,
+            OP_WHILE: self._exec_while,
+            OP_FOR: self._exec_for,
+            OP_DONE: self._exec_done,
+            OP_ARITH: self._exec_arith,
+            OP_ARRAY: self._exec_array,
+            OP_ELEMENT: self._exec_element,
+            OP_DECLARE: self._exec_declare,
+            OP_COMMAND: self._exec_command,
+        }
 
-            # 处理return语句（保持原有逻辑不变）
-            if stripped_line.startswith('return '):
-                return_value = stripped_line[7:].strip()
+    def parse(self, script_content, context_dir):
+        """解析并执行Shell脚本内容（相同内容只编译一次）"""
+        return self.execute(script_cache.compile_source(script_content), context_dir)
 
-                # 处理算术扩展和变量替换
-                return_value = nested_parser._substitute_arithmetic(return_value)
-                return_value = nested_parser._substitute_variables(return_value)
+    def run_file(self, script_path, context_dir):
+        """执行脚本文件，编译结果按路径和 mtime 缓存"""
+        return self.execute(script_cache.load(script_path), context_dir)
 
-                print(f"函数返回: {return_value}")
-                return return_value  # 直接返回，终止函数执行
+    def execute(self, program, context_dir):
+        """执行编译好的指令列表"""
+        self.context_dir = context_dir
+        self._loops = {}
 
-            # 执行其他类型的语句
-            nested_parser.parse(line, self.context_dir)
+        # 标记脚本执行状态，避免内部命令进入历史记录
+        self.terminal.is_script_execution = True
+        tracer = self.tracer
+        started = None
+        if tracer.level >= TRACE_SUMMARY:
+            started = time.perf_counter()
+            tracer.emit(f"开始执行脚本 {program.source_name}，上下文目录: {context_dir}")
 
-        return context.get('return_value')
+        try:
+            return self._run(program)
+        finally:
+            # 恢复脚本执行状态
+            self.terminal.is_script_execution = False
+            if self.profiler is not None:
+                self.profiler.finish()
+            if started is not None:
+                elapsed = (time.perf_counter() - started) * 1000
+                tracer.emit(f"脚本 {program.source_name} 执行完成，耗时 {elapsed:.2f} ms")
+
+    def _run(self, program):
+        """指令循环：每个处理函数返回下一条指令的位置
+
+        函数调用不占用 Python 栈：处理函数压入 CallFrame 后返回 _CALL，循环切换到
+        被调函数的函数体；函数结束后按帧中保存的位置继续执行调用方。
+        program 执行结束（或其中的 return）时返回其返回值。
+        """
+        if self.profiler is not None:
+            return self._run_profiled(program)
+        handlers = self._handlers
+        tracer = self.tracer
+        base = len(self.frames)
+        instructions = program.instructions
+        count = len(instructions)
+        pc = 0
+        try:
+            while True:
+                if pc < count:
+                    ins = instructions[pc]
+                    if tracer.level >= TRACE_LINE:
+                        tracer.emit(f"+ {ins.line_no + 1}: {ins.text.strip()}")
+                    pc = handlers[ins.op](ins, pc + 1, instructions)
+                    if pc >= 0:
+                        continue
+                    if pc == _CALL:
+                        instructions = self.frame.body.instructions
+                        count = len(instructions)
+                        pc = 0
+                        continue
+                    value = self.return_value
+                else:
+                    value = None
+                # 当前函数体结束：回到调用方；return $(f(...)) 的调用方随之一起返回
+                while True:
+                    if len(self.frames) == base:
+                        return value
+                    frame, instructions, pc = self._return_from_call(value)
+                    if frame.resume[3] != _RESULT_RETURN:
+                        break
+                count = len(instructions)
+        except BaseException:
+            self._unwind(base)
+            raise
+
+    def _run_profiled(self, program):
+        """与 _run 相同的指令循环，额外记录每条指令的耗时
+
+        调用函数的那一行在函数返回后才结束计时，因此行耗时包含被调函数。
+        """
+        handlers = self._handlers
+        tracer = self.tracer
+        profiler = self.profiler
+        clock = time.perf_counter
+        base = len(self.frames)
+        instructions = program.instructions
+        count = len(instructions)
+        pc = 0
+        try:
+            while True:
+                if pc < count:
+                    ins = instructions[pc]
+                    if tracer.level >= TRACE_LINE:
+                        tracer.emit(f"+ {ins.line_no + 1}: {ins.text.strip()}")
+                    profiler.begin_line(ins)
+                    started = clock()
+                    try:
+                        pc = handlers[ins.op](ins, pc + 1, instructions)
+                    except BaseException:
+                        profiler.end_line(ins, clock() - started)
+                        raise
+                    if pc == _CALL:
+                        self.frame.call_line = (ins, started)
+                        instructions = self.frame.body.instructions
+                        count = len(instructions)
+                        pc = 0
+                        continue
+                    profiler.end_line(ins, clock() - started)
+                    if pc >= 0:
+                        continue
+                    value = self.return_value
+                else:
+                    value = None
+                while True:
+                    if len(self.frames) == base:
+                        return value
+                    frame, instructions, pc = self._return_from_call(value)
+                    call_ins, started = frame.call_line
+                    profiler.end_line(call_ins, clock() - started)
+                    if frame.resume[3] != _RESULT_RETURN:
+                        break
+                count = len(instructions)
+        except BaseException:
+            self._unwind(base)
+            raise
+
+    def _exec_def(self, ins, pc, instructions):
+        func_name, params, body, memo_size = ins.args
+        self.functions[func_name] = {
+            'params': params,
+            'body': body,
+            # @memo 函数：返回值按参数缓存在终端的 MemoRegistry 中
+            'memo': self.terminal.memo.cache_for(func_name, body, memo_size) if memo_size else None
+        }
+        if self.tracer.level >= TRACE_SUMMARY:
+            memo_note = f"，缓存容量: {memo_size}" if memo_size else ""
+            self.tracer.emit(f"定义函数: {func_name}，参数: {params}{memo_note}")
+        return pc
+
+    def _exec_local(self, ins, pc, instructions):
+        if self.frame is None:
+            self.tracer.warn("local 语句只能在函数内部使用")
+            return pc
+        if ins.args is None:
+            return pc
+        var_name, var_value, has_dollar = ins.args
+        if has_dollar:
+            self.expansion_failed = False
+            var_value = self._substitute_arithmetic(var_value)
+            if self.expansion_failed:
+                return pc
+            var_value = self._substitute_variables(var_value)
+        self.frame.locals[var_name] = var_value
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"局部变量 {var_name} 赋值为: {var_value}")
+        return pc
+
+    def _exec_return(self, ins, pc, instructions):
+        if self.frame is None:
+            self.tracer.warn("return 语句只能在函数内部使用")
+            return pc
+        return_value, has_dollar = ins.args
+        if has_dollar:
+            return_value = self._substitute_arithmetic(return_value)
+            return_value = self._substitute_variables(return_value)
+        self.return_value = return_value
+        return _STOP
+
+    def _exec_assign(self, ins, pc, instructions):
+        var_name, var_value, has_arithmetic, expand_vars = ins.args
+        if has_arithmetic:
+            self.expansion_failed = False
+            var_value = self._substitute_arithmetic(var_value)
+            if self.expansion_failed:
+                # 与 bash 一致，算术扩展出错时不赋值，变量保持原值
+                return pc
+        if expand_vars:
+            var_value = self._substitute_variables(var_value)
+        self._set_variable(var_name, var_value)
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"变量 {var_name} 赋值为: {var_value}")
+        return pc
+
+    def _exec_assign_call(self, ins, pc, instructions):
+        var_name, func_name, args, is_local = ins.args
+        if is_local and self.frame is None:
+            self.tracer.warn("local 语句只能在函数内部使用")
+            return pc
+        return self._begin_call(func_name, args, instructions, pc, var_name, _RESULT_ASSIGN)
+
+    def _exec_call(self, ins, pc, instructions):
+        func_name, args = ins.args
+        return self._begin_call(func_name, args, instructions, pc, f'${func_name}', _RESULT_CALL)
+
+    def _exec_return_call(self, ins, pc, instructions):
+        if self.frame is None:
+            self.tracer.warn("return 语句只能在函数内部使用")
+            return pc
+        func_name, args, value = ins.args
+        if func_name not in self.functions:
+            # 不是脚本函数：按普通的命令替换处理
+            self.return_value = self._substitute_variables(value)
+            return _STOP
+        return self._begin_call(func_name, args, instructions, pc, None, _RESULT_RETURN)
+
+    def _exec_if(self, ins, pc, instructions):
+        condition = ins.args
+        if self._evaluate_condition(condition):
+            if self.tracer.level >= TRACE_LINE:
+                self.tracer.emit(f"if 条件 {condition} 为真，执行分支")
+            return pc
+        if self.tracer.level >= TRACE_LINE:
+            self.tracer.emit(f"if 条件 {condition} 为假，跳过分支")
+        return self._next_branch(ins.jump, instructions)
+
+    def _next_branch(self, target, instructions):
+        """沿跳转表依次检查 elif 条件，返回应执行的分支起点"""
+        while target < len(instructions):
+            branch = instructions[target]
+            if branch.op != OP_ELIF:
+                # else 或 fi：从其下一条开始执行
+                return target + 1
+            condition = branch.args
+            if self._evaluate_condition(condition):
+                if self.tracer.level >= TRACE_LINE:
+                    self.tracer.emit(f"elif 条件 {condition} 为真，执行分支")
+                return target + 1
+            if self.tracer.level >= TRACE_LINE:
+                self.tracer.emit(f"elif 条件 {condition} 为假，跳过分支")
+            target = branch.jump
+        return target
+
+    def _exec_elif(self, ins, pc, instructions):
+        # 顺序执行到 elif/else 说明前一分支已执行，直接跳到 fi 之后
+        if ins.end is None:
+            self.tracer.warn("无效的 elif 语句，跳过")
+            return pc
+        return ins.end
+
+    def _exec_else(self, ins, pc, instructions):
+        if ins.end is None:
+            self.tracer.warn("无效的 else 语句，跳过")
+            return pc
+        return ins.end
+
+    def _exec_fi(self, ins, pc, instructions):
+        if ins.end is None:
+            self.tracer.warn("无效的 fi 语句，跳过")
+        return pc
+
+    def _exec_while(self, ins, pc, instructions):
+        condition = ins.args
+        if self._evaluate_condition(condition):
+            return pc
+        if self.tracer.level >= TRACE_LINE:
+            self.tracer.emit(f"while 条件 {condition} 为假，结束循环")
+        return ins.jump
+
+    def _exec_for(self, ins, pc, instructions):
+        """首次进入时生成取值迭代器，done 跳回时取下一个值，取完后跳到 done 之后"""
+        var_name, source = ins.args
+        index = pc - 1
+        items = self._loops.get(index)
+        if items is None:
+            items = self._loops[index] = self._loop_items(source)
+        value = next(items, _LOOP_END)
+        if value is _LOOP_END:
+            del self._loops[index]
+            if self.tracer.level >= TRACE_LINE:
+                self.tracer.emit(f"for 循环 {var_name} 取值结束")
+            return ins.jump
+        self._set_variable(var_name, value)
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"for 循环变量 {var_name} = {value}")
+        return pc
+
+    def _loop_items(self, source):
+        """把编译好的取值来源变成字符串迭代器：计数范围、展开后的列表或目录扫描结果"""
+        if source[0] == LOOP_RANGE:
+            start = self._loop_bound(source[1])
+            end = self._loop_bound(source[2])
+            step = 1 if end >= start else -1
+            return map(str, range(start, end + step, step))
+        return self._expand_words(source[1])
+
+    def _expand_words(self, words):
+        """展开编译好的单词列表（for 循环取值、数组字面量）"""
+        for word, kind in words:
+            if kind == LOOP_EXPAND:
+                yield from self._expand_operand(word).split()
+            elif kind == LOOP_SPLICE:
+                # ${arr[@]}：直接取出数组元素，元素中的空白不会被切分
+                container = self._lookup(word)
+                if isinstance(container, str):
+                    yield container
+                elif container is not None:
+                    yield from container.values()
+            elif kind == LOOP_GLOB:
+                yield from _scandir_glob(self.terminal.current_dir, word)
+            else:
+                yield word
+
+    def _loop_bound(self, bound):
+        if isinstance(bound, int):
+            return bound
+        try:
+            return self.arithmetic.evaluate(self._substitute_arithmetic(bound))
+        except ArithmeticEvalError as e:
+            self._arithmetic_failed(bound, e)
+            return 0
+
+    def _exec_done(self, ins, pc, instructions):
+        if ins.jump is None:
+            self.tracer.warn("无效的 done 语句，跳过")
+            return pc
+        if self.cancel_event.is_set():
+            raise ScriptCancelled()
+        # 回到 while 重新判断条件，或回到 for 取下一个值
+        return ins.jump
+
+    def _exec_arith(self, ins, pc, instructions):
+        expr = ins.args
+        try:
+            result = self.arithmetic.evaluate(expr)
+            if self.tracer.level >= TRACE_EXPR:
+                self.tracer.emit(f"算术命令: (( {expr} )) 结果为: {result}")
+        except ArithmeticEvalError as e:
+            self._arithmetic_failed(expr, e)
+        return pc
+
+    def _exec_array(self, ins, pc, instructions):
+        """arr=(...) 建立新数组（已声明为关联数组的保持关联数组），arr+=(...) 在原数组上追加"""
+        name, items, append, is_local = ins.args
+        if is_local and self.frame is None:
+            self.tracer.warn("local 语句只能在函数内部使用")
+            return pc
+        container = self._lookup(name)
+        if append and container is not None and not isinstance(container, str):
+            created = False
+        else:
+            created = True
+            if isinstance(container, AssocArray):
+                container = AssocArray()
+            else:
+                container = IndexedArray([container] if append and container else ())
+        self._fill_array(name, container, items)
+        if created:
+            self._set_variable(name, container)
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"数组 {name} 赋值为: {container!r}")
+        return pc
+
+    def _exec_declare(self, ins, pc, instructions):
+        """declare -a/-A：当前作用域中已是同类数组时保留其内容，否则建立空数组"""
+        name, assoc, items, is_local = ins.args
+        if is_local and self.frame is None:
+            self.tracer.warn("local 语句只能在函数内部使用")
+            return pc
+        kind = AssocArray if assoc else IndexedArray
+        scope = self.frame.locals if self.frame is not None else self.variables
+        container = scope.get(name)
+        if items is not None or not isinstance(container, kind):
+            container = kind()
+            if items is not None:
+                self._fill_array(name, container, items)
+            self._set_variable(name, container)
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"声明数组 {name}: {container!r}")
+        return pc
+
+    def _exec_element(self, ins, pc, instructions):
+        name, subscript, value, has_arithmetic, expand_vars = ins.args
+        if has_arithmetic:
+            self.expansion_failed = False
+            value = self._substitute_arithmetic(value)
+            if self.expansion_failed:
+                return pc
+        if expand_vars:
+            value = self._substitute_variables(value)
+        try:
+            self._set_element(name, subscript, value)
+        except ArithmeticEvalError as e:
+            self.tracer.warn(f"{name}[{subscript}]: {e}")
+            return pc
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"数组元素 {name}[{subscript}] 赋值为: {value}")
+        return pc
+
+    def _exec_command(self, ins, pc, instructions):
+        if self.cancel_event.is_set():
+            raise ScriptCancelled()
+        processed_line, has_dollar = ins.args
+        if has_dollar:
+            self.expansion_failed = False
+            processed_line = self._substitute_arithmetic(processed_line)
+            if self.expansion_failed:
+                # 与 bash 一致，算术扩展出错的命令不执行
+                return pc
+            processed_line = self._substitute_variables(processed_line)
+        self.terminal.current_cmd = processed_line
+        if has_dollar and self.tracer.level >= TRACE_LINE:
+            self.tracer.emit(f"++ {processed_line.strip()}")
+        if self.profiler is not None:
+            started = time.perf_counter()
+            self.terminal.execute_command_internal()
+            self.profiler.add_builtin(time.perf_counter() - started)
+        else:
+            self.terminal.execute_command_internal()
+        self.terminal.current_cmd = ""
+        return pc
+
+    def _begin_call(self, func_name, args, instructions, pc, result_var, mode):
+        """在解释器调用栈上开始一次函数调用，返回指令循环的下一个位置
+
+        缓存命中或调用失败时直接在调用方处理返回值；否则压入调用帧并返回 _CALL。
+        """
+        bound = self._bind_call(func_name, args)
+        if bound is None:
+            return self._store_result(result_var, None, mode, pc)
+        func_info, local_vars = bound
+        memo_key, return_value = self._memo_lookup(func_name, func_info, local_vars)
+        if return_value is not MEMO_MISS:
+            return self._store_result(result_var, return_value, mode, pc)
+
+        frame = self._push_frame(func_name, func_info, local_vars)
+        frame.resume = (instructions, pc, result_var, mode)
+        frame.memo_key = memo_key
+        return _CALL
+
+    def _return_from_call(self, return_value):
+        """被调函数结束：弹出调用帧，把返回值交给调用方，返回 (帧, 调用方指令列表, 继续位置)"""
+        frame = self._pop_frame(return_value)
+        instructions, pc, result_var, mode = frame.resume
+        return frame, instructions, self._store_result(result_var, return_value, mode, pc)
+
+    def _store_result(self, result_var, return_value, mode, pc):
+        if mode == _RESULT_RETURN:
+            self.return_value = return_value if return_value is not None else ""
+            return _STOP
+        if mode == _RESULT_CALL:
+            if return_value is not None:
+                self._set_variable(result_var, return_value)
+            return pc
+        if return_value is None:
+            return_value = ""
+        self._set_variable(result_var, return_value)
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"变量 {result_var} 赋值为: {return_value}")
+        return pc
+
+    def _call_function(self, func_name, args):
+        """命令替换中的函数调用 $(f(x))：在嵌套的指令循环中执行函数体并返回返回值"""
+        bound = self._bind_call(func_name, args)
+        if bound is None:
+            return None
+        func_info, local_vars = bound
+        memo_key, return_value = self._memo_lookup(func_name, func_info, local_vars)
+        if return_value is not MEMO_MISS:
+            return return_value
+
+        frame = self._push_frame(func_name, func_info, local_vars)
+        frame.memo_key = memo_key
+        return_value = None
+        try:
+            return_value = self._run(frame.body)
+        except RecursionError:
+            raise ScriptStackOverflow(
+                f"stack overflow: {func_name}: nested $(...) calls too deep "
+                f"(use x=$({func_name}(...)) or return $({func_name}(...)) for deep recursion)")
+        finally:
+            self._pop_frame(return_value)
+        return return_value
+
+    def _bind_call(self, func_name, args):
+        """查找函数并在调用方作用域中求值参数，返回 (函数信息, 参数绑定)；失败时返回 None"""
+        if self.cancel_event.is_set():
+            raise ScriptCancelled()
+        func_info = self.functions.get(func_name)
+        if func_info is None:
+            self.tracer.warn(f"未定义的函数: {func_name}")
+            return None
+        if len(args) != len(func_info['params']):
+            self.tracer.warn(f"函数 {func_name} 参数数量不匹配")
+            return None
+
+        local_vars = {}
+        for param, arg in zip(func_info['params'], args):
+            if '$' in arg:
+                arg = self._substitute_arithmetic(arg)
+                arg = self._substitute_variables(arg)
+            local_vars[param] = arg
+        return func_info, local_vars
+
+    def _memo_lookup(self, func_name, func_info, local_vars):
+        """@memo 函数按参数查缓存，返回 (缓存键, 返回值或 MEMO_MISS)"""
+        memo = func_info['memo']
+        if memo is None:
+            return None, MEMO_MISS
+        key = tuple(local_vars.values())
+        return_value = memo.get(key)
+        if return_value is not MEMO_MISS and self.tracer.level >= TRACE_SUMMARY:
+            self.tracer.emit(f"函数 {func_name}({', '.join(key)}) 命中缓存，返回值: {return_value}")
+        return key, return_value
+
+    def _push_frame(self, func_name, func_info, local_vars):
+        """压入调用帧；函数内的赋值只写入本帧，for 循环状态随帧保存"""
+        depth = len(self.frames) + 1
+        if depth > self._max_depth():
+            raise ScriptStackOverflow(
+                f"stack overflow: {func_name}: maximum function nesting level exceeded ({depth - 1})")
+        if self.tracer.level >= TRACE_SUMMARY:
+            self.tracer.emit(f"调用函数 {func_name}({', '.join(local_vars.values())})")
+        frame = CallFrame(func_name, local_vars, func_info['body'], self._loops)
+        self.frames.append(self.frame)
+        self.frame = frame
+        self._loops = {}
+        if self.profiler is not None:
+            frame.started = self.profiler.enter_function(func_name)
+        return frame
+
+    def _pop_frame(self, return_value):
+        frame = self.frame
+        self.frame = self.frames.pop()
+        self._loops = frame.loops
+        if frame.started is not None:
+            self.profiler.exit_function(frame.name, frame.started)
+        if frame.memo_key is not None:
+            self.functions[frame.name]['memo'].put(frame.memo_key, return_value)
+        if self.tracer.level >= TRACE_SUMMARY:
+            self.tracer.emit(f"函数 {frame.name} 返回值: {return_value}")
+        return frame
+
+    def _unwind(self, base):
+        """取消或出错时弹出指令循环压入的调用帧，结束其中未完成的分析计时"""
+        while len(self.frames) > base:
+            frame = self.frame
+            self.frame = self.frames.pop()
+            self._loops = frame.loops
+            if frame.started is not None:
+                self.profiler.exit_function(frame.name, frame.started)
+            if frame.call_line is not None:
+                call_ins, started = frame.call_line
+                self.profiler.end_line(call_ins, time.perf_counter() - started)
+
+    def _max_depth(self):
+        """FUNCNEST 变量为正整数时作为最大嵌套深度，否则使用默认值"""
+        limit = self.variables.get('FUNCNEST')
+        if limit:
+            try:
+                limit = int(limit)
+            except (TypeError, ValueError):
+                return MAX_CALL_DEPTH
+            if limit > 0:
+                return limit
+        return MAX_CALL_DEPTH
 
     def _substitute_variables(self, value):
         """处理变量替换（保持原有逻辑不变）"""
         def replace_var(match):
             cmd_sub = match.group(1)
-            var_braced = match.group(2)
-            var_simple = match.group(3)
+            array_name = match.group(3)
+            var_braced = match.group(5)
+            var_simple = match.group(6)
 
             if cmd_sub:
-                # 执行命令
-                self.parse(cmd_sub, self.context_dir)
+                return self._execute_command(cmd_sub)
+            elif array_name:
+                return self._expand_element(match.group(2), array_name, match.group(4))
             elif var_braced:
-                var_value = self.variables.get(var_braced, '')
-                print(f"变量替换: ${var_braced} 替换为: {var_value}")
-                return var_value
+                return self._get_variable(var_braced)
             elif var_simple:
-                var_value = self.variables.get(var_simple, '')
-                print(f"变量替换: ${var_simple} 替换为: {var_value}")
-                return var_value
+                return self._get_variable(var_simple)
             return ''
 
         result = self.command_sub_re.sub(replace_var, value)
-        print(f"变量替换后结果: {result}")
-        return result
-
-    def _substitute_commands(self, value):
-        """替换命令替换 $(command)（保持原有逻辑不变）"""
-        pattern = re.compile(r'\$\((.*?)\)')
-        result = pattern.sub(lambda m: self._execute_command(m.group(1)), value)
-        print(f"命令替换后结果: {result}")
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"变量替换: {value} -> {result}")
         return result
 
     def _execute_command(self, cmd):
-        """执行命令并返回结果（保持原有逻辑不变）"""
-        original_cmd = self.terminal.current_cmd
-        self.terminal.current_cmd = cmd
-        print(f"执行子命令: {cmd}")
-
-        self.terminal.execute_command_internal()
-
-        self.terminal.current_cmd = original_cmd
-        return ""
+        """执行命令替换 $(cmd)，返回命令输出（函数调用则返回其返回值）"""
+        cmd = cmd.strip()
+        call = ScriptCompiler._match_call(ScriptCompiler.call_re, cmd)
+        if call is not None and call[0] in self.functions:
+            return self._call_function(*call)
+
+        cmd = self._substitute_variables(cmd)
+        if self.tracer.level >= TRACE_LINE:
+            self.tracer.emit(f"++ {cmd}")
+
+        output = self.terminal.capture_command_output(cmd)
+        # 条件操作数中的命令替换可能修改文件，同一次求值中已缓存的结果作废
+        self.conditions.invalidate()
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"命令替换: $({cmd}) -> {output!r}")
+        return output
 
     def _evaluate_condition(self, condition):
-        """评估条件表达式（保持原有逻辑不变）"""
-        # 移除多余的分号
-        condition = condition.rstrip(';')
-        condition = self._substitute_variables(condition)
-        tokens = shlex.split(condition)
-        if len(tokens) >= 3 and tokens[0] == '[' and tokens[-1] == ']':
-            inner_condition = " ".join(tokens[1:-1])
-            parts = inner_condition.split()
-            if len(parts) == 3:
-                left = parts[0]
-                op = parts[1]
-                right = parts[2]
-
-                try:
-                    left_num = int(left)
-                    right_num = int(right)
-                    if op == '-gt':
-                        return left_num > right_num
-                    elif op == '-lt':
-                        return left_num < right_num
-                    elif op == '-ge':
-                        return left_num >= right_num
-                    elif op == '-le':
-                        return left_num <= right_num
-                    elif op == '-eq':
-                        return left_num == right_num
-                    elif op == '-ne':
-                        return left_num != right_num
-                except ValueError:
-                    pass
-
-        return False
+        """求值编译好的条件；条件无法解析时给出提示并视为假"""
+        if condition.error is not None:
+            self.tracer.warn(f"条件表达式错误: {condition.text}: {condition.error}")
+            return False
+        return self.conditions.evaluate(condition)
+
+    def _expand_operand(self, text):
+        """条件操作数的完整展开（算术扩展、变量和命令替换）"""
+        return self._substitute_variables(self._substitute_arithmetic(text))
 
     def _substitute_arithmetic(self, value):
-        """处理算术扩展（保持原有逻辑不变）"""
+        """处理算术扩展 $((...))，表达式编译结果按源字符串缓存"""
+        if '$((' not in value:
+            return value
+        result = self.arithmetic.expand(value, self._arithmetic_failed)
+        if self.tracer.level >= TRACE_EXPR:
+            self.tracer.emit(f"算术扩展: {value} -> {result}")
+        return result
 
-        def replace_arithmetic(match):
-            expr = match.group(1)
-            expr = self._substitute_variables(expr)
+    def _arithmetic_failed(self, expr, error):
+        self.expansion_failed = True
+        self.tracer.warn(f"算术扩展失败: $(( {expr} )) {error}")
+
+    def _get_variable(self, name):
+        """先查当前帧的局部变量，再回退到全局变量；数组不带下标时取其第一个元素"""
+        frame = self.frame
+        if frame is not None:
+            value = frame.locals.get(name)
+            if value is not None:
+                return value if value.__class__ is str else value.scalar()
+        value = self.variables.get(name, '')
+        return value if value.__class__ is str else value.scalar()
+
+    def _lookup(self, name):
+        """返回变量的原始值（字符串或数组），未定义时返回 None"""
+        frame = self.frame
+        if frame is not None:
+            value = frame.locals.get(name)
+            if value is not None:
+                return value
+        return self.variables.get(name)
+
+    def _fill_array(self, name, container, items):
+        """把编译好的数组字面量元素写入数组"""
+        keyed, entries = items
+        if not keyed:
+            if isinstance(container, AssocArray):
+                self.tracer.warn(f"{name}: 关联数组的元素必须写成 [键]=值")
+                return
+            container.extend(self._expand_words(entries))
+            return
+        for subscript, value in entries:
+            if '$' in value:
+                value = self._expand_operand(value)
             try:
-                for var, val in self.variables.items():
-                    try:
-                        num_val = int(val)
-                        expr = expr.replace(var, str(num_val))
-                    except ValueError:
-                        pass
-                result = eval(expr)
-                print(f"算术扩展: $(( {expr} )) 结果为: {result}")
-                return str(result)
-            except:
-                print(f"算术扩展失败: $(( {expr} ))")
-                return match.group(0)
-
-        result = self.arithmetic_re.sub(replace_arithmetic, value)
-        print(f"算术扩展后结果: {result}")
-        return result
\ No newline at end of file
+                self._store_element(container, subscript, value)
+            except ArithmeticEvalError as e:
+                self.tracer.warn(f"{name}[{subscript}]: {e}")
+
+    def _get_element(self, name, subscript):
+        """取数组元素 ${name[subscript]}；下标错误时抛出 ArithmeticEvalError"""
+        container = self._lookup(name)
+        if container is None:
+            return ''
+        if subscript == '@' or subscript == '*':
+            return container if isinstance(container, str) else ' '.join(container.values())
+        if isinstance(container, AssocArray):
+            return container.get(self._array_key(subscript))
+        index = self._array_index(subscript)
+        if isinstance(container, str):
+            # 普通变量视为只有一个元素的数组
+            return container if index == 0 else ''
+        return container.get(index)
+
+    def _set_element(self, name, subscript, value):
+        """给数组元素赋值；变量不存在或是普通变量时先转换为下标数组"""
+        container = self._lookup(name)
+        if container is None or isinstance(container, str):
+            array = IndexedArray([container] if container else ())
+            self._store_element(array, subscript, value)
+            self._set_variable(name, array)
+        else:
+            self._store_element(container, subscript, value)
+
+    def _store_element(self, container, subscript, value):
+        if isinstance(container, AssocArray):
+            container[self._array_key(subscript)] = value
+            return
+        try:
+            container.set(self._array_index(subscript), value)
+        except ArraySubscriptError as e:
+            raise ArithmeticEvalError(str(e))
+
+    def _array_index(self, subscript):
+        """下标数组的下标按算术表达式求值"""
+        if subscript.isdigit():
+            return int(subscript)
+        return self.arithmetic.evaluate(self._substitute_arithmetic(subscript))
+
+    def _array_key(self, subscript):
+        """关联数组的键做变量替换，去掉两侧的引号"""
+        key = self._expand_operand(subscript) if '$' in subscript else subscript
+        if len(key) >= 2 and key[0] == key[-1] and key[0] in '"\'':
+            key = key[1:-1]
+        return key
+
+    def _expand_element(self, prefix, name, subscript):
+        """展开 ${a[i]}、${a[@]}、${#a[@]}（元素个数）、${#a[i]}（元素长度）和 ${!a[@]}（全部下标或键）"""
+        whole = subscript == '@' or subscript == '*'
+        container = self._lookup(name)
+        try:
+            if prefix == '#':
+                if not whole:
+                    return str(len(self._get_element(name, subscript)))
+                if container is None:
+                    return '0'
+                return '1' if isinstance(container, str) else str(len(container))
+            if prefix == '!':
+                if container is None:
+                    return ''
+                return '0' if isinstance(container, str) else ' '.join(container.keys())
+            return self._get_element(name, subscript)
+        except ArithmeticEvalError as e:
+            self.tracer.warn(f"{name}[{subscript}]: {e}")
+            return ''
+
+    def _set_variable(self, name, value):
+        frame = self.frame
+        if frame is not None:
+            frame.locals[name] = value
+        else:
+            self.variables[name] = value
+
+
+def _scandir_glob(base_dir, pattern):
+    """用 os.scandir 展开单层通配符（如 *.log、logs/*.txt），结果按名称排序
+
+    与 shell 一致：不匹配以 . 开头的隐藏文件（除非模式本身以 . 开头），
+    没有任何匹配时返回模式本身。
+    """
+    directory, name_pattern = os.path.split(pattern)
+    show_hidden = name_pattern.startswith('.')
+    try:
+        with os.scandir(os.path.join(base_dir, directory)) as entries:
+            names = [entry.name for entry in entries
+                     if (show_hidden or not entry.name.startswith('.'))
+                     and fnmatch.fnmatchcase(entry.name, name_pattern)]
+    except OSError:
+        names = []
+    if not names:
+        return [pattern]
+    names.sort()
+    if directory:
+        return [os.path.join(directory, name) for name in names]
+    return names
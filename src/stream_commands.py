@@ -0,0 +1,281 @@
+import itertools
+import os
+import re
+from collections import deque
+
+
+class CommandError(Exception):
+    """命令无法继续执行，消息直接显示给用户"""
+
+
+class StreamContext:
+    """流式命令的执行环境
+
+    error/notice 用于输出不属于数据流的提示信息；decorate 为 True 表示
+    该阶段的输出直接显示在终端上（可以加行号、高亮等），否则输出原始行供下游使用。
+    """
+
+    def __init__(self, current_dir, error, notice=None, decorate=True):
+        self.current_dir = current_dir
+        self.error = error
+        self.notice = notice or error
+        self.decorate = decorate
+
+    def piped(self):
+        return StreamContext(self.current_dir, self.error, self.notice, decorate=False)
+
+
+def split_pipeline(cmd):
+    """按引号外的 | 切分命令行；不含管道时返回只有一项的列表"""
+    if '|' not in cmd:
+        return [cmd]
+    segments = []
+    quote = None
+    start = 0
+    for i, c in enumerate(cmd):
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in ('"', "'"):
+            quote = c
+        elif c == '|':
+            segments.append(cmd[start:i].strip())
+            start = i + 1
+    segments.append(cmd[start:].strip())
+    return segments
+
+
+def read_lines(path):
+    """逐行读取文件（去掉行尾换行符），只在迭代时占用文件句柄"""
+    with open(path, 'r', encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip('\n')
+
+
+def _resolve_file(ctx, name, filename):
+    """检查文件是否可读，不可读时输出错误并返回 None"""
+    file_path = os.path.join(ctx.current_dir, filename)
+    if not os.path.exists(file_path):
+        ctx.error(f"{name}: {filename}: No such file or directory")
+        return None
+    if os.path.isdir(file_path):
+        ctx.error(f"{name}: {filename}: Is a directory")
+        return None
+    return file_path
+
+
+def _file_or_stdin(ctx, name, filename, stdin):
+    """返回单文件命令（sort/uniq/head/tail）的输入行迭代器"""
+    if filename is None or (filename == '-' and stdin is not None):
+        if stdin is None:
+            raise CommandError(f"{name}: missing file operand")
+        return stdin
+    file_path = _resolve_file(ctx, name, filename)
+    if file_path is None:
+        return None
+    return read_lines(file_path)
+
+
+def _parse_line_count(argv, name, allow_follow=False):
+    """解析 head/tail 的 -n N / -nN 参数，返回 (行数, 是否 -f, 文件名)"""
+    n_lines = 10
+    filename = None
+    follow = False
+    i = 1
+
+    while i < len(argv):
+        part = argv[i]
+        if allow_follow and part == '-f':
+            follow = True
+        elif part.startswith('-n'):
+            if len(part) == 2:
+                if i + 1 >= len(argv):
+                    raise CommandError(f"{name}: missing number of lines after -n")
+                try:
+                    n_lines = int(argv[i + 1])
+                    i += 1
+                except ValueError:
+                    raise CommandError(f"{name}: invalid number of lines: '{argv[i + 1]}'")
+            else:
+                try:
+                    n_lines = int(part[2:])
+                except ValueError:
+                    raise CommandError(f"{name}: invalid number of lines: '{part[2:]}'")
+        else:
+            filename = part
+            break
+
+        i += 1
+
+    return n_lines, follow, filename
+
+
+def cat_stage(argv, stdin, ctx):
+    # less 不在终端窗口中交互时与 cat 相同
+    name = argv[0]
+    files = argv[1:]
+    if not files:
+        if stdin is None:
+            raise CommandError(f"{name}: missing operand")
+        yield from stdin
+        return
+
+    for filename in files:
+        if filename == '-' and stdin is not None:
+            yield from stdin
+            continue
+        file_path = _resolve_file(ctx, name, filename)
+        if file_path is None:
+            continue
+        try:
+            yield from read_lines(file_path)
+        except (OSError, UnicodeDecodeError) as e:
+            ctx.error(f"{name}: {filename}: {str(e)}")
+
+
+def head_stage(argv, stdin, ctx):
+    if len(argv) < 2 and stdin is None:
+        raise CommandError("head: missing operand")
+    n_lines, _, filename = _parse_line_count(argv, 'head')
+    source = _file_or_stdin(ctx, 'head', filename, stdin)
+    if source is None:
+        return
+    # islice 取够行数后即停止，上游阶段不会再被驱动
+    yield from itertools.islice(source, max(n_lines, 0))
+
+
+def tail_stage(argv, stdin, ctx):
+    if len(argv) < 2 and stdin is None:
+        raise CommandError("tail: missing operand")
+    n_lines, follow, filename = _parse_line_count(argv, 'tail', allow_follow=True)
+    source = _file_or_stdin(ctx, 'tail', filename, stdin)
+    if source is None:
+        return
+    # 只保留最后 n 行，内存占用与文件大小无关
+    yield from deque(source, maxlen=max(n_lines, 0))
+    if follow:
+        ctx.notice("(simulated) tail: following file - use Ctrl+C to stop")
+
+
+def grep_stage(argv, stdin, ctx):
+    if len(argv) < 3 and stdin is None:
+        if len(argv) == 2:
+            if os.path.exists(os.path.join(ctx.current_dir, argv[1])):
+                raise CommandError("grep: missing pattern operand")
+            raise CommandError("grep: missing file operand")
+        raise CommandError("grep: missing pattern and file operands")
+
+    options = []
+    i = 1
+    while i < len(argv) and argv[i].startswith('-'):
+        options.extend(argv[i][1:])
+        i += 1
+
+    if i >= len(argv):
+        raise CommandError("grep: missing pattern and file operands")
+
+    pattern = argv[i]
+    files = argv[i + 1:]
+    if not files and stdin is None:
+        raise CommandError("grep: missing file operand")
+
+    flags = re.IGNORECASE if 'i' in options else 0
+    invert = 'v' in options
+    try:
+        regex = re.compile(pattern, flags)
+    except re.error as e:
+        raise CommandError(f"grep: invalid regular expression: {str(e)}")
+
+    if files:
+        sources = []
+        for filename in files:
+            file_path = _resolve_file(ctx, 'grep', filename)
+            if file_path is not None:
+                sources.append((filename, file_path))
+    else:
+        sources = [(None, None)]
+
+    search = regex.search
+    found = False
+    for filename, file_path in sources:
+        lines = stdin if file_path is None else read_lines(file_path)
+        try:
+            if not ctx.decorate:
+                # 管道中输出原始行
+                for line in lines:
+                    if (search(line) is None) == invert:
+                        found = True
+                        yield line
+                continue
+
+            for line_num, line in enumerate(lines, 1):
+                if (search(line) is None) != invert:
+                    continue
+                found = True
+                if len(files) > 1:
+                    yield f"{filename}:"
+                yield f"{line_num}: {_highlight(regex, line) if not invert else line}"
+        except (OSError, UnicodeDecodeError) as e:
+            ctx.error(f"grep: {filename}: {str(e)}")
+
+    if ctx.decorate and not found and len(sources) == max(len(files), 1):
+        yield "(no matches found)"
+
+
+def _highlight(regex, line):
+    """用 [[]] 框住匹配内容"""
+    result = []
+    last_end = 0
+    for match in regex.finditer(line):
+        start, end = match.span()
+        result.append(line[last_end:start])
+        result.append(f"[[{line[start:end]}]]")
+        last_end = end
+    result.append(line[last_end:])
+    return ''.join(result)
+
+
+def sort_stage(argv, stdin, ctx):
+    if len(argv) < 2 and stdin is None:
+        raise CommandError("sort: missing operand")
+    source = _file_or_stdin(ctx, 'sort', argv[1] if len(argv) > 1 else None, stdin)
+    if source is None:
+        return
+    yield from sorted(source)
+
+
+def uniq_stage(argv, stdin, ctx):
+    if len(argv) < 2 and stdin is None:
+        raise CommandError("uniq: missing operand")
+    source = _file_or_stdin(ctx, 'uniq', argv[1] if len(argv) > 1 else None, stdin)
+    if source is None:
+        return
+    prev_line = None
+    for line in source:
+        if line != prev_line:
+            yield line
+            prev_line = line
+
+
+STREAM_COMMANDS = {
+    'cat': cat_stage,
+    'less': cat_stage,
+    'head': head_stage,
+    'tail': tail_stage,
+    'grep': grep_stage,
+    'sort': sort_stage,
+    'uniq': uniq_stage,
+}
+
+
+def build_pipeline(stages, ctx, source=None):
+    """把各阶段串成生成器链，返回最后一个阶段的行迭代器
+
+    只有最后一个阶段的输出直接显示，前面的阶段都以原始行的形式向下游传递。
+    """
+    stream = source
+    last = len(stages) - 1
+    for index, argv in enumerate(stages):
+        stage_ctx = ctx if index == last else ctx.piped()
+        stream = STREAM_COMMANDS[argv[0]](argv, stream, stage_ctx)
+    return stream
@@ -0,0 +1,85 @@
+import sys
+import threading
+
+
+# 跟踪级别：数值越大输出越详细
+TRACE_OFF = 0
+TRACE_SUMMARY = 1   # 脚本开始/结束、函数调用与返回
+TRACE_LINE = 2      # 每条执行的语句（类似 set -x）以及分支/循环判断
+TRACE_EXPR = 3      # 变量替换、赋值、算术扩展的中间结果
+
+TRACE_LEVELS = {
+    'off': TRACE_OFF,
+    'summary': TRACE_SUMMARY,
+    'line': TRACE_LINE,
+    'expr': TRACE_EXPR,
+}
+
+
+class Tracer:
+    """解释器跟踪输出
+
+    调用方先比较 level 再格式化消息，例如:
+        if tracer.level >= TRACE_LINE:
+            tracer.emit(f"+ {text}")
+    因此关闭跟踪时热路径上只有一次整数比较，不做任何字符串格式化。
+    脚本错误提示（warn）交给 on_warn，通常是终端的错误输出，不随跟踪输出写进文件后消失。
+    """
+
+    def __init__(self, level=TRACE_OFF, on_warn=None):
+        self.level = level
+        self.on_warn = on_warn
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def level_name(self):
+        for name, value in TRACE_LEVELS.items():
+            if value == self.level:
+                return name
+        return str(self.level)
+
+    def set_level(self, level):
+        if isinstance(level, str):
+            if level not in TRACE_LEVELS:
+                raise ValueError(f"unknown trace level: {level}")
+            level = TRACE_LEVELS[level]
+        self.level = level
+
+    def set_file(self, path):
+        """把跟踪输出写入文件；path 为 None 或 '-' 时恢复输出到 stderr"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self.path = None
+            if path and path != '-':
+                # 行缓冲：每条跟踪写入后即可在文件中看到，进程异常退出也不会丢失
+                self._file = open(path, 'a', encoding="utf-8", buffering=1)
+                self.path = path
+
+    def emit(self, message):
+        stream = self._file if self._file is not None else sys.stderr
+        with self._lock:
+            stream.write(message + '\n')
+            if self._file is None:
+                stream.flush()
+
+    def warn(self, message):
+        """脚本错误提示，与跟踪级别无关，总是输出；写跟踪文件时同时记入文件"""
+        message = f"pyterm: {message}"
+        if self.on_warn is None:
+            self.emit(message)
+            return
+        self.on_warn(message)
+        if self._file is not None:
+            self.emit(message)
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        self.set_file(None)
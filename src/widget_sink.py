@@ -0,0 +1,174 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QColor, QFont, QTextCharFormat, QTextCursor
+
+from src.ansi import AnsiParser
+from src.output_sink import COLOR_OUTPUT, OutputSink
+from src.scrollback import Scrollback
+
+
+class WidgetSink(OutputSink):
+    """写入终端 QTextEdit 的输出缓冲，只能在 GUI 线程使用
+
+    write 只把 (文本, 颜色) 记到待写列表，定时器每帧（interval 毫秒）把积累的输出
+    在一个 QTextCursor 编辑块中写入文档：相邻同色的行合并为一次 insertText，
+    文档只重新布局、重绘一次。直接操作控件之前需先调用 flush 保持输出顺序。
+    before_flush/on_flush 在每次写入文档前后调用（例如暂时移走提示符行、把光标移到末尾）。
+
+    文本中的 ANSI 颜色/粗体等转义序列（子进程输出、彩色 ASCII 图片）由 AnsiParser
+    增量解析为格式片段，同样按相邻同格式合并，不会逐字符插入。
+
+    文档的行数和大小受 scrollback 限制：超限时从头部整段裁掉最旧的行，
+    裁掉的内容交给 scrollback（可写入压缩的溢出日志）。
+    """
+
+    ansi = True
+    # 终端背景色，ANSI 反显时作为前景色
+    BACKGROUND = '#000000'
+
+    def __init__(self, widget, interval=16, on_flush=None, scrollback=None, before_flush=None):
+        self.widget = widget
+        self.on_flush = on_flush
+        self.before_flush = before_flush
+        self.scrollback = scrollback or Scrollback()
+        self._pending = []
+        self._formats = {}
+        self._ansi = AnsiParser()
+        self._timer = QTimer(widget)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    def write(self, text, color=COLOR_OUTPUT):
+        self._pending.append((text, color))
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def clear(self):
+        self._pending = []
+        self._ansi.reset()
+        self._timer.stop()
+        self.widget.clear()
+
+    def flush(self):
+        self._timer.stop()
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        if self.before_flush is not None:
+            self.before_flush()
+        document = self.widget.document()
+        max_lines = self.scrollback.max_lines
+        if max_lines:
+            # 一次 write 可能包含多行（help、cat 的数据块、ASCII 图片），按换行数计算行数
+            line_count = len(pending) + sum(text.count('\n') for text, _ in pending)
+            if line_count > max_lines:
+                # 一次输出就超过上限：文档原有内容和放不下的行不再写入文档，直接裁掉
+                self.trim(line_count)
+                pending = self._drop_lines(pending, line_count - max_lines)
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        # 相邻的同格式文字合并为一次 insertText；含 ANSI 转义的行按解析出的样式切分
+        ansi = self._ansi
+        run = []
+        run_key = (pending[0][1], None)
+        # 与 QTextEdit.append 一致：每行是一个新段落，空文档的第一行不另起段落
+        if not document.isEmpty():
+            run.append('\n')
+        for index, (text, color) in enumerate(pending):
+            if index:
+                run.append('\n')
+            if '\x1b' not in text and not ansi.active:
+                segments = ((text, None),)
+            else:
+                segments = ansi.feed(text)
+            for segment, style in segments:
+                key = (color, style)
+                if key != run_key:
+                    if run:
+                        cursor.insertText(''.join(run), self._format(run_key))
+                        run = []
+                    run_key = key
+                run.append(segment)
+        if run:
+            cursor.insertText(''.join(run), self._format(run_key))
+        cursor.endEditBlock()
+        self.trim()
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def _drop_lines(self, pending, count):
+        """从待写输出的开头丢掉 count 行交给 scrollback，返回剩下的输出"""
+        dropped = []
+        index = 0
+        while count > 0:
+            text, color = pending[index]
+            lines = text.split('\n')
+            if len(lines) > count:
+                # 多行输出只丢掉前面的行，其余仍然写入
+                pending[index] = ('\n'.join(lines[count:]), color)
+                lines = lines[:count]
+            else:
+                index += 1
+            count -= len(lines)
+            dropped.extend(lines)
+        # 丢掉的行中的 ANSI 样式仍然作用于之后的输出
+        for line in dropped:
+            if '\x1b' in line or self._ansi.active:
+                self._ansi.feed(line + '\n')
+        self.scrollback.discard(dropped)
+        return pending[index:]
+
+    def trim(self, incoming=0):
+        """文档超出回滚上限时裁掉最旧的行；incoming 为随后将要写入的行数
+
+        最后一行（通常是提示符）始终保留。
+        """
+        document = self.widget.document()
+        block_count = document.blockCount()
+        count = self.scrollback.lines_to_trim(block_count + incoming)
+        chars = self.scrollback.chars_to_trim(document.characterCount())
+        if chars:
+            block = document.firstBlock()
+            removed = 0
+            trimmed = 0
+            while block.isValid() and removed < chars:
+                removed += block.length()
+                trimmed += 1
+                block = block.next()
+            count = max(count, trimmed)
+        count = min(count, block_count - 1)
+        if count <= 0:
+            return
+        cursor = QTextCursor(document)
+        cursor.setPosition(document.findBlockByNumber(count).position(), QTextCursor.KeepAnchor)
+        self.scrollback.discard(cursor.selection().toPlainText().split('\n')[:count])
+        cursor.removeSelectedText()
+
+    def reset_ansi(self):
+        """结束上一条命令留下的 ANSI 样式（例如显示提示符之前）"""
+        self._ansi.reset()
+
+    def _format(self, key):
+        """(行颜色, AnsiStyle) 对应的字符格式；没有 ANSI 样式时使用行颜色"""
+        char_format = self._formats.get(key)
+        if char_format is None:
+            color, style = key
+            char_format = self._formats[key] = QTextCharFormat()
+            if style is None:
+                char_format.setForeground(QColor(color))
+                return char_format
+            foreground = style.fg or color
+            background = style.bg
+            if style.inverse:
+                foreground, background = background or self.BACKGROUND, foreground
+            char_format.setForeground(QColor(foreground))
+            if background is not None:
+                char_format.setBackground(QColor(background))
+            if style.bold:
+                char_format.setFontWeight(QFont.Bold)
+            if style.italic:
+                char_format.setFontItalic(True)
+            if style.underline:
+                char_format.setFontUnderline(True)
+        return char_format
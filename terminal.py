@@ -1,43 +1,66 @@
-import re
 import sys
 import os
+import re
 import subprocess
 import threading
-import traceback
-from html import escape
 
-import requests
+if __name__ == '__main__' and len(sys.argv) > 1:
+    # 无界面模式（-c / --script）不加载 Qt
+    from src.headless import main
+    sys.exit(main(sys.argv[1:]))
+
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
-from src.custom_ascii_magic import CustomAsciiArt
-from src.shell_parser import ShellParser
+from src.mapped_file import MappedFile
+from src.output_sink import COLOR_ERROR, SINK_CLEAR
+from src.pager import Pager
+from src.process_output import ProcessOutputQueue
+from src.redirection import parse_redirections
+from src.scrollback import Scrollback
+from src.script_worker import ScriptWorker
+from src.shell_core import ShellCore
+from src.shell_parser import ScriptCancelled, ShellParser
+from src.stream_commands import CommandError, split_pipeline
 from src.vim_editor import VimEditor
+from src.widget_sink import WidgetSink
+
 
+class TerminalEmulator(QWidget, ShellCore):
+    # 脚本线程中遇到必须在 GUI 线程执行的命令（python/vim/exit）时通过该信号转交
+    gui_command_requested = pyqtSignal(str)
+    # 后台任务的输出批次
+    background_output = pyqtSignal(list)
+
+    # 这些命令会创建控件、定时器或子进程交互状态，只能在 GUI 线程执行
+    GUI_ONLY_COMMANDS = ('python', 'python3', 'vim', 'exit')
+    # 交互式 python 子进程输出的显示间隔（毫秒）
+    PYTHON_OUTPUT_INTERVAL = 16
 
-class TerminalEmulator(QWidget):
     def __init__(self):
         super().__init__()
+        # prompt_live: 末尾的提示符行正在等待输入；输出到达时暂时移走，写完输出后连同已输入的内容重新显示
+        self.prompt_live = False
+        self.detached_input = None
         self.initUI()
+        self.init_shell(self.widget_sink)
         self.history = []
         self.history_index = -1
-        self.current_cmd = ""
         self.current_prompt_block = None
-        self.current_dir = os.getcwd()
         self.vim_editor = None
+        self.pager = None
         self.python_process = None
+        self.python_output = None
         self.python_input_mode = False
         self.python_input_buffer = ""
         self.last_python_output = ""
-        self.is_script_execution = False
-
-        self.environment = {
-            'PATH': '/home/user/bin:/usr/bin:/bin',
-            'USER': 'user',
-            'HOME': '/home/user',
-            'PYTERM_VERSION': '0.9'
-        }
+        self.foreground_job = None
+        self.gui_command_requested.connect(self.run_gui_command)
+        self.background_output.connect(self.append_output_batch)
+        self.register_command('scrollback', lambda shell, argv: shell.scrollback_command(argv),
+                              "scrollback [-n 行数] [-c 字符数] [--spill [文件] | --no-spill] | "
+                              "scrollback search [-i] 正则: 设置回滚上限、溢出日志，检索已裁掉的历史")
 
         self.show_prompt()
         self.init_directory = os.path.join(os.getcwd(), ".pyterm_init")
@@ -85,7 +108,6 @@ class TerminalEmulator(QWidget):
         """)
         self.terminal.setFocusPolicy(Qt.StrongFocus)
         self.terminal.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.terminal.document().setMaximumBlockCount(5000)
         self.terminal.installEventFilter(self)
         self.terminal.setAcceptRichText(False)
 
@@ -123,40 +145,140 @@ class TerminalEmulator(QWidget):
             }
         """)
 
+        # 输出先进入缓冲，每帧合并写入一次文档；文档行数受回滚上限约束
+        self.scrollback = Scrollback()
+        self.widget_sink = WidgetSink(self.terminal, on_flush=self.restore_prompt,
+                                      scrollback=self.scrollback, before_flush=self.detach_prompt)
+
         layout = QVBoxLayout()
         layout.addWidget(self.terminal)
         self.setLayout(layout)
 
     def run_init_scripts(self):
-        """自动执行初始化目录中的所有脚本"""
+        """在工作线程中依次执行初始化目录中的所有脚本"""
         if not os.path.exists(self.init_directory):
             return
 
         try:
             script_files = sorted(os.listdir(self.init_directory))
-            for script in script_files:
-                script_path = os.path.join(self.init_directory, script)
-                if os.path.isfile(script_path) and script_path.endswith('.sh'):
-                    try:
-                        with open(script_path, 'r', encoding="utf-8") as f:
-                            script_content = f.read()
+        except Exception as e:
+            self.write_error(f"初始化目录处理失败: {str(e)}")
+            return
 
-                        parser = ShellParser(self)
-                        parser.parse(script_content, self.current_dir)
+        script_paths = [os.path.join(self.init_directory, script) for script in script_files]
+        script_paths = [path for path in script_paths if os.path.isfile(path) and path.endswith('.sh')]
+        if not script_paths:
+            return
 
-                        self.show_prompt()
-                    except Exception as e:
-                        self.terminal.setTextColor(QColor('#FF0000'))
-                        self.terminal.append(f"start up error: {str(e)}")
+        def job(cancel_event):
+            for script_path in script_paths:
+                try:
+                    parser = ShellParser(self, cancel_event)
+                    parser.run_file(script_path, self.current_dir)
+                except ScriptCancelled:
+                    self.write_error("^C")
+                    return
+                except Exception as e:
+                    self.write_error(f"start up error: {str(e)}")
 
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"初始化目录处理失败: {str(e)}")
+        self.start_foreground_job(job, "init")
+
+    # === 输出与脚本任务 ===
+    def run_job(self, job, description):
+        """GUI 线程中作为前台任务在工作线程执行；已在工作线程或输出被重定向/捕获时同步执行"""
+        if threading.current_thread() is threading.main_thread() and not self._ctx.sinks:
+            self.start_foreground_job(job, description)
+        else:
+            super().run_job(job, description)
+
+    def start_foreground_job(self, job, description):
+        """在工作线程中执行 job(cancel_event)，期间界面保持响应，Ctrl+C 可取消"""
+        worker = ScriptWorker(self, job, description, self)
+        worker.output_ready.connect(self.append_output_batch)
+        worker.job_failed.connect(lambda message: self.write_error(f"执行脚本失败: {message}"))
+        worker.finished.connect(self.on_foreground_job_finished)
+        self.foreground_job = worker
+        self.setWindowTitle(f'PyTerminal v0.9. [running: {description}]')
+        worker.start()
+
+    def emit_output_batch(self, items):
+        """工作线程中的输出批次通过排队信号送回 GUI 线程"""
+        self.background_output.emit(items)
+
+    def append_output_batch(self, items):
+        """在 GUI 线程中把工作线程送来的一批输出交给输出缓冲，由其按帧写入文档"""
+        sink = self.widget_sink
+        for kind, text, color in items:
+            if kind == SINK_CLEAR:
+                sink.clear()
+            else:
+                sink.write(text, color)
+
+    def on_foreground_job_finished(self):
+        worker = self.sender()
+        if worker is not self.foreground_job:
+            return
+        self.foreground_job = None
+        worker.deleteLater()
+        self.setWindowTitle('PyTerminal v0.9.')
+        if not self.python_input_mode and not (self.vim_editor and self.vim_editor.is_active):
+            self.show_prompt()
+
+    def cancel_foreground_job(self):
+        if self.foreground_job:
+            self.foreground_job.cancel()
+
+    def closeEvent(self, event):
+        """关闭窗口时终止所有后台任务"""
+        self.jobs.shutdown()
+        self.scrollback.disable_log()
+        self.tracer.close()
+        if self.pager:
+            self.pager.close()
+        super().closeEvent(event)
+
+    def forward_to_gui_thread(self):
+        """脚本线程中遇到 python/vim/exit 时转交给 GUI 线程执行
+
+        输出被重定向或接入管道的 python 不需要交互，留在脚本线程中运行，脚本等它结束后再继续。
+        """
+        # 后台任务中的命令不交互，也不能占用终端窗口
+        if threading.current_thread() is threading.main_thread() or self._ctx.job is not None:
+            return False
+        name = self.current_cmd.split(' ', 1)[0]
+        if name not in self.GUI_ONLY_COMMANDS:
+            return False
+        if name in self.PYTHON_COMMANDS and self.is_captured(self.current_cmd):
+            return False
+        self.gui_command_requested.emit(self.current_cmd)
+        return True
+
+    @staticmethod
+    def is_captured(cmd):
+        """命令行的输出是否被重定向到文件或接入管道"""
+        if len(split_pipeline(cmd)) > 1:
+            return True
+        try:
+            return parse_redirections(cmd) is not None
+        except CommandError:
+            return True
+
+    def run_gui_command(self, cmd):
+        """在 GUI 线程执行脚本线程转交过来的命令"""
+        self.current_cmd = cmd
+        self.execute_command_internal()
+        self.current_cmd = ""
 
     def show_prompt(self):
         """显示经典复古风格的提示符"""
         rel_path = os.path.relpath(self.current_dir, os.getcwd())
         self.current_prompt = f"user@pyterm:{rel_path}$ "
+        # 提示符必须出现在所有已缓冲的输出之后
+        self.widget_sink.flush()
+        self.widget_sink.reset_ansi()
+        if self.prompt_live:
+            # 上一个提示符还没有用过（例如初始化脚本运行期间显示的提示符），换成新的
+            self.remove_prompt_block()
         self.terminal.setTextColor(QColor('#00FF00'))
         if self.terminal.toPlainText() == "":
             self.terminal.append("PyTerminal v0.9")
@@ -165,9 +287,50 @@ class TerminalEmulator(QWidget):
             self.terminal.append("")
 
         self.terminal.append(self.current_prompt)
+        self.widget_sink.trim()
         self.current_prompt_block = self.terminal.document().lastBlock()
+        self.prompt_live = True
         self.move_cursor_to_end()
 
+    def remove_prompt_block(self):
+        """删除末尾的提示符行，返回 False 表示提示符已不在文档末尾（例如已被清屏）"""
+        self.prompt_live = False
+        block = self.current_prompt_block
+        document = self.terminal.document()
+        if block is None or not block.isValid() or block != document.lastBlock() \
+                or not block.text().startswith(self.current_prompt):
+            return False
+        cursor = QTextCursor(document)
+        cursor.setPosition(max(block.position() - 1, 0))
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.current_prompt_block = None
+        return True
+
+    def detach_prompt(self):
+        """输出写入文档之前移走等待输入的提示符行，记下已输入的内容和光标位置"""
+        if not self.prompt_live:
+            return
+        text = self.get_current_command_text()
+        column = self.terminal.textCursor().position() - self.current_prompt_block.position() - len(self.current_prompt)
+        if self.remove_prompt_block():
+            self.detached_input = (text, min(max(column, 0), len(text)))
+
+    def restore_prompt(self):
+        """输出写入后把移走的提示符行和输入内容放回文档末尾"""
+        if self.detached_input is None:
+            self.move_cursor_to_end()
+            return
+        text, column = self.detached_input
+        self.detached_input = None
+        self.terminal.setTextColor(QColor('#00FF00'))
+        self.terminal.append(self.current_prompt + text)
+        self.current_prompt_block = self.terminal.document().lastBlock()
+        self.prompt_live = True
+        cursor = self.terminal.textCursor()
+        cursor.setPosition(self.current_prompt_block.position() + len(self.current_prompt) + column)
+        self.terminal.setTextCursor(cursor)
+
     def eventFilter(self, obj, event):
         if obj == self.terminal and event.type() == QEvent.KeyPress:
             if self.vim_editor and self.vim_editor.is_active:
@@ -176,9 +339,18 @@ class TerminalEmulator(QWidget):
                 if not self.vim_editor.is_active:
                     self.exit_vim_editor()
                     return True
+            elif self.pager:
+                self.pager.handle_key_press(event)
+                if not self.pager.is_active:
+                    self.exit_pager()
             elif self.python_input_mode:  # 处理Python输入模式
                 self.handle_python_input(event)
                 return True
+            elif self.foreground_job:
+                # 脚本运行期间只响应 Ctrl+C
+                if event.key() == Qt.Key_C and event.modifiers() & Qt.ControlModifier:
+                    self.cancel_foreground_job()
+                return True
             else:
                 self.handle_key_press(event)
             return True
@@ -190,199 +362,50 @@ class TerminalEmulator(QWidget):
         self.terminal.setTextCursor(cursor)
 
     def execute_command(self):
+        # 提示符行已成为命令回显，之后的输出写在它下面
+        self.prompt_live = False
         self.current_cmd = self.current_cmd.strip()
         if self.current_cmd:
             self.history.append(self.current_cmd)
             self.history_index = len(self.history)
 
-        # 处理Python脚本执行
-        if self.current_cmd.startswith(('python', 'python3')):
-            self.run_python_script()
-            self.current_cmd = ""
-            return
-
-        # 处理其他命令...
-        if self.current_cmd == "clear":
-            self.terminal.clear()
-        elif self.current_cmd.startswith("ls"):
-            self.ls_command()
-        elif self.current_cmd.startswith("cd"):
-            self.cd_command()
-        elif self.current_cmd == "pwd":
-            self.pwd_command()
-        elif self.current_cmd.startswith("touch"):
-            self.touch_command()
-        elif self.current_cmd.startswith("mkdir"):
-            self.mkdir_command()
-        elif self.current_cmd.startswith("rm"):
-            self.rm_command()
-        elif self.current_cmd.startswith("cat"):
-            self.cat_command()
-        elif self.current_cmd.startswith("cp"):
-            self.cp_command()
-        elif self.current_cmd.startswith("mv"):
-            self.mv_command()
-        elif self.current_cmd.startswith("echo"):
-            self.echo_command()
-        elif self.current_cmd.startswith("export"):
-            self.export_command()
-        elif self.current_cmd.startswith("head"):
-            self.head_command()
-        elif self.current_cmd.startswith("tail"):
-            self.tail_command()
-        elif self.current_cmd.startswith("grep"):
-            self.grep_command()
-        elif self.current_cmd.startswith("sort"):
-            self.sort_command()
-        elif self.current_cmd.startswith("uniq"):
-            self.uniq_command()
-        elif self.current_cmd.startswith("asciishow "):
-            self.show_ascii_image()
-        elif self.current_cmd.startswith("vim"):
-            self.vim_command()
-        elif self.current_cmd == "help":
-            self.show_help()
-        elif self.current_cmd == "exit":
-            self.close()
-        elif self.current_cmd.startswith("curl"):
-            self.curl_command()
-        elif self.current_cmd.startswith("run"):
-            script_path = self.current_cmd[4:].strip()
-            self.run_script_file(script_path)
-        else:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"pyterm: command not found: {self.current_cmd}")
+        self.execute_command_internal()
 
         self.current_cmd = ""
-        if not self.python_input_mode:
-            self.show_prompt()
-
-    def run_script_file(self, script_path):
-        full_path = os.path.join(self.current_dir, script_path)
-
-        if not os.path.exists(full_path):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"run: {script_path}: No such file or directory")
-            return
-
-        if not os.path.isfile(full_path):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"run: {script_path}: Not a file")
-            return
-
-        if not script_path.endswith('.sh'):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"run: {script_path}: Not a shell script")
-            return
-
-        try:
-            with open(full_path, 'r', encoding="utf-8") as f:
-                script_content = f.read()
-
-            parser = ShellParser(self)
-            parser.parse(script_content, self.current_dir)
-
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"执行脚本失败: {str(e)}")
-
-    def execute_command_internal(self):
-        """内部执行命令，不自动显示提示符"""
-        self.current_cmd = self.current_cmd.strip()
-
-        if self.current_cmd.startswith(('python', 'python3')):
-            self.run_python_script()
-            self.current_cmd = ""
-            return
-
-        # 处理其他命令...
-        if self.current_cmd == "clear":
-            self.terminal.clear()
-        elif self.current_cmd.startswith("ls"):
-            self.ls_command()
-        elif self.current_cmd.startswith("cd"):
-            self.cd_command()
-        elif self.current_cmd == "pwd":
-            self.pwd_command()
-        elif self.current_cmd.startswith("touch"):
-            self.touch_command()
-        elif self.current_cmd.startswith("mkdir"):
-            self.mkdir_command()
-        elif self.current_cmd.startswith("rm"):
-            self.rm_command()
-        elif self.current_cmd.startswith("cat"):
-            self.cat_command()
-        elif self.current_cmd.startswith("cp"):
-            self.cp_command()
-        elif self.current_cmd.startswith("mv"):
-            self.mv_command()
-        elif self.current_cmd.startswith("echo"):
-            self.echo_command()
-        elif self.current_cmd.startswith("export"):
-            self.export_command()
-        elif self.current_cmd.startswith("head"):
-            self.head_command()
-        elif self.current_cmd.startswith("tail"):
-            self.tail_command()
-        elif self.current_cmd.startswith("grep"):
-            self.grep_command()
-        elif self.current_cmd.startswith("sort"):
-            self.sort_command()
-        elif self.current_cmd.startswith("uniq"):
-            self.uniq_command()
-        elif self.current_cmd.startswith("asciishow "):
-            self.show_ascii_image()
-        elif self.current_cmd.startswith("vim"):
-            self.vim_command()
-        elif self.current_cmd == "help":
-            self.show_help()
-        elif self.current_cmd == "exit":
-            self.close()
-        elif self.current_cmd.startswith("run"):
-            script_path = self.current_cmd[4:].strip()
-            self.run_script_file(script_path)
-        else:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"pyterm: command not found: {self.current_cmd}")
-
-    def run_python_script(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("python: missing script file")
+        if not self.python_input_mode and not self.foreground_job and not self.pager:
             self.show_prompt()
-            return
 
-        script_path = parts[1]
-        full_path = os.path.join(self.current_dir, script_path)
+    def run_python_script(self, argv):
+        """交互式运行 Python 脚本：输出异步显示，用户输入转发到子进程
 
-        if not os.path.exists(full_path):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"python: can't open file '{script_path}': [Errno 2] No such file or directory")
-            self.show_prompt()
-            return
-
-        if not full_path.endswith('.py'):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"python: '{script_path}' is not a Python script file")
-            self.show_prompt()
-            return
+        输出被重定向或捕获、或不在 GUI 线程时不交互，输出写入当前输出目标。
+        """
+        if threading.current_thread() is not threading.main_thread() or self._ctx.sinks:
+            return super().run_python_script(argv)
+        full_path = self.resolve_python_script(argv)
+        if full_path is None:
+            return 2
 
         try:
-            # 创建子进程执行Python脚本
+            # 创建子进程执行Python脚本；关闭子进程的输出缓冲，stdout 与 stderr 按实际顺序到达
             self.python_process = subprocess.Popen(
-                [parts[0], full_path],
+                [argv[0], full_path],
                 cwd=self.current_dir,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
                 bufsize=1,  # 行缓冲
-                universal_newlines=True
+                universal_newlines=True,
+                env=dict(os.environ, PYTHONUNBUFFERED='1')
             )
 
-            threading.Thread(target=self.read_python_output, daemon=True).start()
-            threading.Thread(target=self.read_python_errors, daemon=True).start()
+            # 读取线程只把输出放进队列，由 GUI 线程的定时器按批取出显示
+            self.python_output = ProcessOutputQueue(self.python_process)
+            self.python_output.start()
+            self.python_output_timer = QTimer(self)
+            self.python_output_timer.timeout.connect(self.drain_python_output)
+            self.python_output_timer.start(self.PYTHON_OUTPUT_INTERVAL)
 
             self.python_timeout_timer = QTimer(self)
             self.python_timeout_timer.setSingleShot(True)
@@ -394,70 +417,49 @@ class TerminalEmulator(QWidget):
             self.last_python_output = ""
 
         except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"python: {str(e)}")
-            self.show_prompt()
+            self.write_error(f"python: {str(e)}")
 
     def check_python_timeout(self):
         """检查Python进程是否超时"""
         if self.python_process and self.python_process.poll() is None:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("\n(python执行超时，强制终止)")
+            self.write_error("\n(python执行超时，强制终止)")
             self.python_process.terminate()
             try:
                 self.python_process.wait(timeout=2)
             except subprocess.TimeoutExpired:
                 self.python_process.kill()
-            self.python_process = None
-            self.python_input_mode = False
+            # 剩余输出读完后由 drain_python_output 恢复状态并显示提示符
+
+    def drain_python_output(self):
+        """在 GUI 线程中取出子进程的一批输出；两个输出流都结束后恢复输入状态"""
+        output = self.python_output
+        if output is None:
+            return
+        items = output.drain()
+        if items:
+            for _, text, color in reversed(items):
+                if color != COLOR_ERROR:
+                    self.last_python_output = text
+                    break
+            self.append_output_batch(items)
+            # 有输出时重置超时计时器
+            if self.python_timeout_timer.isActive():
+                self.python_timeout_timer.start(30000)
+        if not output.finished:
+            return
+
+        # 进程结束时恢复状态
+        for timer in (self.python_output_timer, self.python_timeout_timer):
+            timer.stop()
+            timer.deleteLater()
+        self.python_output = None
+        if self.python_process:
+            self.python_process.wait()
+        self.python_process = None
+        self.python_input_mode = False
+        if not self.current_cmd:  # 只有当没有等待执行的命令时才显示提示符
             self.show_prompt()
 
-    def read_python_output(self):
-        if not self.python_process or not self.python_process.stdout:
-            return
-
-        try:
-            for line in iter(self.python_process.stdout.readline, ''):
-                if line:
-                    self.last_python_output = line.rstrip('\n')
-                    self.terminal.setTextColor(QColor('#00FF00'))
-                    self.terminal.append(self.last_python_output)
-                    self.move_cursor_to_end()
-
-                    # 重置超时计时器
-                    if self.python_timeout_timer and self.python_timeout_timer.isActive():
-                        self.python_timeout_timer.start(30000)
-        except Exception as e:
-            pass
-        finally:
-            # 进程结束时恢复状态
-            if self.python_process:
-                self.python_process.wait()
-            self.python_process = None
-            self.python_input_mode = False
-            if self.python_timeout_timer and self.python_timeout_timer.isActive():
-                self.python_timeout_timer.stop()
-            if not self.current_cmd:  # 只有当没有等待执行的命令时才显示提示符
-                self.show_prompt()
-
-    def read_python_errors(self):
-        """读取Python进程的错误输出"""
-        if not self.python_process or not self.python_process.stderr:
-            return
-
-        try:
-            for line in iter(self.python_process.stderr.readline, ''):
-                if line:
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append(line.rstrip('\n'))
-                    self.move_cursor_to_end()
-
-                    # 重置超时计时器
-                    if self.python_timeout_timer and self.python_timeout_timer.isActive():
-                        self.python_timeout_timer.start(30000)
-        except Exception as e:
-            pass
-
     def handle_python_input(self, event):
         """处理Python脚本的交互式输入"""
         cursor = self.terminal.textCursor()
@@ -479,6 +481,7 @@ class TerminalEmulator(QWidget):
         elif event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
             # 将输入发送到Python进程
             if self.python_process and self.python_process.stdin:
+                self.widget_sink.flush()
                 self.terminal.append('')  # 添加换行
                 self.python_process.stdin.write(self.python_input_buffer + '\n')
                 self.python_process.stdin.flush()
@@ -530,581 +533,110 @@ class TerminalEmulator(QWidget):
         self.terminal.setTextCursor(cursor)
         self.python_input_buffer = text
 
-    # === Linux命令实现 ===
-    def ls_command(self):
-        try:
-            files = os.listdir(self.current_dir)
-            filtered_files = [f for f in files if f not in ['__pycache__', '.idea']]
-            for file in filtered_files:
-                file_path = os.path.join(self.current_dir, file)
-                if os.path.isdir(file_path):
-                    self.terminal.setTextColor(QColor('#00BFFF'))
-                    self.terminal.append(file + "/")
-                else:
-                    self.terminal.setTextColor(QColor('#00FF00'))
-                    self.terminal.append(file)
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"ls: {str(e)}")
-
-    def cd_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            return
-
-        target = parts[1]
-        if target == "..":
-            new_dir = os.path.dirname(self.current_dir)
-        else:
-            new_dir = os.path.join(self.current_dir, target)
-
-        project_root = os.getcwd()
-        if not os.path.abspath(new_dir).startswith(project_root):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("cd: permission denied (outside project directory)")
-            return
-
-        if os.path.isdir(new_dir):
-            self.current_dir = new_dir
-        else:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"cd: no such directory: {target}")
+    def exit_command(self, argv):
+        super().exit_command(argv)
+        self.close()
 
-    def pwd_command(self):
-        rel_path = os.path.relpath(self.current_dir, os.getcwd())
-        self.terminal.setTextColor(QColor('#00FF00'))
-        self.terminal.append(rel_path)
-
-    def touch_command(self):
-        parts = self.current_cmd.split()[1:]
-        for filename in parts:
-            file_path = os.path.join(self.current_dir, filename)
-            try:
-                with open(file_path, 'a', encoding="utf-8"):
-                    pass
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(f"created: {filename}")
-            except Exception as e:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"touch: {str(e)}")
-
-    def mkdir_command(self):
-        parts = self.current_cmd.split()[1:]
-        for dirname in parts:
-            dir_path = os.path.join(self.current_dir, dirname)
-            try:
-                os.makedirs(dir_path, exist_ok=True)
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(f"created directory: {dirname}")
-            except Exception as e:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"mkdir: {str(e)}")
-
-    def rm_command(self):
-        parts = self.current_cmd.split()[1:]
-        for path in parts:
-            full_path = os.path.join(self.current_dir, path)
-            try:
-                if os.path.isfile(full_path):
-                    os.remove(full_path)
-                    self.terminal.append(f"removed: {path}")
-                elif os.path.isdir(full_path):
-                    os.rmdir(full_path)
-                    self.terminal.append(f"removed directory: {path}")
-                else:
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append(f"rm: no such file or directory: {path}")
-            except Exception as e:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"rm: {str(e)}")
-
-    def cat_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("cat: missing operand")
-            return
-
-        for filename in parts[1:]:
-            file_path = os.path.join(self.current_dir, filename)
-            try:
-                if not os.path.exists(file_path):
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append(f"cat: {filename}: No such file or directory")
-                    continue
-
-                if os.path.isdir(file_path):
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append(f"cat: {filename}: Is a directory")
-                    continue
-
-                with open(file_path, 'r', encoding="utf-8") as f:
-                    content = f.read()
-                    self.terminal.setTextColor(QColor('#00FF00'))
-                    self.terminal.append(content)
-            except Exception as e:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"cat: {filename}: {str(e)}")
-
-    def cp_command(self):
-        parts = self.current_cmd.split()[1:]
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("cp: missing file operand")
+    # === 回滚区 ===
+    def scrollback_command(self, argv):
+        parts = argv[1:]
+        if parts and parts[0] == 'search':
+            self.scrollback_search(parts[1:])
             return
-
-        src = parts[0]
-        dst = parts[1]
-
-        src_path = os.path.join(self.current_dir, src)
-        dst_path = os.path.join(self.current_dir, dst)
-
-        if not os.path.exists(src_path):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"cp: cannot stat '{src}': No such file or directory")
-            return
-
-        if os.path.isdir(src_path):
-            if len(parts) > 2 or not dst.endswith('/'):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"cp: omitting directory '{src}'")
-                return
-
-            os.makedirs(dst_path, exist_ok=True)
-
-            for item in os.listdir(src_path):
-                item_src = os.path.join(src_path, item)
-                item_dst = os.path.join(dst_path, item)
-
-                if os.path.isdir(item_src):
-                    os.makedirs(item_dst, exist_ok=True)
-                else:
-                    with open(item_src, 'r', encoding="utf-8") as f_src:
-                        content = f_src.read()
-                    with open(item_dst, 'w', encoding="utf-8") as f_dst:
-                        f_dst.write(content)
-
-            self.terminal.setTextColor(QColor('#00FF00'))
-            self.terminal.append(f"copied directory '{src}' to '{dst}'")
-        else:
-            try:
-                with open(src_path, 'r', encoding="utf-8") as f_src:
-                    content = f_src.read()
-
-                if os.path.isdir(dst_path):
-                    dst_path = os.path.join(dst_path, os.path.basename(src_path))
-
-                with open(dst_path, 'w', encoding="utf-8") as f_dst:
-                    f_dst.write(content)
-
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(f"copied '{src}' to '{dst}'")
-            except Exception as e:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"cp: error copying file: {str(e)}")
-
-    def mv_command(self):
-        parts = self.current_cmd.split()[1:]
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("mv: missing file operand")
-            return
-
-        src = parts[0]
-        dst = parts[1]
-
-        src_path = os.path.join(self.current_dir, src)
-        dst_path = os.path.join(self.current_dir, dst)
-
-        if not os.path.exists(src_path):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"mv: cannot stat '{src}': No such file or directory")
-            return
-
-        try:
-            if os.path.isdir(dst_path):
-                dst_path = os.path.join(dst_path, os.path.basename(src_path))
-
-            os.replace(src_path, dst_path)
-            self.terminal.setTextColor(QColor('#00FF00'))
-            self.terminal.append(f"moved '{src}' to '{dst}'")
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"mv: error moving file: {str(e)}")
-
-    def echo_command(self):
-        text = self.current_cmd[5:].strip()
-
-        if (text.startswith('"') and text.endswith('"')) or (text.startswith("'") and text.endswith("'")):
-            quote_char = text[0]
-            content = text[1:-1]
-            content = re.sub(r'\$(\w+)', lambda m: self.environment.get(m.group(1), ''), content)
-            content = content.replace(f'\\{quote_char}', quote_char)
-            content = content.replace(r'\\', '\\')
-        else:
-            content = re.sub(r'\$(\w+)', lambda m: self.environment.get(m.group(1), ''), text)
-
-        self.terminal.setTextColor(QColor('#00FF00'))
-        self.terminal.append(content)
-
-    def export_command(self):
-        parts = self.current_cmd.split()[1:]
         if not parts:
-            for key, value in self.environment.items():
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(f"{key}={value}")
+            scrollback = self.scrollback
+            log = scrollback.log
+            self.write(f"scrollback: lines={self.terminal.document().blockCount()}/{scrollback.max_lines or 'unlimited'}, "
+                       f"chars={self.terminal.document().characterCount()}/{scrollback.max_chars or 'unlimited'}, "
+                       f"trimmed={scrollback.trimmed_lines}")
+            if log is not None:
+                self.write(f"spill log: {log.path} ({log.lines_written} lines)")
             return
 
-        for part in parts:
-            if '=' in part:
-                key, value = part.split('=', 1)
-                self.environment[key] = value
-            else:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"export: '{part}': not a valid identifier")
-
-    def head_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("head: missing operand")
-            return
-
-        n_lines = 10
-        filename = None
-        i = 1
-
+        i = 0
         while i < len(parts):
-            part = parts[i]
-            if part.startswith('-n'):
-                if len(part) == 2:
-                    if i + 1 >= len(parts):
-                        self.terminal.setTextColor(QColor('#FF0000'))
-                        self.terminal.append("head: missing number of lines after -n")
-                        return
-                    try:
-                        n_lines = int(parts[i + 1])
-                        i += 1
-                    except ValueError:
-                        self.terminal.setTextColor(QColor('#FF0000'))
-                        self.terminal.append(f"head: invalid number of lines: '{parts[i + 1]}'")
-                        return
+            option = parts[i]
+            if option in ('-n', '-c'):
+                if i + 1 >= len(parts) or not parts[i + 1].isdigit():
+                    self.write_error(f"scrollback: {option} requires a non-negative number")
+                    return
+                if option == '-n':
+                    self.scrollback.max_lines = int(parts[i + 1])
                 else:
-                    try:
-                        n_lines = int(part[2:])
-                    except ValueError:
-                        self.terminal.setTextColor(QColor('#FF0000'))
-                        self.terminal.append(f"head: invalid number of lines: '{part[2:]}'")
-                        return
+                    self.scrollback.max_chars = int(parts[i + 1])
+                i += 2
+            elif option == '--spill':
+                path = None
+                if i + 1 < len(parts) and not parts[i + 1].startswith('-'):
+                    path = os.path.join(self.current_dir, parts[i + 1])
+                    i += 1
+                log = self.scrollback.enable_log(path)
+                self.write(f"scrollback: trimmed lines are written to {log.path}", '#FFFF00')
+                i += 1
+            elif option == '--no-spill':
+                self.scrollback.disable_log()
+                i += 1
             else:
-                filename = part
-                break
-
-            i += 1
-
-        if not filename:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("head: missing file operand")
-            return
-
-        file_path = os.path.join(self.current_dir, filename)
-
-        try:
-            if not os.path.exists(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"head: {filename}: No such file or directory")
-                return
-
-            if os.path.isdir(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"head: {filename}: Is a directory")
+                self.write_error(f"scrollback: invalid option '{option}'")
                 return
 
-            with open(file_path, 'r', encoding="utf-8") as f:
-                lines = f.readlines()[:n_lines]
-                content = ''.join(lines)
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(content)
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"head: {filename}: {str(e)}")
-
-    def tail_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("tail: missing operand")
-            return
-
-        n_lines = 10
-        filename = None
-        follow = False
-        i = 1
-
-        while i < len(parts):
-            part = parts[i]
-            if part == '-f':
-                follow = True
-            elif part.startswith('-n'):
-                if len(part) == 2:
-                    if i + 1 >= len(parts):
-                        self.terminal.setTextColor(QColor('#FF0000'))
-                        self.terminal.append("tail: missing number of lines after -n")
-                        return
-                    try:
-                        n_lines = int(parts[i + 1])
-                        i += 1
-                    except ValueError:
-                        self.terminal.setTextColor(QColor('#FF0000'))
-                        self.terminal.append(f"tail: invalid number of lines: '{parts[i + 1]}'")
-                        return
-                else:
-                    try:
-                        n_lines = int(part[2:])
-                    except ValueError:
-                        self.terminal.setTextColor(QColor('#FF0000'))
-                        self.terminal.append(f"tail: invalid number of lines: '{part[2:]}'")
-                        return
-            else:
-                filename = part
-                break
-
-            i += 1
-
-        if not filename:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("tail: missing file operand")
-            return
-
-        file_path = os.path.join(self.current_dir, filename)
-
-        try:
-            if not os.path.exists(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"tail: {filename}: No such file or directory")
-                return
-
-            if os.path.isdir(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"tail: {filename}: Is a directory")
-                return
-
-            with open(file_path, 'r', encoding="utf-8") as f:
-                lines = f.readlines()
-                content = ''.join(lines[-n_lines:])
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(content)
-
-            if follow:
-                self.terminal.setTextColor(QColor('#FFFF00'))
-                self.terminal.append("(simulated) tail: following file - use Ctrl+C to stop")
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"tail: {filename}: {str(e)}")
-
-    def grep_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 3:
-            if len(parts) == 2:
-                if os.path.exists(os.path.join(self.current_dir, parts[1])):
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append("grep: missing pattern operand")
-                else:
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append("grep: missing file operand")
-            else:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append("grep: missing pattern and file operands")
-            return
-
-        options = []
-        i = 1
-
-        while i < len(parts) and parts[i].startswith('-'):
-            options.extend(parts[i][1:])
-            i += 1
-
-        if i >= len(parts):
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("grep: missing pattern and file operands")
+    def scrollback_search(self, parts):
+        """scrollback search [-i] 正则：在溢出日志中检索已从屏幕裁掉的历史"""
+        ignore_case = bool(parts) and parts[0] == '-i'
+        if ignore_case:
+            parts = parts[1:]
+        if not parts:
+            self.write_error("scrollback: usage: scrollback search [-i] pattern")
             return
-
-        pattern = parts[i]
-        i += 1
-        files = parts[i:]
-
-        if not files:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("grep: missing file operand")
+        log = self.scrollback.log
+        if log is None:
+            self.write_error("scrollback: spill log is not enabled (scrollback --spill)")
             return
-
-        ignore_case = 'i' in options
         try:
-            flags = re.IGNORECASE if ignore_case else 0
-            regex = re.compile(pattern, flags)
+            for line_no, line in log.search(' '.join(parts), ignore_case):
+                self.write(f"{line_no}: {line}")
         except re.error as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"grep: invalid regular expression: {str(e)}")
-            return
-
-        found = False
-        for filename in files:
-            file_path = os.path.join(self.current_dir, filename)
+            self.write_error(f"scrollback: invalid pattern: {e}")
+        except OSError as e:
+            self.write_error(f"scrollback: {str(e)}")
 
-            try:
-                if not os.path.exists(file_path):
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append(f"grep: {filename}: No such file or directory")
-                    continue
-
-                if os.path.isdir(file_path):
-                    self.terminal.setTextColor(QColor('#FF0000'))
-                    self.terminal.append(f"grep: {filename}: Is a directory")
-                    continue
-
-                with open(file_path, 'r', encoding="utf-8") as f:
-                    for line_num, line in enumerate(f, 1):
-                        if regex.search(line):
-                            self.terminal.setTextColor(QColor('#00FF00'))
-                            if len(files) > 1:
-                                self.terminal.append(f"{filename}:")
-
-                            # 手动处理高亮显示，使用[[]]框住匹配内容
-                            result = ""
-                            last_end = 0
-                            for match in regex.finditer(line):
-                                start, end = match.span()
-                                result += line[last_end:start]
-                                result += f"[[{line[start:end]}]]"
-                                last_end = end
-                            result += line[last_end:]
-
-                            output = f"{line_num}: {result.rstrip('\n')}"
-                            self.terminal.append(output)
-                            found = True
-            except Exception as e:
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"grep: {filename}: {str(e)}")
-
-        if not found and all(os.path.exists(os.path.join(self.current_dir, f)) for f in files):
-            self.terminal.setTextColor(QColor('#00FF00'))
-            self.terminal.append("(no matches found)")
-
-    def sort_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("sort: missing operand")
+    # === less 分页浏览 ===
+    def less_command(self, argv):
+        """less 文件名：在终端窗口中分页浏览；在脚本线程中或输出被重定向时与 cat 相同"""
+        if threading.current_thread() is not threading.main_thread() or self._ctx.sinks:
+            super().less_command(argv)
             return
-
-        filename = parts[1]
-        file_path = os.path.join(self.current_dir, filename)
-
-        try:
-            if not os.path.exists(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"sort: {filename}: No such file or directory")
-                return
-
-            if os.path.isdir(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"sort: {filename}: Is a directory")
-                return
-
-            with open(file_path, 'r', encoding="utf-8") as f:
-                lines = f.readlines()
-                sorted_lines = sorted(lines)
-                content = ''.join(sorted_lines)
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(content)
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"sort: {filename}: {str(e)}")
-
-    def uniq_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("uniq: missing operand")
+        if len(argv) < 2:
+            self.write_error("less: missing filename")
             return
-
-        filename = parts[1]
+        filename = argv[1]
         file_path = os.path.join(self.current_dir, filename)
-
-        try:
-            if not os.path.exists(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"uniq: {filename}: No such file or directory")
-                return
-
-            if os.path.isdir(file_path):
-                self.terminal.setTextColor(QColor('#FF0000'))
-                self.terminal.append(f"uniq: {filename}: Is a directory")
-                return
-
-            with open(file_path, 'r', encoding="utf-8") as f:
-                lines = f.readlines()
-                unique_lines = []
-                prev_line = None
-
-                for line in lines:
-                    if line != prev_line:
-                        unique_lines.append(line)
-                        prev_line = line
-
-                content = ''.join(unique_lines)
-                self.terminal.setTextColor(QColor('#00FF00'))
-                self.terminal.append(content)
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"uniq: {filename}: {str(e)}")
-
-    def show_ascii_image(self):
-        path = self.current_cmd[9:].strip()
-        full_path = os.path.join(self.current_dir, path)
-
+        if os.path.isdir(file_path):
+            self.write_error(f"less: {filename}: Is a directory")
+            return
         try:
-            my_art = CustomAsciiArt.from_image(full_path)
-            ascii_text = my_art.to_ascii(
-                columns=40,
-                width_ratio=2.0,
-                monochrome=True,
-            )
-
-            self.terminal.setTextColor(QColor('#00ff00'))
-            self.terminal.append(ascii_text)
+            mapped_file = MappedFile(file_path)
+        except OSError as e:
+            self.write_error(f"less: {filename}: {e.strerror}")
+            return
 
-        except Exception as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"错误: 无法显示ASCII图片 - {str(e)}")
+        self.widget_sink.clear()
+        self.pager = Pager(self.terminal, mapped_file, filename)
+        self.pager.render()
 
-    def curl_command(self):
-        try:
-            url = self.current_cmd.split(' ', 1)[1].strip()
-            response = requests.get(url, timeout=10)
-            response.encoding = response.apparent_encoding
-            response.raise_for_status()
-            escaped_text = escape(response.text)
-            self.terminal.setTextColor(QColor('#00FF00'))
-            self.terminal.append(escaped_text)
-        except IndexError:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("curl: Please provide a URL.")
-        except requests.RequestException as e:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append(f"curl: Error: {str(e)}")
-        except Exception:
-            traceback.print_exc()
+    def exit_pager(self):
+        self.pager.close()
+        self.pager = None
+        self.widget_sink.clear()
+        self.show_prompt()
 
     # === Vim编辑器集成 ===
-    def vim_command(self):
-        parts = self.current_cmd.split()
-        if len(parts) < 2:
-            self.terminal.setTextColor(QColor('#FF0000'))
-            self.terminal.append("vim: missing filename")
+    def vim_command(self, argv):
+        if len(argv) < 2:
+            self.write_error("vim: missing filename")
             return
 
-        filename = parts[1]
+        filename = argv[1]
         file_path = os.path.join(self.current_dir, filename)
 
         self.vim_editor = VimEditor(self.terminal, self.current_dir, filename)
@@ -1114,7 +646,7 @@ class TerminalEmulator(QWidget):
             self.vim_editor = None
             return
 
-        self.terminal.clear()
+        self.widget_sink.clear()
         self.render_vim_editor()
 
     def render_vim_editor(self):
@@ -1124,7 +656,7 @@ class TerminalEmulator(QWidget):
     def exit_vim_editor(self):
         if self.vim_editor:
             self.vim_editor = None
-            self.terminal.clear()
+            self.widget_sink.clear()
             self.show_prompt()
 
     # === 关键修复：处理按键事件 ===
@@ -1216,57 +748,6 @@ class TerminalEmulator(QWidget):
         cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)
         return cursor.selectedText()
 
-    def show_help(self):
-        help_text = """
-        PyTerminal v0.9 帮助信息
-
-        以下是支持的命令列表：
-        - clear: 清空终端屏幕
-        - ls: 列出当前目录下的文件和文件夹
-        - cd [目录名]: 切换当前工作目录
-        - pwd: 显示当前工作目录的路径
-        - touch [文件名]: 创建一个新的空文件
-        - mkdir [目录名]: 创建一个新的目录
-        - rm [文件名/目录名]: 删除文件或目录
-        - cat [文件名]: 显示文件内容
-        - cp [源文件/目录] [目标文件/目录]: 复制文件或目录
-        - mv [源文件/目录] [目标文件/目录]: 移动或重命名文件或目录
-        - echo [文本]: 在终端输出文本
-        - export [变量名]=[值]: 设置环境变量
-        - head -n [行数] [文件名]: 显示文件的前几行
-        - tail -n [行数] [文件名]: 显示文件的后几行
-        - grep [文件名]: 在文件中搜索匹配的文本
-        - sort [文件名]: 对文件内容进行排序
-        - uniq [文件名]: 去除文件中的重复行
-        - asciishow [图片路径]: 显示 ASCII 艺术图片
-        - vim [文件名]: 打开 Vim 编辑器编辑文件
-            - 正常模式: 进入 Vim 默认处于此模式，可进行光标移动、进入其他模式等操作。常用命令有：
-                - i: 进入插入模式
-                - : 进入命令模式
-                - h/j/k/l: 分别向左/下/上/右移动光标
-                - G: 移到文件末尾
-                - gg: 移到文件开头
-            - 插入模式: 用于输入和编辑文本。可使用方向键移动光标，按 Enter 插入新行，按 Backspace 删除字符。
-            - 命令模式: 用于执行保存、退出等操作。常用命令有：
-                - w: 保存文件
-                - q: 退出编辑器（若文件有修改需先保存）
-                - q!: 强制退出编辑器
-                - wq 或 x: 保存并退出编辑器
-        - help: 显示帮助信息
-        - exit: 关闭终端
-        - curl [URL]: 发送 HTTP 请求并显示响应
-        - run [脚本路径]: 运行指定的 shell 脚本
-            - 脚本需以 .sh 结尾。脚本支持以下常见语法：
-                - 变量赋值: 如 a=5 ，可通过 $a 引用变量。
-                - 函数定义: 使用 `def 函数名(参数列表) { 函数体 }` 定义函数，在函数内部可使用 `local` 定义局部变量，`return` 返回值。
-                - 条件语句: 如 `if [ 条件 ]; ... else ... fi` ，根据条件执行不同代码块。
-                - 循环语句: 如 `while [ 条件 ]; ... done` ，当条件为真时循环执行代码块。
-            - 参考example.sh。
-        - python/python3 [脚本路径]: 运行 Python 脚本
-        """
-        self.terminal.setTextColor(QColor('#00FF00'))
-        self.terminal.append(help_text)
-
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+# 图形界面测试不需要显示器
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def terminal(qapp, tmp_path, monkeypatch):
+    """在临时目录中打开的终端窗口（不显示）"""
+    monkeypatch.chdir(tmp_path)
+    from terminal import TerminalEmulator
+    term = TerminalEmulator()
+    yield term
+    term.close()
+
+
+def run_gui_command(terminal, cmd):
+    """像在提示符下按回车一样执行命令，返回写入终端的全部文字"""
+    terminal.current_cmd = cmd
+    terminal.execute_command()
+    terminal.widget_sink.flush()
+    return terminal.terminal.toPlainText()
@@ -0,0 +1,27 @@
+from src.arrays import IndexedArray
+
+
+def test_sparse_append_and_negative_subscript():
+    arr = IndexedArray(['1', '2', '3'])
+    arr.set(5, '9')
+    arr.append('x')
+
+    assert arr.keys() == ['0', '1', '2', '5', '6']
+    assert arr.get(-1) == 'x'
+
+    arr.set(3, 'a')
+    arr.set(4, 'b')
+    arr.append('y')
+    assert arr.keys() == [str(index) for index in range(8)]
+    assert arr.get(-1) == 'y'
+
+
+def test_appends_after_sparse_index_stay_sparse():
+    arr = IndexedArray()
+    arr.set(100000000, 'x')
+    for i in range(1000):
+        arr.append(str(i))
+
+    assert len(arr) == 1001
+    assert arr.get(-1) == '999'
+    assert arr.get(100000001) == '0'
@@ -0,0 +1,35 @@
+from conftest import run_gui_command
+
+
+HELLO = "print('line 1')\nprint('skipped')\nprint('line 2')\n"
+
+
+def test_python_redirect_writes_file(terminal, tmp_path):
+    (tmp_path / 'hello.py').write_text(HELLO)
+    text = run_gui_command(terminal, 'python hello.py > pyout.txt')
+
+    assert (tmp_path / 'pyout.txt').read_text() == HELLO.replace("print('", '').replace("')", '')
+    assert 'line 1' not in text
+    assert terminal.python_process is None
+
+
+def test_python_pipeline_feeds_next_stage(terminal, tmp_path):
+    (tmp_path / 'hello.py').write_text(HELLO)
+    text = run_gui_command(terminal, 'python hello.py | grep line')
+
+    # 终端上的 grep 输出带行号和匹配高亮
+    output = text.split('$ ', 1)[1]
+    assert '[[line]] 1' in output and '[[line]] 2' in output
+    assert 'skipped' not in output
+    assert terminal.python_process is None
+
+
+def test_background_python_runs_without_terminal_input(terminal, tmp_path):
+    (tmp_path / 'fail.py').write_text("print('bye')\nraise SystemExit(3)\n")
+    run_gui_command(terminal, 'python fail.py &')
+    job = terminal.jobs.get(1)
+    terminal.jobs.wait([job])
+
+    assert job.status_text == 'Exit 3'
+    assert job.process is not None
+    assert terminal.python_process is None and not terminal.python_input_mode
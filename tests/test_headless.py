@@ -0,0 +1,32 @@
+import io
+
+from src.headless import HeadlessShell
+
+
+def run_source(source):
+    """以无界面模式执行脚本，返回 (退出码, 标准输出, 标准错误)"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = HeadlessShell(stdout, stderr).run_source(source)
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def test_failed_arithmetic_skips_assignment():
+    code, out, err = run_source("x=5\nx=$((1/0))\necho x=$x\narr=(1 2 3)\narr[1]=$((2/0))\necho ${arr[@]}\n")
+
+    assert out == "x=5\n1 2 3\n"
+    assert err.count('division by 0') == 2
+    assert code == 1
+
+
+def test_failing_background_builtin_reports_exit_status():
+    shell = HeadlessShell(io.StringIO(), io.StringIO())
+    shell.current_cmd = 'nosuchcmd &'
+    shell.execute_command_internal()
+    shell.current_cmd = 'echo ok &'
+    shell.execute_command_internal()
+    failed, done = shell.jobs.jobs()
+    shell.jobs.wait([failed, done])
+
+    assert failed.status_text == 'Exit 1'
+    assert done.status_text == 'Done'
+    assert '[1] Exit 1  nosuchcmd' in shell.sink.stdout.getvalue()
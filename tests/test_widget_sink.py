@@ -0,0 +1,21 @@
+from src.scrollback import Scrollback
+
+
+def test_multiline_write_is_trimmed_before_insert(qapp):
+    from PyQt5.QtWidgets import QTextEdit
+    from src.widget_sink import WidgetSink
+
+    widget = QTextEdit()
+    scrollback = Scrollback(max_lines=100)
+    sink = WidgetSink(widget, scrollback=scrollback)
+    peak = []
+    widget.document().blockCountChanged.connect(peak.append)
+
+    sink.write('\n'.join(f"line {i}" for i in range(500)))
+    sink.flush()
+
+    lines = widget.toPlainText().split('\n')
+    assert lines[-1] == 'line 499'
+    assert len(lines) <= 100
+    assert max(peak) <= 100
+    assert scrollback.trimmed_lines == 500 - len(lines)